@@ -0,0 +1,7 @@
+"""
+Benchmark suite of exmlrd
+
+Synthetic workbooks are generated deterministically, every scenario is timed in a
+fresh process and the results are saved as JSON so that runs can be compared.
+See `python -m benchmarks --help`.
+"""
@@ -0,0 +1,121 @@
+"""
+Command line of the benchmark suite
+
+    python -m benchmarks run --sizes 1k,100k,1M --out results.json
+    python -m benchmarks compare baseline.json results.json
+    python -m benchmarks generate --shapes sst --sizes 10M
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+from benchmarks import runner
+from benchmarks.generator import SHAPES, generate, parse_size
+from benchmarks.scenarios import SCENARIOS
+
+DEFAULT_WORKDIR = ".benchmarks"
+
+
+def split(value: str, choices) -> List[str]:
+    if value == "all":
+        return list(choices)
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in choices]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown {', '.join(unknown)} (choose from {', '.join(choices)})"
+        )
+    return names
+
+
+def sizes(value: str) -> List[int]:
+    try:
+        return [parse_size(size) for size in value.split(",") if size.strip()]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_workbook_options(command: argparse.ArgumentParser) -> None:
+        command.add_argument(
+            "--shapes",
+            type=lambda v: split(v, SHAPES),
+            default=list(SHAPES),
+            help=f"comma separated shapes or all ({', '.join(SHAPES)})",
+        )
+        command.add_argument(
+            "--sizes", type=sizes, default=[1000, 10000], help="e.g. 1k,100k,10M"
+        )
+        command.add_argument("--seed", type=int, default=0)
+        command.add_argument("--workdir", default=DEFAULT_WORKDIR)
+
+    run = commands.add_parser("run", help="run the scenarios")
+    add_workbook_options(run)
+    run.add_argument(
+        "--scenarios",
+        type=lambda v: split(v, SCENARIOS),
+        default=list(SCENARIOS),
+        help=f"comma separated scenarios or all ({', '.join(SCENARIOS)})",
+    )
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--out", help="write the results as JSON")
+    run.add_argument(
+        "--no-isolate",
+        action="store_true",
+        help="run the scenarios in this process (peak RSS then accumulates)",
+    )
+
+    compare = commands.add_parser("compare", help="compare two result files")
+    compare.add_argument("old")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=0.1)
+    compare.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="exit with status 1 when a scenario regressed",
+    )
+
+    gen = commands.add_parser("generate", help="only generate the workbooks")
+    add_workbook_options(gen)
+    gen.add_argument("--overwrite", action="store_true")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = runner.run(
+            args.shapes,
+            args.sizes,
+            args.scenarios,
+            workdir=args.workdir,
+            repeat=args.repeat,
+            seed=args.seed,
+            isolate=not args.no_isolate,
+        )
+        if args.out:
+            runner.save(results, args.out)
+    elif args.command == "compare":
+        rows = runner.compare(
+            runner.load(args.old), runner.load(args.new), threshold=args.threshold
+        )
+        print(runner.format_comparison(rows))
+        if args.fail_on_regression and any(r.status == "regression" for r in rows):
+            return 1
+    else:
+        for shape in args.shapes:
+            for cells in args.sizes:
+                print(
+                    generate(
+                        args.workdir,
+                        shape,
+                        cells,
+                        seed=args.seed,
+                        overwrite=args.overwrite,
+                    )
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+Deterministic generator of synthetic xlsx workbooks
+
+The parts are written directly with zipfile instead of openpyxl, so that
+workbooks of millions of cells are produced in seconds and with flat memory.
+Every random choice comes from a seeded random.Random and every zip member has
+a fixed timestamp, hence the same (shape, cells, seed) always gives the same bytes.
+"""
+import os
+import random
+from typing import IO, Iterator, List, Tuple
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+from exmlrd.addressing import cell_address, column_letter
+from exmlrd.tags import MAIN_NS
+
+SHAPES = ("numeric", "sst", "styled", "merged", "sheets")
+
+# Number of columns of the generated sheets
+COLS = 10
+# Number of worksheets of the "sheets" shape
+SHEETS = 50
+# Number of distinct cellXfs of the "styled" shape
+STYLES = 500
+
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+DOC_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+WORKSHEET_TYPE = DOC_REL_NS + "/worksheet"
+DATE_TIME = (1980, 1, 1, 0, 0, 0)
+HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+# Rows buffered before a write to the zip member
+FLUSH_ROWS = 1000
+
+SIZE_SUFFIXES = {"k": 10**3, "m": 10**6}
+
+
+def parse_size(size: str) -> int:
+    """Parse a number of cells such as "1k", "250k" or "10M"."""
+    size = size.strip().lower()
+    factor = SIZE_SUFFIXES.get(size[-1:], 1)
+    if factor != 1:
+        size = size[:-1]
+    try:
+        return int(float(size) * factor)
+    except ValueError:
+        raise ValueError(f"Invalid size: {size!r}") from None
+
+
+def format_size(cells: int) -> str:
+    for suffix, factor in (("M", 10**6), ("k", 10**3)):
+        if cells >= factor and cells % factor == 0:
+            return f"{cells // factor}{suffix}"
+    return str(cells)
+
+
+def workbook_path(directory: str, shape: str, cells: int, seed: int = 0) -> str:
+    return os.path.join(directory, f"{shape}-{format_size(cells)}-{seed}.xlsx")
+
+
+class WorkbookWriter:
+    """
+    Writes one synthetic workbook of a given shape
+
+    Attributes:
+        shape (str): One of SHAPES
+        cells (int): Total number of cells over all worksheets
+        seed (int): Seed of the random values
+    """
+
+    def __init__(self, shape: str, cells: int, seed: int = 0):
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown shape: {shape} (expected one of {SHAPES})")
+        self.shape = shape
+        self.cells = cells
+        self.seed = seed
+        self.random = random.Random(f"{shape}:{cells}:{seed}")
+        nsheets = SHEETS if shape == "sheets" else 1
+        self.rows = max(-(-cells // (COLS * nsheets)), 1)
+        self.nsheets = nsheets
+        # Pool of shared strings, a quarter of the cells so that strings repeat
+        self.strings: List[str] = []
+        if shape == "sst":
+            self.strings = [
+                f"text {i} {self.__word()}" for i in range(max(cells // 4, 1))
+            ]
+
+    def __word(self) -> str:
+        letters = "abcdefghijklmnopqrstuvwxyz"
+        return "".join(self.random.choice(letters) for _ in range(8))
+
+    def write(self, path: str) -> str:
+        with ZipFile(path, "w", ZIP_DEFLATED) as archive:
+            self.__member(archive, "[Content_Types].xml", self.content_types())
+            self.__member(archive, "_rels/.rels", self.package_rels())
+            self.__member(archive, "xl/workbook.xml", self.workbook())
+            self.__member(archive, "xl/_rels/workbook.xml.rels", self.workbook_rels())
+            self.__member(archive, "xl/styles.xml", self.styles())
+            if self.strings:
+                self.__member(archive, "xl/sharedStrings.xml", self.shared_strings())
+            for number in range(1, self.nsheets + 1):
+                info = self.__info(f"xl/worksheets/sheet{number}.xml")
+                with archive.open(info, "w") as fp:
+                    self.__write_sheet(fp)
+        return path
+
+    def __info(self, name: str) -> ZipInfo:
+        info = ZipInfo(name, date_time=DATE_TIME)
+        info.compress_type = ZIP_DEFLATED
+        return info
+
+    def __member(self, archive: ZipFile, name: str, xml: str) -> None:
+        archive.writestr(self.__info(name), xml.encode("utf-8"))
+
+    def content_types(self) -> str:
+        ct = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+        overrides = [
+            ("/xl/workbook.xml", ct + ".sheet.main+xml"),
+            ("/xl/styles.xml", ct + ".styles+xml"),
+        ]
+        if self.strings:
+            overrides.append(("/xl/sharedStrings.xml", ct + ".sharedStrings+xml"))
+        for number in range(1, self.nsheets + 1):
+            overrides.append(
+                (f"/xl/worksheets/sheet{number}.xml", ct + ".worksheet+xml")
+            )
+        return (
+            HEADER
+            + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            + '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            + '<Default Extension="xml" ContentType="application/xml"/>'
+            + "".join(
+                f'<Override PartName="{name}" ContentType="{content_type}"/>'
+                for name, content_type in overrides
+            )
+            + "</Types>"
+        )
+
+    def package_rels(self) -> str:
+        return (
+            HEADER
+            + f'<Relationships xmlns="{REL_NS}">'
+            + f'<Relationship Id="rId1" Type="{DOC_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            + "</Relationships>"
+        )
+
+    def workbook(self) -> str:
+        sheets = "".join(
+            f'<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>'
+            for n in range(1, self.nsheets + 1)
+        )
+        return (
+            HEADER
+            + f'<workbook xmlns="{MAIN_NS}" xmlns:r="{DOC_REL_NS}">'
+            + f"<sheets>{sheets}</sheets></workbook>"
+        )
+
+    def workbook_rels(self) -> str:
+        rels = [
+            (f"rId{n}", WORKSHEET_TYPE, f"worksheets/sheet{n}.xml")
+            for n in range(1, self.nsheets + 1)
+        ]
+        n = self.nsheets
+        rels.append((f"rId{n + 1}", DOC_REL_NS + "/styles", "styles.xml"))
+        if self.strings:
+            rels.append(
+                (f"rId{n + 2}", DOC_REL_NS + "/sharedStrings", "sharedStrings.xml")
+            )
+        return (
+            HEADER
+            + f'<Relationships xmlns="{REL_NS}">'
+            + "".join(
+                f'<Relationship Id="{rid}" Type="{rtype}" Target="{target}"/>'
+                for rid, rtype, target in rels
+            )
+            + "</Relationships>"
+        )
+
+    def styles(self) -> str:
+        nfonts, nfills, nborders, nnumfmts, nxfs = 1, 2, 1, 0, 1
+        if self.shape == "styled":
+            nfonts, nfills, nborders, nnumfmts, nxfs = 50, 20, 10, 30, STYLES
+        fonts = "".join(
+            f'<font><sz val="{10 + i % 8}"/><color rgb="FF{i * 4099 % 0xFFFFFF:06X}"/>'
+            f'<name val="Font{i}"/>{"<b/>" if i % 3 == 0 else ""}</font>'
+            for i in range(nfonts)
+        )
+        fills = '<fill><patternFill patternType="none"/></fill>' + "".join(
+            f'<fill><patternFill patternType="solid"><fgColor rgb="FF{i * 7919 % 0xFFFFFF:06X}"/>'
+            "</patternFill></fill>"
+            for i in range(1, nfills)
+        )
+        borders = "".join(
+            f'<border><left style="thin"/><right/><top/><bottom style="{"thin" if i else "none"}"/></border>'
+            for i in range(nborders)
+        )
+        numfmts = "".join(
+            f'<numFmt numFmtId="{164 + i}" formatCode="0.{"0" * (i % 6 + 1)}"/>'
+            for i in range(nnumfmts)
+        )
+        xfs = "".join(
+            f'<xf numFmtId="{164 + i % nnumfmts if nnumfmts and i else 0}" '
+            f'fontId="{i % nfonts}" fillId="{i % nfills}" borderId="{i % nborders}" '
+            'xfId="0"/>'
+            for i in range(nxfs)
+        )
+        return (
+            HEADER
+            + f'<styleSheet xmlns="{MAIN_NS}">'
+            + (f'<numFmts count="{nnumfmts}">{numfmts}</numFmts>' if nnumfmts else "")
+            + f'<fonts count="{nfonts}">{fonts}</fonts>'
+            + f'<fills count="{nfills}">{fills}</fills>'
+            + f'<borders count="{nborders}">{borders}</borders>'
+            + '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            + f'<cellXfs count="{nxfs}">{xfs}</cellXfs>'
+            + '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            + "</styleSheet>"
+        )
+
+    def shared_strings(self) -> str:
+        items = "".join(f"<si><t>{text}</t></si>" for text in self.strings)
+        return (
+            HEADER
+            + f'<sst xmlns="{MAIN_NS}" count="{self.cells}" uniqueCount="{len(self.strings)}">'
+            + items
+            + "</sst>"
+        )
+
+    def mergecells(self) -> List[str]:
+        """Merged ranges of the "merged" shape, 2x2 blocks on every other row pair."""
+        if self.shape != "merged":
+            return []
+        refs = []
+        for row in range(1, self.rows, 4):
+            for col in range(1, COLS, 2):
+                refs.append(
+                    f"{cell_address(row, col)}:{cell_address(row + 1, col + 1)}"
+                )
+        return refs
+
+    def __write_sheet(self, fp: IO[bytes]) -> None:
+        last = cell_address(self.rows, COLS)
+        fp.write(
+            (
+                HEADER
+                + f'<worksheet xmlns="{MAIN_NS}"><dimension ref="A1:{last}"/><sheetData>'
+            ).encode("utf-8")
+        )
+        buffer: List[str] = []
+        for row, cells in self.__rows():
+            buffer.append(f'<row r="{row}">')
+            for address, attributes, value in cells:
+                buffer.append(f'<c r="{address}"{attributes}><v>{value}</v></c>')
+            buffer.append("</row>")
+            if row % FLUSH_ROWS == 0:
+                fp.write("".join(buffer).encode("utf-8"))
+                buffer = []
+        buffer.append("</sheetData>")
+        refs = self.mergecells()
+        if refs:
+            buffer.append(f'<mergeCells count="{len(refs)}">')
+            buffer.extend(f'<mergeCell ref="{ref}"/>' for ref in refs)
+            buffer.append("</mergeCells>")
+        buffer.append("</worksheet>")
+        fp.write("".join(buffer).encode("utf-8"))
+
+    def __rows(self) -> Iterator[Tuple[int, List[Tuple[str, str, str]]]]:
+        rnd = self.random
+        letters = [column_letter(col) for col in range(1, COLS + 1)]
+        nstrings = len(self.strings)
+        for row in range(1, self.rows + 1):
+            cells = []
+            for col, letter in enumerate(letters, 1):
+                address = f"{letter}{row}"
+                if self.shape == "sst":
+                    value = str(rnd.randrange(nstrings))
+                    cells.append((address, ' t="s"', value))
+                elif self.shape == "styled":
+                    style = rnd.randrange(STYLES)
+                    cells.append(
+                        (address, f' s="{style}"', f"{rnd.random() * 1000:.4f}")
+                    )
+                elif col % 2:
+                    cells.append((address, "", str(rnd.randrange(1000000))))
+                else:
+                    cells.append((address, "", f"{rnd.random() * 1000:.6f}"))
+            yield row, cells
+
+
+def generate(
+    directory: str, shape: str, cells: int, *, seed: int = 0, overwrite: bool = False
+) -> str:
+    """Write a synthetic workbook unless it already exists.
+
+    Args:
+        directory (str): Directory of the generated workbooks.
+        shape (str): "numeric", "sst" (shared-string heavy), "styled" (many cellXfs),
+            "merged" (many merged ranges) or "sheets" (many worksheets).
+        cells (int): Total number of cells over all worksheets.
+        seed (int): Seed of the random values.
+        overwrite (bool): Write the workbook again even when it exists.
+
+    Returns:
+        str: Path of the workbook.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = workbook_path(directory, shape, cells, seed)
+    if overwrite or not os.path.exists(path):
+        tmp = path + ".tmp"
+        WorkbookWriter(shape, cells, seed).write(tmp)
+        os.replace(tmp, path)
+    return path
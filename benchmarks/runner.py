@@ -0,0 +1,250 @@
+"""
+Runs the scenarios in isolated processes and compares saved results
+"""
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from benchmarks.generator import format_size, generate
+from benchmarks.scenarios import SCENARIOS
+
+RESULTS_VERSION = 1
+
+
+def peak_rss() -> Optional[int]:
+    """Peak resident set size of this process in bytes, None where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def measure(scenario: str, path: str, shape: str, repeat: int) -> Dict[str, Any]:
+    """Run one scenario in the current process.
+
+    The wall times come from `repeat` plain runs. The allocation peak comes from
+    one more run under tracemalloc, which is left out of the timings because it
+    slows allocations down several times.
+    """
+    run = SCENARIOS[scenario]
+    base_rss = peak_rss()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(path, shape)
+        times.append(time.perf_counter() - start)
+    rss = peak_rss()
+
+    tracemalloc.start()
+    run(path, shape)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "times": times,
+        "min": min(times),
+        "median": statistics.median(times),
+        "peak_rss": rss,
+        "base_rss": base_rss,
+        "tracemalloc_peak": traced_peak,
+    }
+
+
+def run(
+    shapes: Iterable[str],
+    sizes: Iterable[int],
+    scenarios: Iterable[str],
+    *,
+    workdir: str,
+    repeat: int = 3,
+    seed: int = 0,
+    isolate: bool = True,
+    progress: bool = True,
+) -> Dict[str, Any]:
+    """Run every scenario on every generated workbook.
+
+    Args:
+        shapes (Iterable[str]): Workbook shapes, see generator.SHAPES.
+        sizes (Iterable[int]): Numbers of cells.
+        scenarios (Iterable[str]): Scenario names, see scenarios.SCENARIOS.
+        workdir (str): Directory of the generated workbooks, reused between runs.
+        repeat (int): Timed runs per scenario.
+        seed (int): Seed of the generated workbooks.
+        isolate (bool): Measure every scenario in a fresh process, so that the peak
+            RSS of one scenario does not leak into the next one.
+        progress (bool): Print every result as it completes.
+
+    Returns:
+        dict: Results, serializable to JSON.
+    """
+    scenarios = list(scenarios)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    results: List[Dict[str, Any]] = []
+    context = multiprocessing.get_context("spawn")
+    for shape in shapes:
+        for cells in sizes:
+            start = time.perf_counter()
+            path = generate(workdir, shape, cells, seed=seed)
+            if progress:
+                print(
+                    f"{shape}-{format_size(cells)}: {path} "
+                    f"({os.path.getsize(path):,} bytes, {time.perf_counter() - start:.1f}s)",
+                    file=sys.stderr,
+                )
+            for scenario in scenarios:
+                if isolate:
+                    with ProcessPoolExecutor(1, mp_context=context) as executor:
+                        measured = executor.submit(
+                            measure, scenario, path, shape, repeat
+                        ).result()
+                else:
+                    measured = measure(scenario, path, shape, repeat)
+                result = {
+                    "shape": shape,
+                    "cells": cells,
+                    "scenario": scenario,
+                    **measured,
+                }
+                results.append(result)
+                if progress:
+                    print(format_result(result), file=sys.stderr)
+    return {
+        "version": RESULTS_VERSION,
+        "meta": metadata(seed, repeat),
+        "results": results,
+    }
+
+
+def metadata(seed: int, repeat: int) -> Dict[str, Any]:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        exmlrd_version = version("exmlrd")
+    except PackageNotFoundError:
+        exmlrd_version = None
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "exmlrd": exmlrd_version,
+        "seed": seed,
+        "repeat": repeat,
+    }
+
+
+def format_bytes(nbytes: Optional[int]) -> str:
+    if nbytes is None:
+        return "-"
+    return f"{nbytes / 1024 / 1024:.1f}MiB"
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    return (
+        f"  {result['scenario']:<13} median {result['median'] * 1000:10.1f}ms  "
+        f"min {result['min'] * 1000:10.1f}ms  rss {format_bytes(result['peak_rss']):>10}  "
+        f"traced {format_bytes(result['tracemalloc_peak']):>10}"
+    )
+
+
+def save(results: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(
+            f"{path}: unsupported results version {results.get('version')}"
+        )
+    return results
+
+
+class Comparison(NamedTuple):
+    shape: str
+    cells: int
+    scenario: str
+    old: float
+    new: float
+    time_ratio: float
+    memory_ratio: Optional[float]
+    status: str
+
+
+def compare(
+    old: Dict[str, Any], new: Dict[str, Any], *, threshold: float = 0.1
+) -> List[Comparison]:
+    """Compare the median times and allocation peaks of two result sets.
+
+    Args:
+        old (dict): Baseline results.
+        new (dict): Results to check.
+        threshold (float): Relative change below which a difference is noise.
+
+    Returns:
+        list[Comparison]: One row per scenario present in both result sets. status
+            is "regression" when the time or the allocation peak grew by more than
+            the threshold, "improvement" when the time shrank by more than the
+            threshold, and "same" otherwise.
+    """
+
+    def key(result: Dict[str, Any]) -> Tuple[str, int, str]:
+        return result["shape"], result["cells"], result["scenario"]
+
+    baseline = {key(result): result for result in old["results"]}
+    rows: List[Comparison] = []
+    for result in new["results"]:
+        before = baseline.get(key(result))
+        if before is None:
+            continue
+        time_ratio = result["median"] / before["median"] if before["median"] else 1.0
+        memory_ratio = None
+        if before.get("tracemalloc_peak") and result.get("tracemalloc_peak"):
+            memory_ratio = result["tracemalloc_peak"] / before["tracemalloc_peak"]
+        if time_ratio > 1 + threshold or (memory_ratio or 0) > 1 + threshold:
+            status = "regression"
+        elif time_ratio < 1 - threshold:
+            status = "improvement"
+        else:
+            status = "same"
+        rows.append(
+            Comparison(
+                *key(result),
+                before["median"],
+                result["median"],
+                time_ratio,
+                memory_ratio,
+                status,
+            )
+        )
+    return rows
+
+
+def format_comparison(rows: List[Comparison]) -> str:
+    lines = [
+        f"{'shape':<8} {'cells':>6} {'scenario':<13} {'old':>10} {'new':>10} "
+        f"{'time':>7} {'memory':>7}  status"
+    ]
+    for row in rows:
+        memory = "-" if row.memory_ratio is None else f"{row.memory_ratio:.2f}x"
+        lines.append(
+            f"{row.shape:<8} {format_size(row.cells):>6} {row.scenario:<13} "
+            f"{row.old * 1000:8.1f}ms {row.new * 1000:8.1f}ms "
+            f"{row.time_ratio:6.2f}x {memory:>7}  {row.status}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,70 @@
+"""
+Benchmark scenarios, each one a cold read of a workbook through the public API
+
+A scenario opens the workbook itself, so that the time of the parts it parses
+lazily (manifest, shared strings, styles, worksheets) is part of its measure.
+"""
+from typing import Callable, Dict
+
+import exmlrd
+from benchmarks.generator import COLS, SHEETS
+
+# Number of merge lookups of the merge_lookup scenario
+MERGE_LOOKUPS = 1000
+
+
+def open_workbook(path: str, shape: str) -> int:
+    excel = exmlrd.excel_archiver(path, styled=shape == "styled")
+    count = len(excel.sheetxml.ws.worksheets)
+    excel.archive.close()
+    return count
+
+
+def get_cell(path: str, shape: str) -> int:
+    excel = exmlrd.excel_archiver(path, styled=shape == "styled")
+    dimension = excel.sheetxml.get_dimension_range(worksheet=1)
+    last_row = dimension.max_row if dimension is not None else 1
+    cell = excel.get_cell(last_row // 2 + 1, COLS // 2)
+    excel.archive.close()
+    return len(cell.value)
+
+
+def to_json(path: str, shape: str) -> int:
+    excel = exmlrd.excel_archiver(path, styled=shape == "styled")
+    result = excel.to_json()
+    excel.archive.close()
+    return len(result)
+
+
+def sheet_names(path: str, shape: str) -> int:
+    excel = exmlrd.excel_archiver(path)
+    names = [
+        excel.worksheet(number)
+        for number in range(1, len(excel.sheetxml.ws.worksheets) + 1)
+    ]
+    excel.archive.close()
+    assert shape != "sheets" or len(names) == SHEETS
+    return len(names)
+
+
+def merge_lookup(path: str, shape: str) -> int:
+    excel = exmlrd.excel_archiver(path)
+    dimension = excel.sheetxml.get_dimension_range(worksheet=1)
+    last_row = dimension.max_row if dimension is not None else 1
+    found = 0
+    for i in range(MERGE_LOOKUPS):
+        row = i * 7919 % last_row + 1
+        col = i % COLS + 1
+        if excel.get_mergecell(exmlrd.CellRange(row, col, row, col).ref, 1):
+            found += 1
+    excel.archive.close()
+    return found
+
+
+SCENARIOS: Dict[str, Callable[[str, str], int]] = {
+    "open": open_workbook,
+    "get_cell": get_cell,
+    "to_json": to_json,
+    "sheet_names": sheet_names,
+    "merge_lookup": merge_lookup,
+}
@@ -1,5 +1,37 @@
+from typing import Iterable, Optional
+
+from exmlrd.addressing import CellRange
 from exmlrd.archive import ExcelArchive
+from exmlrd.cache import DEFAULT_CACHE_BYTES
+from exmlrd.diskcache import DEFAULT_DISK_CACHE_BYTES
+from exmlrd.extract import ExtractResult, Template, extract_many
+from exmlrd.stats import Hook
 
 
-def excel_archiver(filepath: str) -> ExcelArchive:
-    return ExcelArchive(filepath)
+def excel_archiver(
+    filepath: str,
+    *,
+    cache_bytes: int = DEFAULT_CACHE_BYTES,
+    styled: bool = False,
+    preload: Iterable[str] = (),
+    cache_dir: Optional[str] = None,
+    cache_dir_bytes: int = DEFAULT_DISK_CACHE_BYTES,
+    parser: Optional[str] = "auto",
+    instrument: bool = False,
+    hooks: Iterable[Hook] = (),
+    checkpoint_rows: Optional[int] = None,
+    memory_budget: Optional[int] = None,
+) -> ExcelArchive:
+    return ExcelArchive(
+        filepath,
+        cache_bytes=cache_bytes,
+        styled=styled,
+        preload=preload,
+        cache_dir=cache_dir,
+        cache_dir_bytes=cache_dir_bytes,
+        parser=parser,
+        instrument=instrument,
+        hooks=hooks,
+        checkpoint_rows=checkpoint_rows,
+        memory_budget=memory_budget,
+    )
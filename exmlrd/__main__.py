@@ -0,0 +1,91 @@
+"""
+Command line converting workbooks to CSV, JSON Lines or Parquet
+
+    python -m exmlrd data/ -o out/ --format parquet --workers 8
+    python -m exmlrd "reports/**/*.xlsx" -o out/ --format csv --sheets Summary,2
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+from exmlrd.cell import SheetKey
+from exmlrd.convert import FORMATS, Summary, convert_many, find_workbooks
+
+
+def sheet_keys(value: str) -> List[SheetKey]:
+    """Split "1,Data,3" into worksheet numbers and names."""
+    keys: List[SheetKey] = []
+    for key in value.split(","):
+        key = key.strip()
+        if key:
+            keys.append(int(key) if key.isdigit() else key)
+    return keys
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m exmlrd",
+        description="Convert .xlsx workbooks to CSV, JSON Lines or Parquet, one file per sheet.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="workbooks, directories (walked recursively) or globs"
+    )
+    parser.add_argument("-o", "--out-dir", required=True, help="output directory")
+    parser.add_argument("-f", "--format", choices=FORMATS, default="csv")
+    parser.add_argument(
+        "--sheets",
+        type=sheet_keys,
+        help="comma separated worksheet numbers (from 1) or names, all sheets by default",
+    )
+    parser.add_argument(
+        "--header",
+        type=int,
+        help="row holding the column names (Parquet, JSON Lines), first line of CSV",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        help="worker processes, the number of CPUs by default",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="convert again the outputs that are newer than their workbook",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="only print the summary"
+    )
+    args = parser.parse_args(argv)
+
+    workbooks = find_workbooks(args.inputs)
+    if not workbooks:
+        print("No workbook found", file=sys.stderr)
+        return 2
+    summary = Summary()
+    for result in convert_many(
+        workbooks,
+        args.out_dir,
+        args.format,
+        sheets=args.sheets,
+        header=args.header,
+        force=args.force,
+        workers=args.workers,
+    ):
+        summary.add(result)
+        if not args.quiet:
+            if result.ok:
+                written = sum(not output.skipped for output in result.outputs)
+                print(
+                    f"{result.path}: {written} sheets, {result.cells:,} cells "
+                    f"({result.seconds:.2f}s)",
+                    file=sys.stderr,
+                )
+            else:
+                print(f"{result.path}: {result.error}", file=sys.stderr)
+    print(summary.format())
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
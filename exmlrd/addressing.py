@@ -0,0 +1,369 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Last column addressable with three letters (ZZZ). Excel itself stops at XFD (16384),
+# Cell accepts every three-letter column.
+MAX_COL = 18278
+MAX_ROW = 1048576
+
+DIGITS = "0123456789"
+
+
+# Column letters by column number (index 0 is unused) and the other way around
+COLUMN_LETTERS: List[str] = [""]
+for _col in range(1, MAX_COL + 1):
+    _q, _r = divmod(_col - 1, 26)
+    COLUMN_LETTERS.append((COLUMN_LETTERS[_q] if _q else "") + chr(_r + ord("A")))
+del _col, _q, _r
+COLUMN_NUMBERS: Dict[str, int] = {
+    letters: col for col, letters in enumerate(COLUMN_LETTERS) if letters
+}
+
+
+def column_letter(col: int) -> str:
+    """Convert a column number to its letters.
+
+    Args:
+        col (int): Column number starting from 1.
+
+    Returns:
+        str: The column letters.
+
+    Example:
+        >>> column_letter(27)
+        'AA'
+    """
+    if 0 < col <= MAX_COL:
+        return COLUMN_LETTERS[col]
+    letters = ""
+    while col > 0:
+        col, c = divmod(col - 1, 26)
+        letters = chr(c + ord("A")) + letters
+    return letters
+
+
+def column_number(letters: str) -> int:
+    """Convert column letters to the column number.
+
+    Args:
+        letters (str): Column letters in upper case.
+
+    Returns:
+        int: Column number starting from 1.
+
+    Example:
+        >>> column_number("AA")
+        27
+    """
+    col = COLUMN_NUMBERS.get(letters)
+    if col is not None:
+        return col
+    if not letters or not letters.isascii() or not letters.isalpha():
+        raise ValueError(f"Invalid column letters: {letters}")
+    if not letters.isupper():
+        raise ValueError(f"Invalid column letters: {letters}")
+    col = 0
+    for c in letters:
+        col = col * 26 + ord(c) - ord("A") + 1
+    return col
+
+
+def split_address(cell_address: str) -> Tuple[int, int]:
+    """Convert a cell address in A1 format to its row and column number.
+
+    The column letters are looked up in a precomputed table instead of matching
+    a regular expression. Absolute references ("$A$1") are accepted.
+
+    Args:
+        cell_address (str): The cell address.
+
+    Returns:
+        tuple[int, int]: The row and column number starting from 1.
+
+    Example:
+        >>> split_address("AA2")
+        (2, 27)
+    """
+    letters = cell_address.rstrip(DIGITS)
+    col = COLUMN_NUMBERS.get(letters)
+    if col is not None and len(letters) < len(cell_address):
+        return int(cell_address[len(letters) :]), col
+    # Slow path: absolute references, malformed addresses or columns past ZZZ
+    address = cell_address.replace("$", "")
+    letters = address.rstrip(DIGITS)
+    if not address or len(letters) == len(address):
+        raise ValueError(f"Invalid cell address: {cell_address}")
+    try:
+        col = column_number(letters)
+    except ValueError:
+        raise ValueError(f"Invalid cell address: {cell_address}") from None
+    return int(address[len(letters) :]), col
+
+
+def cell_address(row: int, col: int) -> str:
+    """Convert a row and column number to a cell address in A1 format.
+
+    Example:
+        >>> cell_address(3, 28)
+        'AB3'
+    """
+    return f"{column_letter(col)}{row}"
+
+
+def split_addresses(addresses: Iterable[str]) -> Tuple[List[int], List[int]]:
+    """Convert many cell addresses at once.
+
+    Args:
+        addresses (Iterable[str]): Cell addresses in A1 format.
+
+    Returns:
+        tuple[list[int], list[int]]: The row numbers and the column numbers.
+    """
+    rows: List[int] = []
+    cols: List[int] = []
+    numbers = COLUMN_NUMBERS
+    for address in addresses:
+        letters = address.rstrip(DIGITS)
+        col = numbers.get(letters)
+        if col is not None and len(letters) < len(address):
+            row = int(address[len(letters) :])
+        else:
+            row, col = split_address(address)
+        rows.append(row)
+        cols.append(col)
+    return rows, cols
+
+
+def join_addresses(rows: Iterable[int], cols: Iterable[int]) -> List[str]:
+    """Convert row and column numbers to cell addresses, pairwise."""
+    letters = COLUMN_LETTERS
+    return [
+        f"{letters[col] if 0 < col <= MAX_COL else column_letter(col)}{row}"
+        for row, col in zip(rows, cols)
+    ]
+
+
+def addresses_to_numpy(addresses: Any) -> Tuple[Any, Any]:
+    """Convert an array of cell addresses to arrays of row and column numbers.
+
+    The addresses are decoded as a matrix of bytes, one character position at a time,
+    without a Python loop per cell.
+
+    Args:
+        addresses (array-like of str): Cell addresses in A1 format, without "$".
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: The row and column numbers as int64.
+    """
+    from exmlrd.export import import_numpy
+
+    np = import_numpy()
+    try:
+        chars = np.asarray(addresses, dtype="S")
+    except UnicodeEncodeError as e:
+        raise ValueError(f"Invalid cell address: {e.object}") from None
+    chars = chars.ravel()
+    width = chars.dtype.itemsize
+    codes = chars.view(np.uint8).reshape(len(chars), width)
+    # Class of every byte: 0 letter, 1 digit, 2 padding, 3 anything else. A valid
+    # address is letters, then digits, then padding, so the classes never decrease.
+    kind = np.full(codes.shape, 3, dtype=np.int8)
+    kind[codes == 0] = 2
+    kind[(codes - np.uint8(ord("0"))) < 10] = 1
+    kind[(codes - np.uint8(ord("A"))) < 26] = 0
+    valid = (
+        (kind[:, 0] == 0)
+        & (kind == 1).any(axis=1)
+        & (np.diff(kind, axis=1) >= 0).all(axis=1)
+        & (kind != 3).all(axis=1)
+    )
+    if not valid.all():
+        bad = chars[~valid][0].decode()
+        raise ValueError(f"Invalid cell address: {bad}")
+
+    rows = np.zeros(len(chars), dtype=np.int64)
+    cols = np.zeros(len(chars), dtype=np.int64)
+    for i in range(width):
+        code = codes[:, i].astype(np.int64)
+        letter = kind[:, i] == 0
+        cols[letter] = cols[letter] * 26 + code[letter] - (ord("A") - 1)
+        digit = kind[:, i] == 1
+        rows[digit] = rows[digit] * 10 + code[digit] - ord("0")
+    return rows, cols
+
+
+def numpy_to_addresses(rows: Any, cols: Any) -> Any:
+    """Convert arrays of row and column numbers to an array of cell addresses."""
+    from exmlrd.export import import_numpy
+
+    np = import_numpy()
+    cols = np.asarray(cols, dtype=np.int64)
+    rows = np.asarray(rows, dtype=np.int64)
+    letters = np.asarray(COLUMN_LETTERS, dtype="U3")
+    if cols.size and (cols.min() < 1 or cols.max() > MAX_COL):
+        raise ValueError(f"Column number out of range 1..{MAX_COL}")
+    return np.char.add(letters[cols], rows.astype("U"))
+
+
+class CellRange:
+    """
+    Rectangular range of cells such as "A1:C5"
+
+    The corners are normalized so that min_row <= max_row and min_col <= max_col
+    whatever the order they were written in. Ranges are immutable and hashable.
+
+    Attributes:
+        min_row (int): First row
+        min_col (int): First column
+        max_row (int): Last row
+        max_col (int): Last column
+    """
+
+    __slots__ = ("min_row", "min_col", "max_row", "max_col")
+    min_row: int
+    min_col: int
+    max_row: int
+    max_col: int
+
+    def __init__(self, min_row: int, min_col: int, max_row: int, max_col: int):
+        if min_row > max_row:
+            min_row, max_row = max_row, min_row
+        if min_col > max_col:
+            min_col, max_col = max_col, min_col
+        object.__setattr__(self, "min_row", min_row)
+        object.__setattr__(self, "min_col", min_col)
+        object.__setattr__(self, "max_row", max_row)
+        object.__setattr__(self, "max_col", max_col)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("CellRange is immutable")
+
+    @classmethod
+    def parse(cls, ref: str) -> "CellRange":
+        """Parse a range or a single cell in A1 format.
+
+        Example:
+            >>> CellRange.parse("C5:$A$1")
+            CellRange('A1:C5')
+        """
+        start, _, end = ref.partition(":")
+        start_row, start_col = split_address(start)
+        if not end:
+            return cls(start_row, start_col, start_row, start_col)
+        end_row, end_col = split_address(end)
+        return cls(start_row, start_col, end_row, end_col)
+
+    @property
+    def ref(self) -> str:
+        start = cell_address(self.min_row, self.min_col)
+        if self.min_row == self.max_row and self.min_col == self.max_col:
+            return start
+        return f"{start}:{cell_address(self.max_row, self.max_col)}"
+
+    @property
+    def bounds(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """The (row, col) of the top-left and the bottom-right cell."""
+        return (self.min_row, self.min_col), (self.max_row, self.max_col)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.max_row - self.min_row + 1, self.max_col - self.min_col + 1
+
+    def __len__(self) -> int:
+        nrows, ncols = self.shape
+        return nrows * ncols
+
+    def __str__(self) -> str:
+        return self.ref
+
+    def __repr__(self) -> str:
+        return f"CellRange({self.ref!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CellRange):
+            return NotImplemented
+        return self.bounds == other.bounds
+
+    def __hash__(self) -> int:
+        return hash(self.bounds)
+
+    def __contains__(self, item: Union[str, Tuple[int, int], "CellRange"]) -> bool:
+        """Whether a cell address, a (row, col) pair or a whole range is inside."""
+        if isinstance(item, CellRange):
+            return (
+                self.min_row <= item.min_row
+                and item.max_row <= self.max_row
+                and self.min_col <= item.min_col
+                and item.max_col <= self.max_col
+            )
+        row, col = split_address(item) if isinstance(item, str) else item
+        return (
+            self.min_row <= row <= self.max_row and self.min_col <= col <= self.max_col
+        )
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        """Iterate the (row, col) of every cell in row-major order."""
+        cols = range(self.min_col, self.max_col + 1)
+        for row in range(self.min_row, self.max_row + 1):
+            for col in cols:
+                yield row, col
+
+    def columns(self) -> List[Tuple[int, str]]:
+        """Return the number and the letters of every column of the range."""
+        return [
+            (col, column_letter(col)) for col in range(self.min_col, self.max_col + 1)
+        ]
+
+    def addresses(self) -> Iterator[List[str]]:
+        """Iterate the cell addresses of the range, row by row."""
+        letters = [letter for _, letter in self.columns()]
+        for row in range(self.min_row, self.max_row + 1):
+            suffix = str(row)
+            yield [letter + suffix for letter in letters]
+
+    def overlaps(self, other: "CellRange") -> bool:
+        return (
+            self.min_row <= other.max_row
+            and other.min_row <= self.max_row
+            and self.min_col <= other.max_col
+            and other.min_col <= self.max_col
+        )
+
+    def intersect(self, other: "CellRange") -> Optional["CellRange"]:
+        """Return the cells shared by both ranges, None when they do not overlap."""
+        if not self.overlaps(other):
+            return None
+        return CellRange(
+            max(self.min_row, other.min_row),
+            max(self.min_col, other.min_col),
+            min(self.max_row, other.max_row),
+            min(self.max_col, other.max_col),
+        )
+
+    def union(self, other: "CellRange") -> "CellRange":
+        """Return the smallest range covering both ranges."""
+        return CellRange(
+            min(self.min_row, other.min_row),
+            min(self.min_col, other.min_col),
+            max(self.max_row, other.max_row),
+            max(self.max_col, other.max_col),
+        )
+
+    def clip(self, dimension: Union[str, "CellRange", None]) -> Optional["CellRange"]:
+        """Restrict the range to the dimension of a worksheet.
+
+        Args:
+            dimension (str | CellRange | None): Used range of the worksheet. None
+                leaves the range as is.
+
+        Returns:
+            CellRange | None: The cells of the range inside the dimension, None when
+                the range lies entirely outside of it.
+        """
+        if dimension is None:
+            return self
+        if isinstance(dimension, str):
+            dimension = CellRange.parse(dimension)
+        return self.intersect(dimension)
+
+    __and__ = intersect
+    __or__ = union
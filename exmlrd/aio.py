@@ -0,0 +1,232 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from exmlrd import log
+from exmlrd.archive import ExcelArchive
+from exmlrd.cache import DEFAULT_CACHE_BYTES
+from exmlrd.cell import SheetKey
+from exmlrd.diskcache import DEFAULT_DISK_CACHE_BYTES
+from exmlrd.stats import Hook
+
+logger = log.get_logger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+
+# Marks the end of the rows put in the queue by the producer task
+_END = object()
+
+
+class AsyncExcelArchive:
+    """
+    Awaitable front end of ExcelArchive for asyncio applications
+
+    Zip inflation and XML parsing run in a bounded executor so that a large workbook
+    never blocks the event loop. Concurrent reads of a worksheet that is not cached
+    yet share a single parse. The parsing machinery (SheetXml, SharedStyle, Styels)
+    and its cache are the ones of the wrapped ExcelArchive, which is not thread-safe:
+    the workers call into it one at a time, and iter_rows holds it one chunk of
+    rows at a time. The keyword arguments are those of ExcelArchive.
+
+    Attributes:
+        archive (ExcelArchive): Wrapped synchronous archive
+        executor (Executor): Executor running the blocking work
+        queue_size (int): Number of row chunks buffered ahead of the consumer of iter_rows
+
+    Example:
+        >>> async with AsyncExcelArchive("sample.xlsx", max_workers=2) as archive:
+        ...     cell = await archive.get_cell(2, 3)
+        ...     async for row in archive.iter_rows(values_only=True):
+        ...         print(row)
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        *,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        styled: bool = False,
+        preload: Iterable[str] = (),
+        cache_dir: Optional[str] = None,
+        cache_dir_bytes: int = DEFAULT_DISK_CACHE_BYTES,
+        parser: Optional[str] = "auto",
+        instrument: bool = False,
+        hooks: Iterable[Hook] = (),
+        checkpoint_rows: Optional[int] = None,
+        memory_budget: Optional[int] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        executor: Optional[Executor] = None,
+        queue_size: int = 4,
+    ):
+        self.archive = ExcelArchive(
+            filepath,
+            cache_bytes=cache_bytes,
+            styled=styled,
+            preload=preload,
+            cache_dir=cache_dir,
+            cache_dir_bytes=cache_dir_bytes,
+            parser=parser,
+            instrument=instrument,
+            hooks=hooks,
+            checkpoint_rows=checkpoint_rows,
+            memory_budget=memory_budget,
+        )
+        # Serializes the calls into the archive, its caches are shared by the workers
+        self.__lock = threading.Lock()
+        self.__owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="exmlrd"
+        )
+        self.queue_size = queue_size
+        self.__loading: Dict[int, "asyncio.Future[Any]"] = {}
+
+    async def __aenter__(self) -> "AsyncExcelArchive":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Wait for the running work, release the executor and close the archive."""
+        loop = asyncio.get_running_loop()
+        if self.__owns_executor:
+            await loop.run_in_executor(None, partial(self.executor.shutdown, wait=True))
+        self.archive.archive.close()
+
+    def __run(self, func: Callable[..., Any], *args: Any, **kwargs: Any):
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(
+            self.executor, partial(self.__locked, func, *args, **kwargs)
+        )
+
+    def __locked(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        with self.__lock:
+            return func(*args, **kwargs)
+
+    async def __load(self, worksheet: SheetKey) -> None:
+        if isinstance(worksheet, str):
+            index = await self.__run(self.archive.sheetxml.sheet_index, worksheet)
+        else:
+            index = worksheet
+        if index in self.archive.sheetxml.cache:
+            return
+        future = self.__loading.get(index)
+        if future is None:
+            future = self.__run(self.archive.sheetxml.get_sheet, index)
+            self.__loading[index] = future
+            future.add_done_callback(lambda _: self.__loading.pop(index, None))
+        # A cancelled caller must not cancel the parse the other callers wait for
+        await asyncio.shield(future)
+
+    async def preload(self, components: Iterable[str]) -> None:
+        await self.__run(self.archive.sheetxml.preload, list(components))
+
+    async def worksheet(self, index: SheetKey) -> str:
+        return await self.__run(self.archive.worksheet, index)
+
+    async def get_cell(
+        self, row: int, col: int, *, worksheet: SheetKey = 1, raw: bool = False
+    ):
+        await self.__load(worksheet)
+        return await self.__run(
+            self.archive.get_cell, row, col, worksheet=worksheet, raw=raw
+        )
+
+    async def get_range(
+        self, ref: str, *, worksheet: SheetKey = 1, raw: bool = False
+    ) -> List[List[Any]]:
+        await self.__load(worksheet)
+        return await self.__run(
+            self.archive.get_range, ref, worksheet=worksheet, raw=raw
+        )
+
+    async def get_cells(
+        self, addresses: List[str], *, worksheet: SheetKey = 1, raw: bool = False
+    ) -> Dict[str, Any]:
+        await self.__load(worksheet)
+        return await self.__run(
+            self.archive.get_cells, addresses, worksheet=worksheet, raw=raw
+        )
+
+    async def get_mergecell(self, start_cell: str, worksheet: SheetKey) -> str:
+        await self.__load(worksheet)
+        return await self.__run(self.archive.get_mergecell, start_cell, worksheet)
+
+    async def find_mergecells(self, ref: str, worksheet: SheetKey) -> List[str]:
+        await self.__load(worksheet)
+        return await self.__run(self.archive.find_mergecells, ref, worksheet)
+
+    async def iter_rows(
+        self,
+        worksheet: SheetKey = 1,
+        *,
+        min_row: int = 1,
+        max_row: Optional[int] = None,
+        values_only: bool = False,
+        raw: bool = False,
+        chunk_size: int = 256,
+    ) -> AsyncIterator[List[Any]]:
+        """Stream the rows of a worksheet, parsed in the executor.
+
+        Every chunk of ``chunk_size`` rows is parsed by its own executor task, and
+        no chunk is read while ``queue_size`` chunks are waiting. A slow consumer
+        thus bounds the memory without holding a worker, and may await other reads
+        of the archive inside its loop. Leaving the loop early or cancelling the
+        consumer stops the producer.
+
+        Args:
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+            min_row (int): First row to yield.
+            max_row (int, optional): Last row to yield. Defaults to the end of the sheet.
+            values_only (bool): Yield cell values instead of Cell objects.
+            raw (bool): Yield RawCell records instead of Cell objects.
+            chunk_size (int): Number of rows handed over to the event loop at once.
+
+        Yields:
+            list[Cell] | list[RawCell] | list[str]: Cells of one row.
+        """
+        queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=self.queue_size)
+        # Nothing is read before the first chunk is taken
+        rows = self.archive.iter_rows(
+            worksheet,
+            min_row=min_row,
+            max_row=max_row,
+            values_only=values_only,
+            raw=raw,
+        )
+
+        def take() -> List[Any]:
+            return list(islice(rows, chunk_size))
+
+        async def produce() -> None:
+            try:
+                while True:
+                    chunk = await self.__run(take)
+                    if not chunk:
+                        break
+                    await queue.put(chunk)
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                # Raised by the consumer, whatever stopped the parse
+                await queue.put(e)
+                return
+            await queue.put(_END)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                for row in item:
+                    yield row
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            await self.__run(rows.close)
@@ -1,12 +1,43 @@
 import json
-from dataclasses import asdict
-from typing import Any, Dict, Generator, List, Optional
+import os
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 from zipfile import ZipFile
 
 from pydantic import validate_arguments
 
-from exmlrd.cell import Cell, SheetXml
+from exmlrd.addressing import CellRange, split_addresses
+from exmlrd.arrow import DEFAULT_BATCH_ROWS, iter_record_batches, sheet_to_arrow
+from exmlrd.cache import DEFAULT_CACHE_BYTES
+from exmlrd.cell import Cell, RawCell, SheetKey, SheetXml
+from exmlrd.compact import CompactSheet
+from exmlrd.diskcache import DEFAULT_DISK_CACHE_BYTES, DiskCache
 from exmlrd.excel import ExcelObj
+from exmlrd.export import (
+    CellSerializer,
+    dump_json,
+    iter_sheet_cells,
+    range_size,
+    sheet_to_numpy,
+)
+from exmlrd.manifest import MemberInfo
+from exmlrd.parallel import read_sheets
+from exmlrd.planner import LOOKUPS, Plan
+from exmlrd.probe import SheetProbe
+from exmlrd.stats import Hook, Progress, Stats, phase_span
+
+# Cells serialized between two progress reports of to_json
+PROGRESS_CELLS = 1000
 
 
 class ExcelArchive:
@@ -19,25 +50,87 @@ class ExcelArchive:
         excel (ExcelObj): Excel file to be read
         archive (ZipFile): Excel archive information
         sheetxml (SheetXml): Object with information parsed from sheetX.xml
+        cache_bytes (int): Memory budget for the parsed worksheets kept in memory
+        styled (bool): Resolve the font, fill, border and number format of the cells
+        preload (Iterable[str]): Components parsed when opening instead of on first use,
+            any of "workbook", "sst" and "styles"
+        cache_dir (str | None): Directory keeping the parsed workbook across runs
+        cache_dir_bytes (int): Size cap of cache_dir, least recently used entries are evicted
+        parser (str | None): XML backend, "expat", "lxml", "etree" or "auto"
+        instrument (bool): Record the time and bytes spent in every phase, see stats()
+        hooks (Iterable[Callable]): Called with (phase, seconds, nbytes) for every
+            recorded span, turns instrumentation on
+        checkpoint_rows (int | None): Rows between two decompression checkpoints, for
+            random access into worksheets too large to parse whole
+        memory_budget (int | None): Bytes a read may hold. When set, every point and
+            range read chooses between indexing the worksheet and streaming it from
+            the size of the member, the requested cells and the free memory, see
+            explain(). The sheet cache is capped to it
     """
 
-    def __init__(self, filepath: str):
+    def __init__(
+        self,
+        filepath: str,
+        *,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        styled: bool = False,
+        preload: Iterable[str] = (),
+        cache_dir: Optional[str] = None,
+        cache_dir_bytes: int = DEFAULT_DISK_CACHE_BYTES,
+        parser: Optional[str] = "auto",
+        instrument: bool = False,
+        hooks: Iterable[Hook] = (),
+        checkpoint_rows: Optional[int] = None,
+        memory_budget: Optional[int] = None,
+    ):
         self.excel = ExcelObj(path=filepath)
+        hooks = list(hooks)
+        stats = Stats(hooks) if instrument or hooks else None
         self.archive = self.__arch(self.excel.path)
-        self.sheetxml = SheetXml(self.archive)
+        disk_cache = None
+        if cache_dir is not None:
+            disk_cache = DiskCache(cache_dir, cache_dir_bytes)
+        self.sheetxml = SheetXml(
+            self.archive,
+            cache_bytes=cache_bytes,
+            styled=styled,
+            disk_cache=disk_cache,
+            parser=parser,
+            stats=stats,
+            checkpoint_rows=checkpoint_rows,
+            memory_budget=memory_budget,
+        )
+        self.sheetxml.preload(preload)
         self.sheetnum = 1
 
     def __arch(self, path: str):
         return ZipFile(path)
 
+    def stats(self) -> Dict[str, Any]:
+        """Return the time and bytes spent in every phase, and the cache hits and misses.
+
+        Returns:
+            dict: {"phases": {phase: {"seconds", "bytes", "calls"}}, "counters": {...}},
+                empty when the archive was opened without instrument=True or hooks.
+        """
+        if self.sheetxml.stats is None:
+            return {}
+        return self.sheetxml.stats.as_dict()
+
+    def reset_stats(self) -> None:
+        if self.sheetxml.stats is not None:
+            self.sheetxml.stats.reset()
+
     def get_archive_filename_all(self) -> Generator[str, None, None]:
         for info in self.archive.infolist():
             yield info.filename
 
     def get_archive_filename(self, filename: str):
-        return [
-            af.filename for af in self.archive.infolist() if af.filename == filename
-        ]
+        return [filename] if filename in self.sheetxml.ws.manifest else []
+
+    def get_archive_member(self, filename: str) -> Optional[MemberInfo]:
+        """Return the compressed and uncompressed size and content type of a zip member."""
+        return self.sheetxml.ws.manifest.member(filename)
 
     @validate_arguments
     def worksheet(self, index: int) -> str:
@@ -46,18 +139,258 @@ class ExcelArchive:
             self.sheetnum = index
         return ws
 
-    def get_cell(self, row: int, col: int, *, worksheet: int = 1) -> Cell:
-        __cell = self.sheetxml.get_cell(row, col, worksheet=worksheet)
+    def get_cell(
+        self,
+        row: int,
+        col: int,
+        *,
+        worksheet: SheetKey = 1,
+        raw: bool = False,
+        cache: bool = True,
+    ) -> Union[Cell, RawCell]:
+        __cell = self.sheetxml.get_cell(
+            row, col, worksheet=worksheet, raw=raw, cache=cache
+        )
         return __cell
 
-    def get_mergecell(self, start_cell: str, worksheet: int) -> str:
+    def get_range(
+        self,
+        ref: str,
+        *,
+        worksheet: SheetKey = 1,
+        raw: bool = False,
+        cache: bool = True,
+    ) -> List[List[Any]]:
+        return self.sheetxml.get_range(ref, worksheet=worksheet, raw=raw, cache=cache)
+
+    def get_cells(
+        self,
+        addresses: List[str],
+        *,
+        worksheet: SheetKey = 1,
+        raw: bool = False,
+        cache: bool = True,
+    ) -> Dict[str, Any]:
+        return self.sheetxml.get_cells(
+            addresses, worksheet=worksheet, raw=raw, cache=cache
+        )
+
+    def to_numpy(
+        self,
+        worksheet: SheetKey = 1,
+        range: Optional[str] = None,
+        header: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        return sheet_to_numpy(self.sheetxml, worksheet, ref=range, header=header)
+
+    def to_arrow(
+        self,
+        worksheet: SheetKey = 1,
+        range: Optional[str] = None,
+        header: Optional[int] = None,
+        *,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        compact_dictionary: bool = False,
+        scan_types: bool = False,
+    ):
+        """Convert a worksheet into a pyarrow Table, one chunk per batch of rows.
+
+        Shared strings become dictionary arrays over the shared strings table, see
+        iter_record_batches.
+        """
+        return sheet_to_arrow(
+            self.sheetxml,
+            worksheet,
+            ref=range,
+            header=header,
+            batch_rows=batch_rows,
+            compact_dictionary=compact_dictionary,
+            scan_types=scan_types,
+        )
+
+    def iter_record_batches(
+        self,
+        worksheet: SheetKey = 1,
+        range: Optional[str] = None,
+        header: Optional[int] = None,
+        *,
+        batch_rows: int = DEFAULT_BATCH_ROWS,
+        compact_dictionary: bool = False,
+        scan_types: bool = False,
+    ) -> Generator[Any, None, None]:
+        """Stream a worksheet as pyarrow RecordBatches of batch_rows rows.
+
+        Args:
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+            range (str, optional): Range in A1 format. Defaults to the used range of the sheet.
+            header (int, optional): Row number holding the column names.
+            batch_rows (int): Rows per record batch.
+            compact_dictionary (bool): Keep only the used entries in the dictionary of
+                each batch instead of the whole shared strings table, e.g. for Parquet.
+            scan_types (bool): Infer the column types from all the rows in a first
+                pass instead of from the first batch.
+
+        Yields:
+            pyarrow.RecordBatch: Consecutive rows with the schema of the first batch.
+        """
+        return iter_record_batches(
+            self.sheetxml,
+            worksheet,
+            ref=range,
+            header=header,
+            batch_rows=batch_rows,
+            compact_dictionary=compact_dictionary,
+            scan_types=scan_types,
+        )
+
+    def iter_rows(
+        self,
+        worksheet: SheetKey = 1,
+        *,
+        min_row: int = 1,
+        max_row: Optional[int] = None,
+        values_only: bool = False,
+        raw: bool = False,
+        progress: Optional[Progress] = None,
+    ) -> Generator[List[Any], None, None]:
+        return self.sheetxml.iter_rows(
+            worksheet,
+            min_row=min_row,
+            max_row=max_row,
+            values_only=values_only,
+            raw=raw,
+            progress=progress,
+        )
+
+    def read_sheets(
+        self,
+        indices: Optional[Iterable[SheetKey]] = None,
+        *,
+        workers: Optional[int] = None,
+    ) -> Dict[int, CompactSheet]:
+        """Parse several worksheets at once, concurrently in a process pool.
+
+        Args:
+            indices (Iterable[int | str], optional): Worksheet numbers or names.
+                Defaults to every sheet.
+            workers (int, optional): Number of processes. Defaults to the number of CPUs.
+                With one worker (or one sheet) the sheets are parsed in this process.
+
+        Returns:
+            dict[int, CompactSheet]: Parsed worksheets keyed by worksheet number.
+        """
+        if indices is None:
+            indices = range(1, len(self.sheetxml.ws.worksheets) + 1)
+        numbers = [self.sheetxml.sheet_index(index) for index in indices]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(numbers))
+        if workers <= 1:
+            return {
+                number: CompactSheet.from_parsed(self.sheetxml.get_sheet(number))
+                for number in numbers
+            }
+        return read_sheets(
+            self.excel.path,
+            numbers,
+            workers=workers,
+            sharedstyle=self.sheetxml.sharedstyle,
+            parser=self.sheetxml.parser.name,
+        )
+
+    def evict(self, worksheet: SheetKey) -> bool:
+        return self.sheetxml.evict(worksheet)
+
+    def clear_cache(self) -> None:
+        self.sheetxml.clear()
+
+    def get_mergecell(self, start_cell: str, worksheet: SheetKey) -> str:
         __merge_cell = self.sheetxml.get_mergecell(start_cell, worksheet)
         return __merge_cell
 
-    def get_all_mergecell(self, worksheet: int) -> dict[str, list[str]]:
+    def find_mergecells(self, ref: str, worksheet: SheetKey) -> List[str]:
+        return self.sheetxml.find_mergecells(ref, worksheet)
+
+    def get_all_mergecell(self, worksheet: SheetKey) -> dict[str, list[str]]:
         __merge_cells = self.sheetxml.get_mergecells(worksheet)
         return __merge_cells.ref
 
+    def probe_sheet(
+        self, worksheet: Optional[SheetKey] = None, *, scan: bool = False
+    ) -> SheetProbe:
+        """Read the dimension and the sheet properties without parsing the rows.
+
+        Only the top of the worksheet member is inflated. When the dimension is
+        missing or does not hold the first rows, the rows are scanned for the range
+        of the stored cells, reported as used_range.
+
+        Args:
+            worksheet (int | str, optional): Worksheet number or name. Defaults to the
+                current worksheet.
+            scan (bool): Scan the rows even when the dimension looks right.
+
+        Returns:
+            SheetProbe: dimension, used_range, sheet_pr, sheet_views, cols and format_pr.
+        """
+        if worksheet is None:
+            worksheet = self.sheetnum
+        return self.sheetxml.probe(worksheet, scan=scan)
+
+    def explain(
+        self,
+        operation: Optional[str] = None,
+        target: Union[str, Tuple[int, int], List[str], None] = None,
+        *,
+        worksheet: Optional[SheetKey] = None,
+        cache: bool = True,
+    ) -> Optional[Plan]:
+        """Report the strategy of a read and its estimated cost, without reading.
+
+        Args:
+            operation (str, optional): Method of the read, such as "get_cell",
+                "get_cells", "get_range", "iter_rows", "to_json", "to_numpy" or
+                "probe_sheet". Defaults to the last point or range read, as it ran.
+            target (str | tuple[int, int] | list[str], optional): Cells of a point or
+                range read: an address or a range in A1 format, a (row, col) tuple or
+                a list of addresses.
+            worksheet (int | str, optional): Worksheet number or name. Defaults to the
+                current worksheet.
+            cache (bool): The cache argument of the read.
+
+        Returns:
+            Plan | None: Strategy, reason and estimated cost of every alternative, see
+                Plan.format(). None when no read was planned yet.
+
+        Example:
+            >>> print(excel.explain("get_range", "A1:F10").format())
+        """
+        if operation is None:
+            return self.sheetxml.last_plan
+        if worksheet is None:
+            worksheet = self.sheetnum
+        targets = None
+        if operation in LOOKUPS:
+            if target is None:
+                raise ValueError(f"explain({operation!r}) needs the target cells")
+            targets = self.__targets(target)
+        return self.sheetxml.plan(operation, targets, worksheet=worksheet, cache=cache)
+
+    @staticmethod
+    def __targets(
+        target: Union[str, Tuple[int, int], List[str]]
+    ) -> Dict[int, Set[int]]:
+        if isinstance(target, tuple):
+            row, col = target
+            return {row: {col}}
+        if isinstance(target, str):
+            cellrange = CellRange.parse(target)
+            cols = set(range(cellrange.min_col, cellrange.max_col + 1))
+            return dict.fromkeys(range(cellrange.min_row, cellrange.max_row + 1), cols)
+        targets: Dict[int, Set[int]] = {}
+        for row, col in zip(*split_addresses(target)):
+            targets.setdefault(row, set()).add(col)
+        return targets
+
     def get_sheetrange_address(self) -> Optional[str]:
         return self.sheetxml.get_dimension_address(worksheet=self.sheetnum)
 
@@ -71,23 +404,73 @@ class ExcelArchive:
         *,
         row: Optional[int] = None,
         col: Optional[int] = None,
-        save_path: Optional[str] = None
+        save_path: Optional[str] = None,
+        progress: Optional[Progress] = None,
     ):
         ws_name = self.worksheet(self.sheetnum)
+        serializer = CellSerializer()
         contents: dict[str, list[Any]] = {ws_name: []}
-        if (row is None) or (col is None):
-            start_coordinate, end_coordinate = self.get_sheetrange_coordinate()
-            for r in range(start_coordinate[0], end_coordinate[0]):
-                for c in range(start_coordinate[1], end_coordinate[1]):
-                    cell = self.get_cell(r + 1, c + 1, worksheet=self.sheetnum)
-                    contents[ws_name].append(asdict(cell))
-        else:
-            end_coordinate = (row, col)
-            cell = self.get_cell(row, col, worksheet=self.sheetnum)
-            contents[ws_name].append(asdict(cell))
+        with phase_span(self.sheetxml.stats, "serialize") as span:
+            if (row is None) or (col is None):
+                total = None
+                if progress is not None:
+                    total = range_size(self.sheetxml, self.sheetnum)
+                cells = contents[ws_name]
+                for cell in iter_sheet_cells(self.sheetxml, self.sheetnum):
+                    cells.append(serializer.to_dict(cell))
+                    if progress is not None and len(cells) % PROGRESS_CELLS == 0:
+                        progress(len(cells), total)
+                if progress is not None:
+                    progress(len(cells), total)
+            else:
+                cell = self.get_cell(row, col, worksheet=self.sheetnum)
+                contents[ws_name].append(serializer.to_dict(cell))
 
+            result = json.dumps(contents, indent=2, ensure_ascii=False)
+            span.nbytes = len(result)
         if save_path:
             with open(save_path, mode="w", encoding="utf-8") as f:
-                json.dump(contents, f, indent=2, ensure_ascii=False)
+                f.write(result)
+
+        return result
+
+    def dump_json(
+        self,
+        fp: Union[str, IO],
+        *,
+        worksheet: Optional[SheetKey] = None,
+        range: Optional[str] = None,
+        lines: bool = False,
+        compact: bool = False,
+        encoder: Optional[str] = "json",
+        progress: Optional[Progress] = None,
+    ) -> int:
+        """Stream a worksheet as JSON or JSON Lines to a file without building it in memory.
+
+        Args:
+            fp (str | IO): Path or file-like object to write to.
+            worksheet (int | str, optional): Worksheet number or name. Defaults to the current worksheet.
+            range (str, optional): Range in A1 format. Defaults to the used range of the sheet.
+            lines (bool): Write one JSON object per cell and line.
+            compact (bool): Omit formula, rich text and style fields left at their default value.
+            encoder (str, optional): "json", "orjson" or "auto" (orjson when installed).
+                Defaults to the json module, whose output does not depend on what is
+                installed.
+            progress (Callable[[int, int | None], None], optional): Called with the number
+                of cells written and the number of cells of the range.
 
-        return json.dumps(contents, indent=2, ensure_ascii=False)
+        Returns:
+            int: Number of cells written.
+        """
+        if worksheet is None:
+            worksheet = self.sheetnum
+        return dump_json(
+            self.sheetxml,
+            fp,
+            worksheet,
+            ref=range,
+            lines=lines,
+            compact=compact,
+            encoder=encoder,
+            progress=progress,
+        )
@@ -0,0 +1,397 @@
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from exmlrd import log
+from exmlrd.addressing import CellRange, column_letter
+from exmlrd.exceptions import ColumnTypeConflict
+from exmlrd.export import epoch_offset, style_kind
+
+if TYPE_CHECKING:
+    from exmlrd.cell import SheetKey, SheetXml
+    from exmlrd.sharedstyle import SharedStyle
+
+logger = log.get_logger(__name__)
+
+DEFAULT_BATCH_ROWS = 64 * 1024
+
+
+def import_pyarrow():
+    try:
+        import pyarrow  # type: ignore[import]
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for to_arrow(). Install it with `pip install exmlrd[arrow]`"
+        ) from e
+    return pyarrow
+
+
+def sst_dictionary(pa, sharedstyle: "SharedStyle"):
+    """Wrap the shared strings table into a large_string array without copying it."""
+    return pa.LargeStringArray.from_buffers(
+        len(sharedstyle),
+        pa.py_buffer(sharedstyle.offsets),
+        pa.py_buffer(sharedstyle.buffer),
+    )
+
+
+def column_kind(kinds: Set[str]) -> str:
+    # Same rules as the numpy export: numbers with a date format are datetimes
+    # only when the whole column is
+    if not kinds:
+        return "text"
+    if kinds == {"datetime"}:
+        return "datetime"
+    if kinds <= {"number", "datetime"}:
+        return "number"
+    if kinds == {"bool"}:
+        return "bool"
+    return "text"
+
+
+def fits(kinds: Set[str], kind: str) -> bool:
+    """Whether values of the given kinds can be stored in a column of a kind."""
+    if kind == "text":
+        return True
+    if kind == "bool":
+        return kinds <= {"bool"}
+    return kinds <= {"number", "datetime", "bool"}
+
+
+class BatchBuilder:
+    """
+    Accumulate the cells of a batch of rows and convert them into Arrow arrays
+
+    Values are kept as the strings of the parser, or as ints for shared strings,
+    until the whole batch is converted by pyarrow compute functions.
+    """
+
+    def __init__(
+        self,
+        pa,
+        sheetxml: "SheetXml",
+        min_col: int,
+        ncols: int,
+        compact_dictionary: bool = False,
+    ):
+        self.pa = pa
+        self.sheetxml = sheetxml
+        self.min_col = min_col
+        self.ncols = ncols
+        self.compact_dictionary = compact_dictionary
+        self.style_kinds: Dict[Optional[str], str] = {}
+        self.__dictionary: Any = None
+        self.reset(0, 0)
+
+    def reset(self, first_row: int, nrows: int) -> None:
+        self.first_row = first_row
+        self.nrows = nrows
+        self.values: List[List[Union[str, int, None]]] = [
+            [None] * nrows for _ in range(self.ncols)
+        ]
+        self.kinds: List[Set[str]] = [set() for _ in range(self.ncols)]
+
+    def truncate(self, nrows: int) -> None:
+        self.nrows = max(nrows, 0)
+        for values in self.values:
+            del values[self.nrows :]
+
+    @property
+    def dictionary(self):
+        if self.__dictionary is None:
+            self.__dictionary = sst_dictionary(self.pa, self.sheetxml.sharedstyle)
+        return self.__dictionary
+
+    def classify(
+        self, t: str, s: Optional[str], v: Optional[str], inline: Optional[str]
+    ) -> Tuple[Union[str, int, None], str]:
+        """Return the value kept for a cell and its kind."""
+        if t == "n":
+            kind = self.style_kinds.get(s)
+            if kind is None:
+                kind = style_kind(self.sheetxml, int(s)) if s else "number"
+                self.style_kinds[s] = kind
+            return v, kind
+        if t == "s":
+            return (int(v) if v else None), "text"
+        if t == "b":
+            return v, "bool"
+        return (inline if t == "inlineStr" else v), "text"
+
+    def add(self, row: int, cells: List[Any]) -> None:
+        i = row - self.first_row
+        for col, (_, t, s, v, _, inline) in cells:
+            j = col - self.min_col
+            if j < 0 or j >= self.ncols:
+                continue
+            value, kind = self.classify(t, s, v, inline)
+            if value is None or value == "":
+                continue
+            self.values[j][i] = value
+            self.kinds[j].add(kind)
+
+    def scan_kinds(self, rows: Iterable[Tuple[int, List[Any]]]) -> List[Set[str]]:
+        """Kinds of the values of every column over rows of cells, without keeping
+        the values."""
+        kinds: List[Set[str]] = [set() for _ in range(self.ncols)]
+        for _, cells in rows:
+            for col, (_, t, s, v, _, inline) in cells:
+                j = col - self.min_col
+                if j < 0 or j >= self.ncols:
+                    continue
+                value, kind = self.classify(t, s, v, inline)
+                if value is not None and value != "":
+                    kinds[j].add(kind)
+        return kinds
+
+    def column(self, j: int, kind: str):
+        pa = self.pa
+        values = self.values[j]
+        if kind == "text":
+            return self.text_column(values)
+        strings = pa.array(values, type=pa.string())
+        if kind == "bool":
+            return pa.compute.equal(strings, "1")
+        serial = strings.cast(pa.float64())
+        if kind == "number":
+            return serial
+        ms = pa.compute.round(
+            pa.compute.subtract(
+                pa.compute.multiply(serial, 86400 * 1000),
+                epoch_offset(self.sheetxml) * 1000,
+            )
+        )
+        return ms.cast(pa.int64()).cast(pa.timestamp("ms"))
+
+    def text_column(self, values: List[Union[str, int, None]]):
+        # Shared strings index the sst directly, other texts are appended to it
+        pa = self.pa
+        size = len(self.dictionary)
+        extras: Dict[str, int] = {}
+        indices: List[Optional[int]] = []
+        for value in values:
+            if value is None or isinstance(value, int):
+                indices.append(value)
+            else:
+                index = extras.get(value)
+                if index is None:
+                    index = extras[value] = size + len(extras)
+                indices.append(index)
+        dictionary = self.dictionary
+        if extras:
+            dictionary = pa.concat_arrays(
+                [dictionary, pa.array(list(extras), type=pa.large_string())]
+            )
+        index_array = pa.array(indices, type=pa.int32())
+        if self.compact_dictionary:
+            used = pa.compute.unique(index_array).drop_null()
+            dictionary = dictionary.take(used)
+            index_array = pa.compute.index_in(index_array, value_set=used)
+        return pa.DictionaryArray.from_arrays(index_array, dictionary)
+
+
+def iter_record_batches(
+    sheetxml: "SheetXml",
+    worksheet: "SheetKey" = 1,
+    *,
+    ref: Optional[str] = None,
+    header: Optional[int] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    compact_dictionary: bool = False,
+    scan_types: bool = False,
+) -> Generator[Any, None, None]:
+    """Stream a worksheet as Arrow record batches of `batch_rows` rows.
+
+    The sheet is read with the streaming parser, so only one batch is held in memory.
+    The type of a column is inferred from its cells in the first batch, like the
+    numpy export, or from all its cells with scan_types, and kept for the following
+    batches:
+
+    - text columns are dictionary<int32, large_string> arrays whose dictionary is the
+      shared strings table itself, so shared strings never become Python strings.
+      Other texts of a batch are appended to its dictionary.
+    - numeric cells become float64, or timestamp[ms] when they all have a date format
+    - boolean cells become bool
+
+    Empty cells and rows missing from sheetData are nulls.
+
+    Args:
+        sheetxml (SheetXml): Parsed workbook.
+        worksheet (int | str): Worksheet number starting from 1, or sheet name.
+        ref (str, optional): Range in A1 format. Defaults to the used range of the
+            sheet, see SheetXml.probe.
+        header (int, optional): Row number holding the column names.
+            Data starts on the next row. Without header, the columns are named by letter.
+        batch_rows (int): Rows per record batch.
+        compact_dictionary (bool): Keep only the entries a batch uses in the dictionary
+            of its text columns, for writers such as Parquet that store the dictionary
+            with every row group.
+        scan_types (bool): Read the rows once before the first batch to infer the
+            type of every column from all its cells, so that no later value
+            conflicts with it. The rows are read twice.
+
+    Yields:
+        pyarrow.RecordBatch: Consecutive rows of the range.
+
+    Raises:
+        ColumnTypeConflict: A later batch holds a value that does not fit the type of
+            its column, e.g. a text in a numeric column. Read with a larger
+            batch_rows or with scan_types.
+    """
+    pa = import_pyarrow()
+    import pyarrow.compute  # type: ignore[import] # noqa: F401
+
+    if batch_rows < 1:
+        raise ValueError(f"batch_rows must be positive: {batch_rows}")
+    if ref is None:
+        # The dimension, or the range of the stored cells when it is missing or wrong
+        ref = sheetxml.get_used_address(worksheet=worksheet)
+    cellrange = CellRange.parse(ref) if ref is not None else None
+    min_row = cellrange.min_row if cellrange is not None else 1
+    max_row = cellrange.max_row if cellrange is not None else None
+    start = min(header, min_row) if header is not None else min_row
+
+    names: List[str] = []
+    builder: Optional[BatchBuilder] = None
+    # Kind of every column, inferred from the first batch or from the scan
+    fixed: List[str] = []
+    schema = None
+    header_cells: List[Any] = []
+    data_row = min_row if header is None else max(min_row, header + 1)
+    last_row = data_row - 1
+
+    def emit():
+        nonlocal schema, fixed
+        assert builder is not None
+        if not fixed:
+            fixed = [column_kind(kinds) for kinds in builder.kinds]
+        for name, kinds, kind in zip(names, builder.kinds, fixed):
+            if not fits(kinds, kind):
+                raise ColumnTypeConflict(
+                    f"Column {name} holds {', '.join(sorted(kinds))} values in rows "
+                    f"{builder.first_row}-{builder.first_row + builder.nrows - 1}, "
+                    f"but its type was inferred as {kind} from the first batch. "
+                    f"Read with a larger batch_rows or with scan_types"
+                )
+        arrays = [builder.column(j, kind) for j, kind in enumerate(fixed)]
+        if schema is None:
+            schema = pa.schema(
+                [pa.field(name, array.type) for name, array in zip(names, arrays)]
+            )
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def setup() -> BatchBuilder:
+        nonlocal names
+        min_col, max_col = 1, 1
+        if cellrange is not None:
+            min_col, max_col = cellrange.min_col, cellrange.max_col
+        names = column_names(sheetxml, header_cells, min_col, max_col)
+        return BatchBuilder(
+            pa, sheetxml, min_col, max_col - min_col + 1, compact_dictionary
+        )
+
+    def rows_of(first_row: int) -> int:
+        if max_row is None:
+            return batch_rows
+        return max(min(batch_rows, max_row - first_row + 1), 0)
+
+    if scan_types and cellrange is not None:
+        scanner = BatchBuilder(
+            pa, sheetxml, cellrange.min_col, cellrange.max_col - cellrange.min_col + 1
+        )
+        rows = sheetxml.iter_cell_tuples(worksheet, min_row=data_row, max_row=max_row)
+        fixed = [column_kind(kinds) for kinds in scanner.scan_kinds(rows)]
+
+    for row, cells in sheetxml.iter_cell_tuples(
+        worksheet, min_row=start, max_row=max_row
+    ):
+        if row == header:
+            header_cells = cells
+            continue
+        if row < data_row:
+            continue
+        if builder is None:
+            builder = setup()
+            builder.reset(data_row, rows_of(data_row))
+        if max_row is not None and row > max_row:
+            break
+        while row >= builder.first_row + builder.nrows:
+            yield emit()
+            first_row = builder.first_row + builder.nrows
+            builder.reset(first_row, rows_of(first_row))
+        builder.add(row, cells)
+        last_row = row
+
+    if builder is None:
+        builder = setup()
+        builder.reset(data_row, rows_of(data_row))
+    if max_row is None:
+        # A sheet without cells has no used range
+        builder.truncate(last_row - builder.first_row + 1)
+    yield emit()
+    # The rows of the range after the last stored row are empty
+    while max_row is not None:
+        first_row = builder.first_row + builder.nrows
+        if first_row > max_row:
+            break
+        builder.reset(first_row, rows_of(first_row))
+        yield emit()
+
+
+def column_names(
+    sheetxml: "SheetXml", header_cells: List[Any], min_col: int, max_col: int
+) -> List[str]:
+    texts: Dict[int, str] = {}
+    for col, (_, t, _, v, _, inline) in header_cells:
+        if t == "s":
+            texts[col] = sheetxml.sharedstyle.get_text(int(v)) if v else ""
+        else:
+            texts[col] = (inline if t == "inlineStr" else v) or ""
+    names: List[str] = []
+    seen = set()
+    for col in range(min_col, max_col + 1):
+        name = texts.get(col, "")
+        if name == "" or name in seen:
+            name = column_letter(col)
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def sheet_to_arrow(
+    sheetxml: "SheetXml",
+    worksheet: "SheetKey" = 1,
+    *,
+    ref: Optional[str] = None,
+    header: Optional[int] = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    compact_dictionary: bool = False,
+    scan_types: bool = False,
+):
+    """Convert a worksheet into an Arrow table, see iter_record_batches.
+
+    Returns:
+        pyarrow.Table: One chunk per batch of rows.
+    """
+    pa = import_pyarrow()
+    batches = list(
+        iter_record_batches(
+            sheetxml,
+            worksheet,
+            ref=ref,
+            header=header,
+            batch_rows=batch_rows,
+            compact_dictionary=compact_dictionary,
+            scan_types=scan_types,
+        )
+    )
+    return pa.Table.from_batches(batches)
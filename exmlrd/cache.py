@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterator, Optional, Tuple
+
+from exmlrd import log
+
+logger = log.get_logger(__name__)
+
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+
+class SheetCache:
+    """
+    LRU cache of parsed worksheets bounded by an approximate memory budget
+
+    Every entry carries an estimated size in bytes. When the sum of the entries
+    exceeds ``max_bytes``, the least recently used worksheets are evicted first.
+    An entry that alone exceeds the budget is kept apart from the others, so that
+    the next reads of that worksheet do not parse it again. Only the most recent
+    one is kept, and none when ``max_bytes`` is 0.
+
+    Attributes:
+        max_bytes (int): Memory budget of the cache in bytes
+        nbytes (int): Estimated size of the entries held within the budget
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.__entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.__sizes: Dict[Hashable, int] = {}
+        self.__oversized: Optional[Tuple[Hashable, Any]] = None
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__entries or self.__oversized_key() == key
+
+    def __len__(self) -> int:
+        return len(self.__entries) + (self.__oversized is not None)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        keys = list(self.__entries)
+        if self.__oversized is not None:
+            keys.append(self.__oversized[0])
+        return iter(keys)
+
+    def __oversized_key(self) -> Optional[Hashable]:
+        return None if self.__oversized is None else self.__oversized[0]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        try:
+            value = self.__entries[key]
+        except KeyError:
+            if self.__oversized is None or self.__oversized[0] != key:
+                return None
+            return self.__oversized[1]
+        self.__entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any, nbytes: int) -> None:
+        self.evict(key)
+        if nbytes > self.max_bytes:
+            logger.debug(
+                f"[{key}] {nbytes} bytes exceeds the cache budget of {self.max_bytes} bytes"
+            )
+            if self.max_bytes > 0:
+                self.__oversized = (key, value)
+            return
+        self.__entries[key] = value
+        self.__sizes[key] = nbytes
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            oldest = next(iter(self.__entries))
+            self.evict(oldest)
+
+    def evict(self, key: Hashable) -> bool:
+        if self.__oversized_key() == key:
+            self.__oversized = None
+            return True
+        if key not in self.__entries:
+            return False
+        del self.__entries[key]
+        self.nbytes -= self.__sizes.pop(key)
+        return True
+
+    def clear(self) -> None:
+        self.__entries.clear()
+        self.__sizes.clear()
+        self.__oversized = None
+        self.nbytes = 0
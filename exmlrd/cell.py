@@ -1,29 +1,67 @@
 """
 Copyright (c) 2023 HAYATO SONOKAWA
 """
-import re
-import xml.etree.ElementTree as ET
-
-try:
-    from functools import cache
-except ImportError:
-    from functools import lru_cache as cache
-
-from typing import Dict, List, Optional
-from xml.etree.ElementTree import Element
+from contextlib import contextmanager
+from functools import cached_property
+from time import perf_counter
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Collection,
+    Container,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 from zipfile import ZipFile
 
 from pydantic import Field, dataclasses, validate_arguments, validator
 
 from exmlrd import log
+from exmlrd.addressing import (
+    COLUMN_NUMBERS,
+    DIGITS,
+    CellRange,
+    cell_address,
+    split_address,
+    split_addresses,
+)
+from exmlrd.cache import DEFAULT_CACHE_BYTES, SheetCache
 from exmlrd.exceptions import CellOutsideRange, NotFoundSheet
+from exmlrd.manifest import Manifest
+from exmlrd.mergecell import MergeIndex, MergeRange
+from exmlrd.parsers import CellTuple, SheetInfo, get_parser
+from exmlrd.planner import LOOKUPS, Plan, Planner, SheetSize
+from exmlrd.probe import (
+    SheetProbe,
+    covering_range,
+    is_trusted,
+    probe_sheet,
+    read_head,
+)
+from exmlrd.seekindex import SeekIndex
 from exmlrd.sharedstyle import SharedStyle, SiTag
+from exmlrd.stats import InflateReader, Progress, Stats, open_member, phase_span
 from exmlrd.styles import Format, Styels
-from exmlrd.tags import SheetXmlTag, WorkbookTag
-from exmlrd.tools import del_namespace
+
+if TYPE_CHECKING:
+    from exmlrd.diskcache import DiskCache
 
 logger = log.get_logger(__name__)
 
+# Worksheet number starting from 1, or sheet name
+SheetKey = Union[int, str]
+
+DEFAULT_FORMAT = Format()
+
 
 @dataclasses.dataclass
 class Cell:
@@ -59,12 +97,74 @@ class MergeCell:
     ref: dict[str, list[str]] = Field(default_factory=dict)
 
 
+class RawCell(NamedTuple):
+    """
+    Lightweight cell record returned by the raw=True reads
+
+    Unlike Cell, it is not validated and does not carry SiTag/Format objects.
+
+    Attributes:
+        row (int): Row number starting from 1
+        col (int): Column number starting from 1
+        address (str): Cell address in A1 format
+        value (str): Cell value, shared strings are resolved to their text
+        formula (str): Formula of the cell
+        type (str): t attribute of the cell ("n", "s", "str", "b", "e", "inlineStr")
+        style_index (int): s attribute of the cell, the index in cellXfs
+        sst_index (int | None): Index in sharedStrings.xml for t="s" cells
+    """
+
+    row: int
+    col: int
+    address: str
+    value: str = ""
+    formula: str = ""
+    type: str = "n"
+    style_index: int = 0
+    sst_index: Optional[int] = None
+
+
+class ParsedSheet:
+    """
+    Contents of a sheetX.xml parsed once and kept in the SheetCache
+
+    Attributes:
+        dimension (str | None): ref attribute of the dimension tag
+        rows (Mapping[int, dict[int, RawCell]]): Cells indexed by row and col number,
+            decoded on first access for the sheets read back from the disk cache
+        mergecells (list[str]): ref attribute of all mergeCell tags
+        mergeindex (MergeIndex | None): Index of mergecells, built on the first merge lookup
+        ncells (int): Number of indexed cells
+    """
+
+    # Approximate size of a RawCell with its address and value strings
+    cell_nbytes = 256
+
+    def __init__(self) -> None:
+        self.dimension: Optional[str] = None
+        self.rows: Mapping[int, Dict[int, RawCell]] = {}
+        self.mergecells: List[str] = []
+        self.mergeindex: Optional[MergeIndex] = None
+        self.ncells = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.ncells * self.cell_nbytes
+
+    def find(self, row: int, col: int) -> Optional[RawCell]:
+        cols = self.rows.get(row)
+        if cols is None:
+            return None
+        return cols.get(col)
+
+
 class Worksheet:
     """
     Class for retrieving and manipulating worksheet information
 
     Attributes:
         archive (ZipFile): Excel archive information
+        manifest (Manifest): Worksheets and zip members of the workbook
         worksheets (list[str]): Stores all worksheet names.
     """
 
@@ -73,16 +173,8 @@ class Worksheet:
 
     def __init__(self, archive: ZipFile):
         self.archive = archive
-        self.worksheets = self.__get_worksheet_name()
-
-    def __get_elem_index(self, elem: Element, word: str) -> Optional[int]:
-        if not isinstance(elem, Element):
-            return None
-        else:
-            for index, __e in enumerate(elem):
-                if del_namespace(__e.tag) == word:
-                    return index
-        return None
+        self.manifest = Manifest(archive)
+        self.worksheets = [sheet.name for sheet in self.manifest.sheets]
 
     @validate_arguments
     def get_worksheet(self, index: int) -> str:
@@ -92,22 +184,26 @@ class Worksheet:
             )
         return self.worksheets[index - 1]
 
-    def __get_worksheet_name(self) -> list[str]:
-        f = self.workbook_path
-        tree = ET.parse(self.archive.open(f))
-        root_elem = tree.getroot()
-        __eidx = self.__get_elem_index(root_elem, WorkbookTag.SHEETS.value)
-        if not isinstance(__eidx, int):
-            return []
+    def get_index(self, worksheet: SheetKey) -> int:
+        """Return the number of a worksheet given by number or name.
+
+        Args:
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
 
-        sheet_names = []
-        for elem in root_elem[__eidx]:
-            if elem.attrib.get("name"):
-                sheet_names.append(elem.attrib["name"])
-        return sheet_names
+        Returns:
+            int: The worksheet number.
+        """
+        if isinstance(worksheet, str):
+            return self.manifest.sheet(worksheet).number
+        return worksheet
 
     @validate_arguments
     def get_worksheetpath(self, index: int):
+        # Sheets unknown to workbook.xml.rels fall back to the sheetX.xml naming
+        if 0 < index <= len(self.manifest):
+            path = self.manifest.sheet(index).path
+            if path is not None:
+                return path
         return self.worksheet_path + str(index) + ".xml"
 
 
@@ -117,147 +213,934 @@ class SheetXml:
 
     Attributes:
         archive (ZipFile): Excel archive information
-        ws (Worksheet): Objects that manipulate worksheet information
-        sharedstyle(SharedStyle): Objects that manipulate common font information
-        style(Styels): Objects that manipulate font, border, and fill information
+        ws (Worksheet): Objects that manipulate worksheet information (loaded on first use)
+        sharedstyle(SharedStyle): Objects that manipulate common font information (loaded on first use)
+        style(Styels): Objects that manipulate font, border, and fill information (loaded on first use)
+        cache(SheetCache): Parsed worksheets, each sheetX.xml is parsed once while cached
+        styled(bool): Resolve the style of the cells from their s attribute
+        disk_cache(DiskCache | None): Sidecars of the parsed parts kept across runs
+        parser(EtreeParser | LxmlParser | ExpatParser): Backend parsing sheetData and
+            sharedStrings.xml
+        stats(Stats | None): Per-phase instrumentation, None when disabled
+        checkpoint_rows(int | None): Rows between two decompression checkpoints of a
+            worksheet. When set, point and range reads of a worksheet that is not in
+            the cache resume inflation from the nearest checkpoint instead of parsing
+            the whole worksheet, see SeekIndex
+        planner(Planner): Chooses between indexing the worksheet and streaming it for
+            point and range reads, from the memory_budget given
+        last_plan(Plan | None): Plan of the last point or range read
+
+    Point and range reads given cache=False, or made while cache_bytes is 0, do not
+    parse the worksheet into the cache: they stream sheetData and stop at the last
+    target row, and read sharedStrings.xml only up to the largest index they need.
+    With a memory_budget, the planner also makes them stream while indexing the
+    worksheet would not fit the budget or would cost more than the lookups so far.
     """
 
     worksheets_basepath = "xl/worksheets/sheet"
+    components = {"workbook": "ws", "sst": "sharedstyle", "styles": "style"}
 
-    def __init__(self, archive: ZipFile):
+    def __init__(
+        self,
+        archive: ZipFile,
+        *,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        styled: bool = False,
+        disk_cache: Optional["DiskCache"] = None,
+        parser: Optional[str] = "auto",
+        stats: Optional[Stats] = None,
+        checkpoint_rows: Optional[int] = None,
+        memory_budget: Optional[int] = None,
+    ):
+        if checkpoint_rows is not None and checkpoint_rows < 1:
+            raise ValueError(
+                f"checkpoint_rows must be a positive number of rows: {checkpoint_rows}"
+            )
         self.archive = archive
-        self.ws = Worksheet(self.archive)
-        self.sharedstyle = SharedStyle(self.archive)
-        self.style = Styels(self.archive)
+        self.parser = get_parser(parser)
+        self.styled = styled
+        self.planner = Planner(memory_budget)
+        if memory_budget is not None:
+            cache_bytes = min(cache_bytes, memory_budget)
+        self.cache = SheetCache(cache_bytes)
+        self.disk_cache = disk_cache
+        self.stats = stats
+        self.checkpoint_rows = checkpoint_rows
+        self.__paths: Dict[int, str] = {}
+        self.__seek_indexes: Dict[int, SeekIndex] = {}
+        # Leading entries of sharedStrings.xml read by stop-early lookups
+        self.__sst_prefix: Optional[SharedStyle] = None
+        self.__probes: Dict[int, SheetProbe] = {}
+        # Last row of the trusted dimension by worksheet, for the planner
+        self.__last_rows: Dict[int, Optional[int]] = {}
+        # Plan of the last lookup, or what a cache hit needs to build it on demand
+        self.__last_lookup: Union[
+            Plan, Tuple[str, int, Mapping[int, Collection[int]]], None
+        ] = None
 
-    def __get_elem_index(self, elem: Element, word: str) -> Optional[int]:
-        if not isinstance(elem, Element):
-            return None
+    # workbook.xml, sharedStrings.xml and styles.xml are only parsed on first use
+    @cached_property
+    def ws(self) -> Worksheet:
+        return Worksheet(self.archive)
+
+    @cached_property
+    def sharedstyle(self) -> SharedStyle:
+        if self.stats is None:
+            return self.__load_sharedstyle()
+        with self.stats.span("sst") as span:
+            span.nbytes = self.__member_size(SharedStyle.sharedstyle_xml)
+            return self.__load_sharedstyle()
+
+    def __load_sharedstyle(self) -> SharedStyle:
+        if self.disk_cache is None:
+            return SharedStyle(self.archive, parser=self.parser, stats=self.stats)
+        sharedstyle = self.disk_cache.load_sst(self.disk_key)
+        self.__count_disk_cache(sharedstyle is not None)
+        if sharedstyle is None:
+            sharedstyle = SharedStyle(
+                self.archive, parser=self.parser, stats=self.stats
+            )
+            self.disk_cache.save_sst(self.disk_key, sharedstyle)
+        return sharedstyle
+
+    @cached_property
+    def style(self) -> Styels:
+        if self.stats is None:
+            return self.__load_style()
+        with self.stats.span("styles") as span:
+            span.nbytes = self.__member_size(Styels.styles_xml)
+            return self.__load_style()
+
+    def __load_style(self) -> Styels:
+        if self.disk_cache is None:
+            return Styels(self.archive, stats=self.stats)
+        style = self.disk_cache.load_styles(self.disk_key)
+        self.__count_disk_cache(style is not None)
+        if style is None:
+            style = Styels(self.archive, stats=self.stats)
+            self.disk_cache.save_styles(self.disk_key, style)
+        return style
+
+    def __lookup_sharedstyle(self, max_index: int) -> SharedStyle:
+        # Shared strings table holding at least the entries up to max_index. Lookups
+        # read sharedStrings.xml only that far unless the whole table is already
+        # loaded or comes from the disk cache.
+        if "sharedstyle" in vars(self) or self.disk_cache is not None:
+            return self.sharedstyle
+        prefix = self.__sst_prefix
+        if prefix is not None and max_index < len(prefix):
+            return prefix
+        # Grow geometrically so that lookups further and further down stay linear
+        limit = max(max_index + 1, 2 * len(prefix or ()))
+        with phase_span(self.stats, "sst"):
+            prefix = SharedStyle(
+                self.archive, parser=self.parser, stats=self.stats, limit=limit
+            )
+        if prefix.complete:
+            # The whole table was read, it is the shared strings of the workbook
+            vars(self)["sharedstyle"] = prefix
+            self.__sst_prefix = None
         else:
-            for index, __e in enumerate(elem):
-                if del_namespace(__e.tag) == word:
-                    return index
-        return None
-
-    def worksheet(self, index: int) -> str:
-        return self.ws.get_worksheet(index)
-
-    def get_cell(self, row: int, col: int, *, worksheet: int = 1):
-
-        f = self.ws.get_worksheetpath(worksheet)
-        tree = ET.parse(self.archive.open(f))
-        root_elem = tree.getroot()
-        __eidx = self.__get_elem_index(root_elem, SheetXmlTag.SHEETDATA.value)
-        if not isinstance(__eidx, int):
-            return Cell(
-                row=row,
-                col=col,
-                shared=SiTag(),
+            self.__sst_prefix = prefix
+        return prefix
+
+    def __member_size(self, filename: str) -> int:
+        member = self.ws.manifest.member(filename)
+        return 0 if member is None else member.file_size
+
+    def __count_disk_cache(self, hit: bool) -> None:
+        if self.stats is not None:
+            self.stats.count("disk_cache_hits" if hit else "disk_cache_misses")
+
+    @cached_property
+    def disk_key(self) -> str:
+        if self.disk_cache is None:
+            raise ValueError("No disk cache is configured")
+        return self.disk_cache.key(self.archive)
+
+    def preload(self, components: Iterable[str]) -> None:
+        """Load workbook components eagerly instead of on first use.
+
+        Args:
+            components (Iterable[str]): Any of "workbook", "sst" and "styles".
+        """
+        for component in components:
+            if component not in self.components:
+                raise ValueError(
+                    f"Unknown component: {component} (expected one of {', '.join(self.components)})"
+                )
+            getattr(self, self.components[component])
+
+    def worksheet(self, index: SheetKey) -> str:
+        return self.ws.get_worksheet(self.sheet_index(index))
+
+    def sheet_index(self, worksheet: SheetKey) -> int:
+        if isinstance(worksheet, str):
+            return self.ws.get_index(worksheet)
+        return worksheet
+
+    def get_sheet(self, worksheet: SheetKey = 1) -> ParsedSheet:
+        """Return the parsed worksheet, parsing sheetX.xml only on the first access.
+
+        Args:
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+
+        Returns:
+            ParsedSheet: Cell index, dimension and merged cells of the worksheet.
+        """
+        index = self.sheet_index(worksheet)
+        sheet = self.cache.get(index)
+        if self.stats is not None:
+            self.stats.count(
+                "sheet_cache_misses" if sheet is None else "sheet_cache_hits"
             )
-        try:
-            _ex_row = root_elem[__eidx][row - 1]
-        except IndexError as e:
-            # meg = f"[cell({row},{col})] Warning: {e}"
-            # logger.debug(meg)
-            return Cell(
-                row=row,
-                col=col,
-                shared=SiTag(),
+        if sheet is None:
+            sheet = self.__load_sheet(index)
+            self.cache.put(index, sheet, sheet.nbytes)
+        return sheet
+
+    def __load_sheet(self, worksheet: int) -> ParsedSheet:
+        if self.disk_cache is None:
+            return self.__parse_sheet(worksheet)
+        compact = self.disk_cache.load_sheet(self.disk_key, worksheet)
+        self.__count_disk_cache(compact is not None)
+        if compact is not None:
+            return compact.to_parsed()
+        sheet = self.__parse_sheet(worksheet)
+        self.disk_cache.save_sheet(self.disk_key, worksheet, sheet)
+        return sheet
+
+    def evict(self, worksheet: SheetKey) -> bool:
+        return self.cache.evict(self.sheet_index(worksheet))
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self.__seek_indexes.clear()
+        self.__probes.clear()
+        self.__last_rows.clear()
+        self.__last_lookup = None
+        self.planner.clear()
+
+    def probe(self, worksheet: SheetKey = 1, *, scan: bool = False) -> SheetProbe:
+        """Read the metadata of a worksheet without parsing its rows.
+
+        Only the first blocks of the member are inflated, up to <sheetData>. The rows
+        are scanned for the used range only when the dimension is missing, invalid or
+        does not hold the first rows, or when scan is True.
+
+        Args:
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+            scan (bool): Scan the rows for the used range even when the dimension
+                looks right.
+
+        Returns:
+            SheetProbe: Dimension, used range, sheetPr, sheetViews, cols and
+                sheetFormatPr of the worksheet.
+        """
+        index = self.sheet_index(worksheet)
+        probe = self.__probes.get(index)
+        if probe is not None and (probe.scanned or not scan):
+            return probe
+        path = self.__worksheetpath(index)
+        sheet = self.cache.get(index)
+        with phase_span(self.stats, "parse") as span:
+            probe = probe_sheet(
+                lambda: open_member(self.archive, path, self.stats),
+                scan=scan,
+                rows=None if sheet is None else sheet.rows,
             )
+            span.nbytes = probe.nbytes
+        self.__probes[index] = probe
+        return probe
 
-        serach_address = self.convert_to_cell_address(row=row, col=col)
-        for _sidx, _ex_col in enumerate(_ex_row):
-            if _ex_col.attrib["r"] == serach_address:
-                _ex_row = root_elem[__eidx][row - 1][_sidx]
-                break
+    def seek_index(self, worksheet: SheetKey = 1) -> SeekIndex:
+        """Return the decompression checkpoints of a worksheet, built on first use.
+
+        Args:
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+
+        Returns:
+            SeekIndex: A checkpoint every checkpoint_rows rows.
+        """
+        if self.checkpoint_rows is None:
+            raise ValueError("No checkpoint_rows is configured")
+        index = self.sheet_index(worksheet)
+        seek_index = self.__seek_indexes.get(index)
+        if seek_index is None:
+            path = self.__worksheetpath(index)
+            with phase_span(self.stats, "inflate") as span:
+                seek_index = SeekIndex.build(self.archive, path, self.checkpoint_rows)
+                span.nbytes = self.__member_size(path)
+            self.__seek_indexes[index] = seek_index
+        return seek_index
+
+    def plan(
+        self,
+        operation: str,
+        targets: Optional[Mapping[int, Collection[int]]] = None,
+        *,
+        worksheet: SheetKey = 1,
+        cache: bool = True,
+    ) -> Plan:
+        """Return the strategy a read would use and its estimated cost, without reading.
+
+        Args:
+            operation (str): Method of the read, such as "get_cell", "get_range",
+                "iter_rows", "to_json" or "probe_sheet".
+            targets (Mapping[int, Collection[int]], optional): Requested columns by row
+                number, required by get_cell, get_cells and get_range.
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+            cache (bool): The cache argument of the read.
+
+        Returns:
+            Plan: Strategy, reason and estimated cost of the alternatives.
+        """
+        return self.__plan(operation, targets, worksheet, cache, exact=True)
+
+    @property
+    def last_plan(self) -> Optional[Plan]:
+        lookup = self.__last_lookup
+        if lookup is None or isinstance(lookup, Plan):
+            return lookup
+        operation, index, targets = lookup
+        size = self.__sheet_size(index, exact=False)._replace(cached=True)
+        cells = sum(len(cols) for cols in targets.values())
+        return self.planner.plan_lookup(operation, index, size, list(targets), cells)
+
+    def __plan(
+        self,
+        operation: str,
+        targets: Optional[Mapping[int, Collection[int]]],
+        worksheet: SheetKey,
+        cache: bool,
+        exact: bool,
+    ) -> Plan:
+        index = self.sheet_index(worksheet)
+        size = self.__sheet_size(index, exact)
+        if operation not in LOOKUPS:
+            return self.planner.plan_read(operation, index, size)
+        if targets is None:
+            raise ValueError(f"{operation} needs the requested cells to be planned")
+        cells = sum(len(cols) for cols in targets.values())
+        return self.planner.plan_lookup(
+            operation, index, size, list(targets), cells, cache=cache
+        )
+
+    def __sheet_size(self, index: int, exact: bool) -> SheetSize:
+        # Only uncached lookups under a memory budget depend on the number of rows,
+        # which is otherwise read for the plans that are explained
+        path = self.__worksheetpath(index)
+        member = self.ws.manifest.member(path)
+        cached = index in self.cache
+        sst_size = 0
+        if "sharedstyle" not in vars(self):
+            sst_size = self.__member_size(SharedStyle.sharedstyle_xml)
+        rows = None
+        if exact or (not cached and self.planner.memory_budget is not None):
+            rows = self.__last_row(index)
+        return SheetSize(
+            file_size=0 if member is None else member.file_size,
+            compress_size=0 if member is None else member.compress_size,
+            rows=rows,
+            sst_size=sst_size,
+            cached=cached,
+            cache_bytes=self.cache.max_bytes,
+            cell_nbytes=ParsedSheet.cell_nbytes,
+            checkpoint_rows=self.checkpoint_rows,
+            checkpoints_built=index in self.__seek_indexes,
+        )
+
+    def __last_row(self, index: int) -> Optional[int]:
+        # Last row of the used range when it is known without scanning the rows
+        if index not in self.__last_rows:
+            probe = self.__probes.get(index)
+            if probe is not None:
+                dimension = probe.used_range
             else:
-                find_address = self.convert_to_row_col_index(_ex_col.attrib["r"])
-                if col > find_address[1]:
+                path = self.__worksheetpath(index)
+                with phase_span(self.stats, "parse") as span:
+                    with open_member(self.archive, path, self.stats) as fp:
+                        handler, span.nbytes = read_head(fp)
+                dimension = handler.dimension
+                if not is_trusted(dimension, handler.bounds):
+                    dimension = None
+            self.__last_rows[index] = (
+                CellRange.parse(dimension).max_row if dimension else None
+            )
+        return self.__last_rows[index]
+
+    def __worksheetpath(self, worksheet: SheetKey) -> str:
+        index = self.sheet_index(worksheet)
+        path = self.__paths.get(index)
+        if path is None:
+            path = self.ws.get_worksheetpath(index)
+            self.__paths[index] = path
+        return path
+
+    def __parse_sheet(self, worksheet: int) -> ParsedSheet:
+        if self.stats is None:
+            return self.__build_sheet(worksheet)
+        with self.stats.span("parse") as span:
+            sheet = self.__build_sheet(worksheet)
+            span.nbytes = self.__member_size(self.__worksheetpath(worksheet))
+        return sheet
+
+    def __build_sheet(self, worksheet: int) -> ParsedSheet:
+        sheet = ParsedSheet()
+        info = SheetInfo()
+        rows: Dict[int, Dict[int, RawCell]] = {}
+        for row, cells in self.__iter_sheet(worksheet, info, timed=False):
+            cols: Dict[int, RawCell] = {}
+            for col, cell in cells:
+                cols[col] = self.__raw_cell(cell, row, col)
+            rows[row] = cols
+            sheet.ncells += len(cols)
+        sheet.rows = rows
+        sheet.dimension = info.dimension
+        sheet.mergecells = info.mergecells
+        return sheet
+
+    def __iter_sheet(
+        self,
+        worksheet: SheetKey,
+        info: SheetInfo,
+        *,
+        timed: bool = True,
+        min_row: int = 1,
+        wanted: Optional[Container[int]] = None,
+    ) -> Generator[Tuple[int, List[Tuple[int, CellTuple]]], None, None]:
+        # The r attribute of <row> and <c> is optional and rows/cells may be sparse,
+        # so rows and columns are numbered by the r attribute and only fall back to
+        # their position.
+        # Rows before min_row may still be yielded, they are only skipped when the
+        # worksheet can be resumed from a checkpoint. Rows outside wanted are yielded
+        # without their cells.
+        with self.__open_sheet(worksheet, min_row) as (fp, row):
+            rows: Iterable[Tuple[Optional[str], List[CellTuple]]]
+            rows = self.parser.rows(fp, info)
+            if timed and self.stats is not None:
+                rows = self.__timed_rows(rows, fp)
+            for r, cells in rows:
+                row = int(r) if r else row + 1
+                numbered: List[Tuple[int, CellTuple]] = []
+                if wanted is not None and row not in wanted:
+                    yield row, numbered
                     continue
-                return Cell(row=row, col=col, address=serach_address, shared=SiTag())
-
-        # sidx = _ex_row.attrib.get("s")
-        _cell = Cell(
-            row=row,
-            col=col,
-            address=_ex_row.attrib["r"],
-            shared=SiTag(),
-            style=Format(),
-        )
-        if _ex_row.attrib.get("t"):
-            if _ex_row.attrib["t"] == "s":
-                for _e_v in _ex_row:
-                    if del_namespace(_e_v.tag) == "v":
-                        _cell.value = _e_v.text if isinstance(_e_v.text, str) else ""
-                        __prop = self.sharedstyle.get_shareitem(
-                            index=int(str(_e_v.text))
+                col = 0
+                for cell in cells:
+                    ref = cell[0]
+                    if ref:
+                        col = (
+                            COLUMN_NUMBERS.get(ref.rstrip(DIGITS))
+                            or split_address(ref)[1]
                         )
-                        _cell.shared = __prop
-                        _cell.value = __prop.text
-            elif _ex_row.attrib["t"] == "str":
-                for _e_v in _ex_row:
-                    if del_namespace(_e_v.tag) == "f":
-                        _cell.formula = _e_v.text if isinstance(_e_v.text, str) else ""
-                    elif del_namespace(_e_v.tag) == "v":
-                        _cell.value = _e_v.text if isinstance(_e_v.text, str) else ""
-            elif _ex_row.attrib["t"] == "n":
-                for _e_v in _ex_row:
-                    if del_namespace(_e_v.tag) == "v":
-                        _cell.value = _e_v.text if isinstance(_e_v.text, str) else ""
+                    else:
+                        col += 1
+                    numbered.append((col, cell))
+                yield row, numbered
+
+    @contextmanager
+    def __open_sheet(
+        self, worksheet: SheetKey, min_row: int
+    ) -> Generator[Tuple[IO[bytes], int], None, None]:
+        # The worksheet member and the number of the row before its first <row>
+        if self.checkpoint_rows is not None and min_row > self.checkpoint_rows:
+            checkpoint = self.seek_index(worksheet).find(min_row)
+            if checkpoint is not None:
+                fp: Any = self.seek_index(worksheet).open(checkpoint)
+                if self.stats is not None:
+                    fp = InflateReader(fp, self.stats)
+                with fp:
+                    yield fp, checkpoint.row - 1
+                return
+        with open_member(
+            self.archive, self.__worksheetpath(worksheet), self.stats
+        ) as fp:
+            yield fp, 0
+
+    def __timed_rows(self, rows: Iterable[Any], fp: Any) -> Generator[Any, None, None]:
+        # Parse time of a streamed worksheet: the time spent producing each row,
+        # without the decompression recorded by the InflateReader
+        assert self.stats is not None
+        iterator = iter(rows)
+        seconds = 0.0
+        try:
+            while True:
+                start = perf_counter()
+                try:
+                    row = next(iterator)
+                finally:
+                    seconds += perf_counter() - start
+                yield row
+        except StopIteration:
+            pass
+        finally:
+            self.stats.add("parse", seconds - fp.seconds, fp.nbytes)
+
+    def get_cell(
+        self,
+        row: int,
+        col: int,
+        *,
+        worksheet: SheetKey = 1,
+        raw: bool = False,
+        cache: bool = True,
+    ):
+        """Read one cell.
+
+        Args:
+            row (int): Row number starting from 1.
+            col (int): Column number starting from 1.
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+            raw (bool): Return a RawCell record instead of a Cell object.
+            cache (bool): Parse the whole worksheet into the cache for the next reads.
+                With False, sheetData is only read up to the row of the cell, unless
+                the worksheet is already cached.
+
+        Returns:
+            Cell | RawCell: The cell, empty when it is not stored in the worksheet.
+        """
+        targets = {row: (col,)}
+        raw_cell = (
+            self.__cell_rows(worksheet, targets, cache, "get_cell")
+            .get(row, {})
+            .get(col)
+        )
+        if raw_cell is None:
+            raw_cell = RawCell(row, col, cell_address(row, col))
+        return raw_cell if raw else self.__build_cell(raw_cell)
+
+    def empty_cell(self, row: int, col: int, address: str = "") -> Cell:
+        if not address:
+            address = cell_address(row, col)
+        return Cell(
+            row=row, col=col, address=address, shared=SiTag(), style=DEFAULT_FORMAT
+        )
+
+    def __raw_cell(
+        self,
+        cell: CellTuple,
+        row: int,
+        col: int,
+        sharedstyle: Optional[SharedStyle] = None,
+    ) -> RawCell:
+        r, t, s, v, f, inline = cell
+        if t == "inlineStr":
+            value = inline or ""
+        else:
+            value = v or ""
+        sst_index = None
+        if t == "s" and value:
+            sst_index = int(value)
+            if sharedstyle is None:
+                sharedstyle = self.sharedstyle
+            value = sharedstyle.get_text(sst_index)
+        address = r or self.convert_to_cell_address(row=row, col=col)
+        return RawCell(
+            row, col, address, value, f or "", t, int(s) if s else 0, sst_index
+        )
+
+    def __build_cell(self, raw_cell: RawCell) -> Cell:
+        if self.stats is not None:
+            return self.__timed_build_cell(raw_cell, self.stats)
+        if self.styled:
+            style = self.style.get_format(raw_cell.style_index)
+        else:
+            style = DEFAULT_FORMAT
+        if raw_cell.sst_index is None:
+            shared = SiTag()
+        else:
+            shared = self.__lookup_sharedstyle(raw_cell.sst_index).get_shareitem(
+                index=raw_cell.sst_index
+            )
+        return Cell(
+            row=raw_cell.row,
+            col=raw_cell.col,
+            address=raw_cell.address,
+            value=raw_cell.value,
+            formula=raw_cell.formula,
+            shared=shared,
+            style=style,
+        )
+
+    def __timed_build_cell(self, raw_cell: RawCell, stats: Stats) -> Cell:
+        # Load the lazy components first, so that their own spans are not counted
+        # as style resolution or cell creation
+        if self.styled:
+            self.style
+        sharedstyle = None
+        if raw_cell.sst_index is not None:
+            sharedstyle = self.__lookup_sharedstyle(raw_cell.sst_index)
+        start = perf_counter()
+        style = (
+            self.style.get_format(raw_cell.style_index)
+            if self.styled
+            else DEFAULT_FORMAT
+        )
+        resolved = perf_counter()
+        if sharedstyle is None or raw_cell.sst_index is None:
+            shared = SiTag()
         else:
-            for _e_v in _ex_row:
-                if del_namespace(_e_v.tag) == "f":
-                    _cell.formula = _e_v.text if isinstance(_e_v.text, str) else ""
-                elif del_namespace(_e_v.tag) == "v":
-                    _cell.value = _e_v.text if isinstance(_e_v.text, str) else ""
-
-        return _cell
-
-    def get_dimension_address(self, *, worksheet: int = 1) -> Optional[str]:
-        f = self.ws.get_worksheetpath(worksheet)
-        tree = ET.parse(self.archive.open(f))
-        root_elem = tree.getroot()
-        __eidx = self.__get_elem_index(root_elem, SheetXmlTag.DIMENSION.value)
-        if not isinstance(__eidx, int):
+            shared = sharedstyle.get_shareitem(index=raw_cell.sst_index)
+        cell = Cell(
+            row=raw_cell.row,
+            col=raw_cell.col,
+            address=raw_cell.address,
+            value=raw_cell.value,
+            formula=raw_cell.formula,
+            shared=shared,
+            style=style,
+        )
+        stats.add("styles", resolved - start)
+        stats.add("cells", perf_counter() - resolved)
+        return cell
+
+    def get_range(
+        self,
+        ref: str,
+        *,
+        worksheet: SheetKey = 1,
+        raw: bool = False,
+        cache: bool = True,
+    ) -> List[List[Any]]:
+        """Read every cell of an A1 range in a single pass over the worksheet.
+
+        Args:
+            ref (str): Range in A1 format such as "A1:F5000". A single address is allowed.
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+            raw (bool): Return RawCell records instead of Cell objects.
+            cache (bool): Parse the whole worksheet into the cache, see get_cell.
+
+        Returns:
+            list[list[Cell]] | list[list[RawCell]]: Cells of the range, row by row.
+
+        Example:
+            >>> get_range("A1:B2")
+            [[Cell(A1), Cell(B1)], [Cell(A2), Cell(B2)]]
+        """
+        cellrange = CellRange.parse(ref)
+        columns = cellrange.columns()
+        cols = {col for col, _ in columns}
+        sheet_rows = self.__cell_rows(
+            worksheet,
+            dict.fromkeys(range(cellrange.min_row, cellrange.max_row + 1), cols),
+            cache,
+            "get_range",
+        )
+        rows: List[List[Any]] = []
+        for row in range(cellrange.min_row, cellrange.max_row + 1):
+            raw_cols = sheet_rows.get(row, {})
+            cells: List[Any] = []
+            for col, letter in columns:
+                raw_cell = raw_cols.get(col)
+                if raw_cell is None:
+                    raw_cell = RawCell(row, col, letter + str(row))
+                cells.append(raw_cell if raw else self.__build_cell(raw_cell))
+            rows.append(cells)
+        return rows
+
+    def get_cells(
+        self,
+        addresses: List[str],
+        *,
+        worksheet: SheetKey = 1,
+        raw: bool = False,
+        cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Read an arbitrary set of cells in a single sorted pass over the worksheet.
+
+        Args:
+            addresses (list[str]): Cell addresses in A1 format.
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+            raw (bool): Return RawCell records instead of Cell objects.
+            cache (bool): Parse the whole worksheet into the cache, see get_cell.
+                With False, sheetData is only read up to the last requested row.
+
+        Returns:
+            dict[str, Cell] | dict[str, RawCell]: Cells keyed by the requested address,
+                in the requested order.
+        """
+        targets = sorted(zip(zip(*split_addresses(addresses)), addresses))
+        cols_by_row: Dict[int, Set[int]] = {}
+        for (row, col), _ in targets:
+            cols_by_row.setdefault(row, set()).add(col)
+        sheet_rows = self.__cell_rows(worksheet, cols_by_row, cache, "get_cells")
+        cells: Dict[str, Any] = {}
+        raw_cols: Dict[int, RawCell] = {}
+        current = 0
+        for (row, col), address in targets:
+            if row != current:
+                raw_cols = sheet_rows.get(row, {})
+                current = row
+            raw_cell = raw_cols.get(col)
+            if raw_cell is None:
+                raw_cell = RawCell(row, col, address.replace("$", ""))
+            cells[address] = raw_cell if raw else self.__build_cell(raw_cell)
+        return {address: cells[address] for address in addresses}
+
+    def __cell_rows(
+        self,
+        worksheet: SheetKey,
+        targets: Mapping[int, Collection[int]],
+        cache: bool = True,
+        operation: str = "get_cell",
+    ) -> Mapping[int, Dict[int, RawCell]]:
+        # Cells of the target rows, from the parsed sheet or read in a stop-early
+        # pass, from the nearest checkpoint if any, as planned
+        index = self.sheet_index(worksheet)
+        if index in self.cache:
+            # Hits are always served by the cache, their plan is built when asked for
+            self.__last_lookup = (operation, index, targets)
+            return self.get_sheet(index).rows
+        plan = self.__plan(operation, targets, index, cache, exact=False)
+        self.__last_lookup = plan
+        self.planner.record(plan)
+        if plan.strategy in ("cached", "index"):
+            return self.get_sheet(worksheet).rows
+        rows: Dict[int, Dict[int, RawCell]] = {}
+        for (row, col), raw_cell in self.scan_cells(
+            targets, worksheet=worksheet
+        ).items():
+            rows.setdefault(row, {})[col] = raw_cell
+        return rows
+
+    def iter_rows(
+        self,
+        worksheet: SheetKey = 1,
+        *,
+        min_row: int = 1,
+        max_row: Optional[int] = None,
+        values_only: bool = False,
+        raw: bool = False,
+        progress: Optional[Progress] = None,
+    ) -> Generator[List[Any], None, None]:
+        """Stream the rows of a worksheet without building the whole sheetX.xml tree.
+
+        Each <row> is released as soon as it has been yielded, so memory stays flat
+        regardless of the sheet size. Rows are dense from column 1 to the last cell
+        of the row, and rows missing from sheetData are yielded as empty lists.
+
+        Args:
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+            min_row (int): First row to yield.
+            max_row (int, optional): Last row to yield. Defaults to the end of the sheet.
+            values_only (bool): Yield cell values instead of Cell objects.
+            raw (bool): Yield RawCell records instead of Cell objects.
+            progress (Callable[[int, int | None], None], optional): Called after every
+                row with the number of rows yielded and the expected total, taken from
+                max_row or the dimension of the sheet (None when unknown).
+
+        Yields:
+            list[Cell] | list[RawCell] | list[str]: Cells of one row.
+        """
+        info = SheetInfo()
+        total: Optional[int] = None
+        next_row = min_row
+        for row, cells in self.__iter_sheet(worksheet, info, min_row=min_row):
+            if max_row is not None and row > max_row:
+                break
+            if row >= min_row:
+                for _ in range(next_row, row):
+                    yield []
+                yield self.__read_row(cells, row, values_only, raw)
+                next_row = row + 1
+                if progress is not None:
+                    if total is None:
+                        total = self.__row_total(info, min_row, max_row)
+                    progress(next_row - min_row, total)
+
+    def iter_cell_tuples(
+        self,
+        worksheet: SheetKey = 1,
+        *,
+        min_row: int = 1,
+        max_row: Optional[int] = None,
+        info: Optional[SheetInfo] = None,
+    ) -> Generator[Tuple[int, List[Tuple[int, CellTuple]]], None, None]:
+        """Stream the stored cells of a worksheet as parser tuples, row by row.
+
+        Unlike iter_rows, shared strings are not resolved: the value of a t="s" cell
+        is its index in sharedStrings.xml. Rows missing from sheetData are skipped.
+
+        Args:
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+            min_row (int): First row to yield.
+            max_row (int, optional): Last row to yield. Defaults to the end of the sheet.
+            info (SheetInfo, optional): Filled with the dimension and merged cells read
+                while streaming. The dimension is known once the first row is yielded.
+
+        Yields:
+            tuple[int, list[tuple[int, CellTuple]]]: Row number and its cells with their
+                column number.
+        """
+        if info is None:
+            info = SheetInfo()
+        for row, cells in self.__iter_sheet(worksheet, info, min_row=min_row):
+            if max_row is not None and row > max_row:
+                break
+            if row >= min_row:
+                yield row, cells
+
+    def __row_total(
+        self, info: SheetInfo, min_row: int, max_row: Optional[int]
+    ) -> Optional[int]:
+        if max_row is None and info.dimension:
+            try:
+                max_row = CellRange.parse(info.dimension).max_row
+            except ValueError:
+                return None
+        if max_row is None:
+            return None
+        return max(max_row - min_row + 1, 0)
+
+    def __read_row(
+        self, cells: List[Tuple[int, CellTuple]], row: int, values_only: bool, raw: bool
+    ) -> List[Any]:
+        dense: List[Any] = []
+        for col, cell in cells:
+            for c in range(len(dense) + 1, col):
+                if values_only:
+                    dense.append("")
+                elif raw:
+                    dense.append(RawCell(row, c, cell_address(row, c)))
+                else:
+                    dense.append(self.empty_cell(row, c))
+            raw_cell = self.__raw_cell(cell, row, col)
+            if values_only:
+                dense.append(raw_cell.value)
+            elif raw:
+                dense.append(raw_cell)
+            else:
+                dense.append(self.__build_cell(raw_cell))
+        return dense
+
+    def scan_cells(
+        self, targets: Mapping[int, Collection[int]], *, worksheet: SheetKey = 1
+    ) -> Dict[Tuple[int, int], RawCell]:
+        """Read a few cells in a single streaming pass, without caching the sheet.
+
+        Only the <c> elements of the target rows and columns are decoded, and the
+        scan stops as soon as it reaches the last target row, or a row past it when
+        that row is not stored, so the tail of a long sheet is never inflated. With
+        checkpoint_rows, the scan also starts from the checkpoint nearest to the first
+        target row. Shared strings are read only up to the largest index found,
+        unless the whole table is already loaded.
+
+        Args:
+            targets (Mapping[int, Collection[int]]): Target columns by row number.
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+
+        Returns:
+            dict[tuple[int, int], RawCell]: Cells found, keyed by (row, col). Empty
+            target cells are missing from the result.
+        """
+        if not targets:
+            return {}
+        last_row = max(targets)
+        stored: List[Tuple[int, int, CellTuple]] = []
+        max_index = -1
+        rows = self.__iter_sheet(
+            worksheet, SheetInfo(), min_row=min(targets), wanted=targets
+        )
+        for row, cells in rows:
+            if row > last_row:
+                break
+            cols = targets.get(row)
+            if cols:
+                for col, cell in cells:
+                    if col in cols:
+                        stored.append((row, col, cell))
+                        if cell[1] == "s" and cell[3]:
+                            max_index = max(max_index, int(cell[3]))
+            if row == last_row:
+                break
+        sharedstyle = None
+        if max_index >= 0:
+            sharedstyle = self.__lookup_sharedstyle(max_index)
+        return {
+            (row, col): self.__raw_cell(cell, row, col, sharedstyle)
+            for row, col, cell in stored
+        }
+
+    def get_dimension_address(self, *, worksheet: SheetKey = 1) -> Optional[str]:
+        """Return the ref of the dimension tag, None when the worksheet has none.
+
+        The dimension is taken from the cached sheet, or probed from the top of the
+        member without parsing the rows.
+        """
+        sheet = self.cache.get(self.sheet_index(worksheet))
+        if sheet is not None:
+            return sheet.dimension
+        return self.probe(worksheet).dimension
+
+    def get_used_address(self, *, worksheet: SheetKey = 1) -> Optional[str]:
+        """Return the range exported by default, None when the worksheet has no cell.
+
+        The rows are scanned, or read from the cached sheet, since the probe only
+        checks the dimension against the first rows. The range is the dimension
+        widened to every stored cell, or the range of the stored cells when the
+        dimension is missing or invalid.
+        """
+        probe = self.probe(worksheet, scan=True)
+        return covering_range(probe.dimension, probe.used_range)
+
+    def get_dimension_coordinate(self, *, worksheet: SheetKey = 1):
+        dimension = self.get_dimension_range(worksheet=worksheet)
+        if dimension is None:
             return None
-        _ex_row = root_elem[__eidx]
-        return _ex_row.attrib.get("ref")
+        return dimension.bounds
 
-    def get_dimension_coordinate(self, *, worksheet: int = 1):
+    def get_dimension_range(self, *, worksheet: SheetKey = 1) -> Optional[CellRange]:
+        """Return the used range of a worksheet, None when it has no dimension tag."""
         address = self.get_dimension_address(worksheet=worksheet)
         if not isinstance(address, str):
             return None
-        start_address = self.convert_to_row_col_index(address.split(":")[0])
-        end_address = self.convert_to_row_col_index(address.split(":")[1])
-        return start_address, end_address
-
-    @cache
-    def get_mergecell(self, start_cell: str, worksheet: int) -> str:
-        f = self.ws.get_worksheetpath(worksheet)
-        tree = ET.parse(self.archive.open(f))
-        root_elem = tree.getroot()
-        __eidx = self.__get_elem_index(root_elem, SheetXmlTag.MERGECELLS.value)
-        if not isinstance(__eidx, int):
-            return ""
-        for elem in root_elem[__eidx]:
-            if elem.attrib.get("ref"):
-                if start_cell in elem.attrib["ref"].split(":"):
-                    return elem.attrib["ref"]
-        return ""
-
-    def get_mergecells(self, worksheet: int) -> MergeCell:
+        return CellRange.parse(address)
+
+    def get_mergeindex(self, worksheet: SheetKey) -> MergeIndex:
+        sheet = self.get_sheet(worksheet)
+        if sheet.mergeindex is None:
+            sheet.mergeindex = MergeIndex(
+                MergeRange.from_ref(ref) for ref in sheet.mergecells
+            )
+        return sheet.mergeindex
+
+    def get_mergecell(self, start_cell: str, worksheet: SheetKey) -> str:
+        """Return the merged range containing a cell.
+
+        Args:
+            start_cell (str): Any cell of the merged range in A1 format.
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+
+        Returns:
+            str: The merged range such as "A7:G9", "" when the cell is not merged.
+        """
+        row, col = split_address(start_cell)
+        mrange = self.get_mergeindex(worksheet).find(row, col)
+        return "" if mrange is None else mrange.ref
+
+    def find_mergecells(self, ref: str, worksheet: SheetKey) -> List[str]:
+        """Return every merged range intersecting a range of cells.
+
+        Args:
+            ref (str): Range in A1 format.
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+
+        Returns:
+            list[str]: The merged ranges in document order.
+        """
+        cellrange = CellRange.parse(ref)
+        mranges = self.get_mergeindex(worksheet).overlapping(
+            cellrange.min_row, cellrange.min_col, cellrange.max_row, cellrange.max_col
+        )
+        return [m.ref for m in mranges]
+
+    def get_mergecells(self, worksheet: SheetKey) -> MergeCell:
         mgcell = MergeCell()
-        f = self.ws.get_worksheetpath(worksheet)
-        tree = ET.parse(self.archive.open(f))
-        root_elem = tree.getroot()
-        __eidx = self.__get_elem_index(root_elem, SheetXmlTag.MERGECELLS.value)
-        if not isinstance(__eidx, int):
-            return mgcell
-
-        for elem in root_elem[__eidx]:
-            if elem.attrib.get("ref"):
-                mgcell.ref.setdefault(str(worksheet), [])
-                mgcell.ref[str(worksheet)].append((elem.attrib["ref"]))
+        index = self.sheet_index(worksheet)
+        for ref in self.get_sheet(worksheet).mergecells:
+            mgcell.ref.setdefault(str(index), [])
+            mgcell.ref[str(index)].append(ref)
         return mgcell
 
     def convert_to_row_col_index(self, cell_address: str) -> tuple[int, int]:
@@ -277,16 +1160,26 @@ class SheetXml:
             >>> convert_to_row_col_index("AA2")
             (2, 27)
         """
-        match = re.match("([A-Z]+)([0-9]+)", cell_address)
-        if match:
-            col_str, row_str = match.groups()
-            col = 0
-            for c in col_str:
-                col = col * 26 + ord(c) - ord("A") + 1
-            row = int(row_str)
-            return (row, col)
-        else:
-            raise ValueError(f"Invalid cell address: {cell_address}")
+        return split_address(cell_address)
+
+    def convert_to_range_index(
+        self, ref: str
+    ) -> tuple[tuple[int, int], tuple[int, int]]:
+        """Convert a range in A1 format to the row and column index of its corners.
+
+        Args:
+            ref (str): The range, absolute references ("$A$1") are accepted.
+
+        Returns:
+            tuple: The (row, col) of the top-left and the bottom-right cell.
+
+        Example:
+            >>> convert_to_range_index("A1:C5")
+            ((1, 1), (5, 3))
+            >>> convert_to_range_index("B2")
+            ((2, 2), (2, 2))
+        """
+        return CellRange.parse(ref).bounds
 
     def convert_to_cell_address(self, row: int, col: int):
         """Convert a row-column index to an Excel cell address in A1 format.
@@ -304,8 +1197,4 @@ class SheetXml:
             >>> convert_to_cell_address(2, 2)
             'C3'
         """
-        col_str = ""
-        while col > 0:
-            col, c = divmod(col - 1, 26)
-            col_str = chr(c + ord("A")) + col_str
-        return f"{col_str}{row}"
+        return cell_address(row, col)
@@ -0,0 +1,193 @@
+from array import array
+from typing import TYPE_CHECKING, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+from exmlrd.addressing import column_letter
+from exmlrd.cell import ParsedSheet, RawCell
+
+if TYPE_CHECKING:
+    from exmlrd.sharedstyle import SharedStyle
+
+# Code of the t attribute stored per cell, unknown types are stored as "n"
+CELL_TYPES = ("n", "s", "str", "b", "e", "inlineStr", "d")
+CELL_TYPE_CODES = {t: i for i, t in enumerate(CELL_TYPES)}
+
+Buffer = Union[array, bytes, bytearray, memoryview]
+
+
+class CompactSheet:
+    """
+    Columnar copy of a parsed worksheet that is cheap to pickle and to store
+
+    Every cell is stored in flat arrays, and the values share one UTF-8 buffer,
+    so a sheet of millions of cells is a handful of buffers rather than millions
+    of Python objects.
+
+    Attributes:
+        dimension (str | None): ref attribute of the dimension tag
+        mergecells (list[str]): ref attribute of all mergeCell tags
+        rows (array): Row number of each cell
+        cols (array): Column number of each cell
+        types (bytearray): Index of the t attribute of each cell in CELL_TYPES
+        styles (array): s attribute of each cell
+        sst (array): Index in sharedStrings.xml of each cell, -1 when not a shared string
+        values (bytes): UTF-8 values of all cells concatenated. Empty for the shared
+            strings of a sheet built with sst_text=False
+        offsets (array): Start of each value in values, followed by the end of the last one
+        formulas (dict[int, str]): Formula by cell position
+        sharedstyle (SharedStyle | None): Table giving the text of the shared strings
+            whose value is not stored, set by the receiver of the sheet
+    """
+
+    def __init__(self) -> None:
+        self.dimension: Optional[str] = None
+        self.mergecells: List[str] = []
+        # Arrays or bytes, as built from a parsed sheet or read from the disk cache
+        self.rows: Buffer = array("I")
+        self.cols: Buffer = array("I")
+        self.types: Buffer = bytearray()
+        self.styles: Buffer = array("I")
+        self.sst: Buffer = array("q")
+        self.values: Buffer = b""
+        self.offsets: Buffer = array("q", [0])
+        self.formulas: Dict[int, str] = {}
+        self.sharedstyle: Optional["SharedStyle"] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def from_parsed(
+        cls, sheet: ParsedSheet, *, sst_text: bool = True
+    ) -> "CompactSheet":
+        """Copy a parsed worksheet into arrays.
+
+        Args:
+            sheet (ParsedSheet): Parsed worksheet.
+            sst_text (bool): Copy the text of the shared strings into values. Without
+                it only their index is kept, for a receiver that already holds the
+                shared strings table and sets it as sharedstyle.
+        """
+        compact = cls()
+        compact.dimension = sheet.dimension
+        compact.mergecells = list(sheet.mergecells)
+        rows, cols, styles = array("I"), array("I"), array("I")
+        types = bytearray()
+        sst, offsets = array("q"), array("q", [0])
+        values = bytearray()
+        for row, raw_cols in sheet.rows.items():
+            for col, raw_cell in raw_cols.items():
+                if raw_cell.formula:
+                    compact.formulas[len(rows)] = raw_cell.formula
+                rows.append(row)
+                cols.append(col)
+                types.append(CELL_TYPE_CODES.get(raw_cell.type, 0))
+                styles.append(raw_cell.style_index)
+                if raw_cell.sst_index is None:
+                    sst.append(-1)
+                    values += raw_cell.value.encode("utf-8")
+                else:
+                    sst.append(raw_cell.sst_index)
+                    if sst_text:
+                        values += raw_cell.value.encode("utf-8")
+                offsets.append(len(values))
+        compact.rows, compact.cols, compact.types = rows, cols, types
+        compact.styles, compact.sst, compact.offsets = styles, sst, offsets
+        compact.values = bytes(values)
+        return compact
+
+    def value(self, index: int) -> str:
+        sst = self.sst[index]
+        if sst >= 0 and self.sharedstyle is not None:
+            return self.sharedstyle.get_text(sst)
+        return str(self.values[self.offsets[index] : self.offsets[index + 1]], "utf-8")
+
+    def cell(self, index: int) -> RawCell:
+        row, col, sst = self.rows[index], self.cols[index], self.sst[index]
+        return RawCell(
+            row,
+            col,
+            column_letter(col) + str(row),
+            self.value(index),
+            self.formulas.get(index, ""),
+            CELL_TYPES[self.types[index]],
+            self.styles[index],
+            None if sst < 0 else sst,
+        )
+
+    def __iter__(self) -> Iterator[RawCell]:
+        view = memoryview(self.values)
+        offsets = self.offsets
+        formulas = self.formulas
+        get_text = None if self.sharedstyle is None else self.sharedstyle.get_text
+        for i, (row, col, t, s, sst) in enumerate(
+            zip(self.rows, self.cols, self.types, self.styles, self.sst)
+        ):
+            if sst >= 0 and get_text is not None:
+                value = get_text(sst)
+            else:
+                value = str(view[offsets[i] : offsets[i + 1]], "utf-8")
+            yield RawCell(
+                row,
+                col,
+                column_letter(col) + str(row),
+                value,
+                formulas.get(i, ""),
+                CELL_TYPES[t],
+                s,
+                None if sst < 0 else sst,
+            )
+
+    def to_parsed(self) -> ParsedSheet:
+        """Wrap the arrays into a ParsedSheet whose rows are decoded on first access."""
+        sheet = ParsedSheet()
+        sheet.dimension = self.dimension
+        sheet.mergecells = list(self.mergecells)
+        sheet.rows = CompactRows(self)
+        sheet.ncells = len(self)
+        return sheet
+
+
+class CompactRows(Mapping[int, Dict[int, RawCell]]):
+    """
+    Cells of a CompactSheet by row and column number, as in ParsedSheet.rows
+
+    Only the span of every row in the arrays is computed up front. The RawCells of a
+    row are built on its first access and kept, so a lookup into a sheet read back
+    from the disk cache does not pay for building every cell.
+    """
+
+    def __init__(self, compact: CompactSheet):
+        self.compact = compact
+        # The cells of a row are consecutive, see CompactSheet.from_parsed
+        self.__spans: Dict[int, Tuple[int, int]] = {}
+        start = 0
+        current = None
+        for i, row in enumerate(compact.rows):
+            if row != current:
+                if current is not None:
+                    self.__spans[current] = (start, i)
+                current, start = row, i
+        if current is not None:
+            self.__spans[current] = (start, len(compact))
+        self.__decoded: Dict[int, Dict[int, RawCell]] = {}
+
+    def __getitem__(self, row: int) -> Dict[int, RawCell]:
+        cols = self.__decoded.get(row)
+        if cols is None:
+            start, end = self.__spans[row]
+            cell = self.compact.cell
+            cols = {}
+            for i in range(start, end):
+                raw_cell = cell(i)
+                cols[raw_cell.col] = raw_cell
+            self.__decoded[row] = cols
+        return cols
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.__spans)
+
+    def __len__(self) -> int:
+        return len(self.__spans)
+
+    def __contains__(self, row: object) -> bool:
+        return row in self.__spans
@@ -0,0 +1,391 @@
+import csv
+import glob
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+from zipfile import ZipFile
+
+from exmlrd import log
+from exmlrd.addressing import column_letter
+from exmlrd.arrow import DEFAULT_BATCH_ROWS, import_pyarrow, iter_record_batches
+from exmlrd.cell import SheetKey, SheetXml
+from exmlrd.exceptions import ColumnTypeConflict, NotFoundSheet
+from exmlrd.export import get_encoder
+
+logger = log.get_logger(__name__)
+
+# Output formats, also used as the extension of the output files
+FORMATS = ("csv", "jsonl", "parquet")
+WORKBOOK_EXTENSIONS = (".xlsx", ".xlsm")
+# Characters that cannot appear in a file name on common platforms
+UNSAFE_FILENAME = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+class SheetOutput(NamedTuple):
+    """
+    One worksheet converted, or skipped because its output was up to date
+
+    Attributes:
+        worksheet (str): Name of the worksheet
+        path (str): Path of the output file
+        cells (int): Number of non-empty cells written below the header row, 0 when
+            skipped
+        skipped (bool): The output was newer than the workbook and left as is
+    """
+
+    worksheet: str
+    path: str
+    cells: int = 0
+    skipped: bool = False
+
+
+class ConvertResult(NamedTuple):
+    """
+    Outcome of converting one workbook
+
+    Attributes:
+        path (str): Path of the workbook
+        outputs (list[SheetOutput]): Converted or skipped worksheets
+        error (str | None): "ExceptionName: message" when the workbook could not be converted
+        seconds (float): Time spent on the workbook
+    """
+
+    path: str
+    outputs: List[SheetOutput]
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def cells(self) -> int:
+        return sum(output.cells for output in self.outputs)
+
+
+def find_workbooks(inputs: Iterable[str]) -> List[Tuple[str, str]]:
+    """Expand files, directories and glob patterns into workbooks to convert.
+
+    Directories are walked recursively. Excel lock files (~$*.xlsx) are ignored.
+
+    Args:
+        inputs (Iterable[str]): Paths of workbooks or directories, or glob patterns.
+
+    Returns:
+        list[tuple[str, str]]: Path of every workbook and its path relative to the
+            directory it was found in, which is kept in the output directory.
+    """
+    workbooks: List[Tuple[str, str]] = []
+    seen = set()
+
+    def add(path: str, relpath: str) -> None:
+        name = os.path.basename(path)
+        if name.startswith("~$") or not name.lower().endswith(WORKBOOK_EXTENSIONS):
+            return
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            workbooks.append((path, relpath))
+
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    add(path, os.path.relpath(path, pattern))
+        elif os.path.isfile(pattern):
+            add(pattern, os.path.basename(pattern))
+        else:
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if os.path.isfile(path):
+                    add(path, os.path.basename(path))
+    return workbooks
+
+
+def output_path(out_dir: str, relpath: str, worksheet: str, fmt: str) -> str:
+    """Return <out_dir>/<relative directory>/<workbook stem>.<sheet name>.<extension>."""
+    stem = os.path.splitext(relpath)[0]
+    sheet = UNSAFE_FILENAME.sub("_", worksheet)
+    return os.path.join(out_dir, f"{stem}.{sheet}.{fmt}")
+
+
+def is_up_to_date(source: str, target: str) -> bool:
+    try:
+        return os.path.getmtime(target) >= os.path.getmtime(source)
+    except OSError:
+        return False
+
+
+def write_csv(
+    sheetxml: SheetXml, worksheet: SheetKey, path: str, header: Optional[int]
+) -> int:
+    # The header row, if any, is the first line
+    cells = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        rows = sheetxml.iter_rows(worksheet, min_row=header or 1, values_only=True)
+        if header is not None:
+            writer.writerow(next(rows, []))
+        for row in rows:
+            writer.writerow(row)
+            cells += sum(1 for value in row if value != "")
+    return cells
+
+
+def write_jsonl(
+    sheetxml: SheetXml, worksheet: SheetKey, path: str, header: Optional[int]
+) -> int:
+    # One object per row, keyed by the names of the header row or by column letter.
+    # Empty cells are left out.
+    dumps = get_encoder()
+    names: List[str] = []
+    cells = 0
+    with open(path, "w", encoding="utf-8") as f:
+        rows = sheetxml.iter_rows(worksheet, min_row=header or 1, values_only=True)
+        if header is not None:
+            for value in next(rows, []):
+                names.append(value if value and value not in names else "")
+        for row in rows:
+            for col in range(len(names), len(row)):
+                names.append("")
+            record = {
+                names[col] or column_letter(col + 1): value
+                for col, value in enumerate(row)
+                if value != ""
+            }
+            if record:
+                f.write(dumps(record) + "\n")
+                cells += len(record)
+    return cells
+
+
+def write_parquet(
+    sheetxml: SheetXml, worksheet: SheetKey, path: str, header: Optional[int]
+) -> int:
+    # The column types come from the first batch, unless a later value does not fit
+    # them: the file is then written again with the types of every row
+    import_pyarrow()
+    try:
+        return write_batches(sheetxml, worksheet, path, header, scan_types=False)
+    except ColumnTypeConflict as e:
+        logger.debug(f"[{worksheet}] {e}, scanning the column types")
+    return write_batches(sheetxml, worksheet, path, header, scan_types=True)
+
+
+def write_batches(
+    sheetxml: SheetXml,
+    worksheet: SheetKey,
+    path: str,
+    header: Optional[int],
+    scan_types: bool,
+) -> int:
+    import pyarrow.parquet as pq  # type: ignore[import]
+
+    cells = 0
+    writer = None
+    try:
+        for batch in iter_record_batches(
+            sheetxml,
+            worksheet,
+            header=header,
+            batch_rows=DEFAULT_BATCH_ROWS,
+            compact_dictionary=True,
+            scan_types=scan_types,
+        ):
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema)
+            writer.write_batch(batch)
+            cells += sum(len(column) - column.null_count for column in batch.columns)
+    finally:
+        if writer is not None:
+            writer.close()
+    return cells
+
+
+WRITERS: Dict[str, Callable[[SheetXml, SheetKey, str, Optional[int]], int]] = {
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+    "parquet": write_parquet,
+}
+
+
+def write_atomic(write: Callable[[str], int], path: str) -> int:
+    """Write a file through a temporary file renamed over it.
+
+    An interrupted conversion therefore never leaves a partial output that would
+    look up to date on the next run.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.part"
+    try:
+        cells = write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return cells
+
+
+def convert_file(
+    workbook: Tuple[str, str],
+    out_dir: str,
+    fmt: str,
+    sheets: Optional[List[SheetKey]] = None,
+    header: Optional[int] = None,
+    force: bool = False,
+) -> ConvertResult:
+    """Convert the worksheets of one workbook, reporting failures in the result.
+
+    Args:
+        workbook (tuple[str, str]): Path of the workbook and its relative output path,
+            see find_workbooks.
+        out_dir (str): Output directory.
+        fmt (str): "csv", "jsonl" or "parquet".
+        sheets (list[int | str], optional): Worksheet numbers or names. Defaults to
+            every worksheet.
+        header (int, optional): Row holding the column names. It names the columns of
+            Parquet and JSON Lines outputs and is the first line of CSV outputs.
+        force (bool): Convert even when the output is newer than the workbook.
+
+    Returns:
+        ConvertResult: Outputs of the workbook, or the error that stopped it.
+    """
+    path, relpath = workbook
+    start = time.perf_counter()
+    outputs: List[SheetOutput] = []
+    try:
+        with ZipFile(path) as archive:
+            # Nothing is cached: every sheet is streamed once
+            sheetxml = SheetXml(archive, cache_bytes=0)
+            names = sheetxml.ws.worksheets
+            keys: List[SheetKey] = list(range(1, len(names) + 1))
+            if sheets is not None:
+                keys = list(sheets)
+            for key in keys:
+                if isinstance(key, int) and not 0 < key <= len(names):
+                    raise NotFoundSheet(f"No worksheet {key} in {len(names)} sheets")
+                name = sheetxml.worksheet(key)
+                target = output_path(out_dir, relpath, name, fmt)
+                if not force and is_up_to_date(path, target):
+                    outputs.append(SheetOutput(name, target, skipped=True))
+                    continue
+                cells = write_atomic(
+                    lambda tmp: WRITERS[fmt](sheetxml, key, tmp, header), target
+                )
+                outputs.append(SheetOutput(name, target, cells))
+    except Exception as e:
+        logger.debug(f"[{path}] {type(e).__name__}: {e}")
+        return ConvertResult(
+            path, outputs, f"{type(e).__name__}: {e}", time.perf_counter() - start
+        )
+    return ConvertResult(path, outputs, seconds=time.perf_counter() - start)
+
+
+def convert_many(
+    workbooks: Iterable[Tuple[str, str]],
+    out_dir: str,
+    fmt: str,
+    *,
+    sheets: Optional[List[SheetKey]] = None,
+    header: Optional[int] = None,
+    force: bool = False,
+    workers: Optional[int] = None,
+) -> Iterator[ConvertResult]:
+    """Convert many workbooks, each one in a worker process.
+
+    Args:
+        workbooks (Iterable[tuple[str, str]]): Workbooks from find_workbooks.
+        out_dir (str): Output directory.
+        fmt (str): "csv", "jsonl" or "parquet".
+        sheets (list[int | str], optional): Worksheet numbers or names.
+        header (int, optional): See convert_file.
+        force (bool): Convert even the outputs that are up to date.
+        workers (int, optional): Number of processes. Defaults to the number of CPUs,
+            1 converts in the calling process.
+
+    Yields:
+        ConvertResult: One result per workbook, as they complete.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(
+            f"Unknown format: {fmt} (expected one of {', '.join(FORMATS)})"
+        )
+    task = partial(
+        convert_file,
+        out_dir=out_dir,
+        fmt=fmt,
+        sheets=sheets,
+        header=header,
+        force=force,
+    )
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        yield from map(task, workbooks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # One workbook at a time per worker keeps the memory of a worker bounded
+        yield from executor.map(task, workbooks)
+
+
+class Summary:
+    """
+    Throughput and failures of a conversion run
+
+    Attributes:
+        files (int): Workbooks converted without error
+        failed (list[ConvertResult]): Workbooks that could not be converted
+        sheets (int): Worksheets written
+        skipped (int): Worksheets whose output was up to date
+        cells (int): Cells written
+        seconds (float): Wall time of the run
+    """
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.failed: List[ConvertResult] = []
+        self.sheets = 0
+        self.skipped = 0
+        self.cells = 0
+        self.seconds = 0.0
+        self.__start = time.perf_counter()
+
+    def add(self, result: ConvertResult) -> None:
+        if result.ok:
+            self.files += 1
+        else:
+            self.failed.append(result)
+        for output in result.outputs:
+            if output.skipped:
+                self.skipped += 1
+            else:
+                self.sheets += 1
+        self.cells += result.cells
+        self.seconds = time.perf_counter() - self.__start
+
+    def format(self) -> str:
+        seconds = max(self.seconds, 1e-9)
+        files = self.files + len(self.failed)
+        lines = [
+            f"{files} files ({len(self.failed)} failed), {self.sheets} sheets written, "
+            f"{self.skipped} up to date, {self.cells:,} cells in {self.seconds:.2f}s",
+            f"{files / seconds:.1f} files/s, {self.cells / seconds:,.0f} cells/s",
+        ]
+        for result in self.failed:
+            lines.append(f"FAILED {result.path}: {result.error}")
+        return "\n".join(lines)
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Any, Dict, List, Optional, Tuple, Union
+from zipfile import ZipFile
+
+from exmlrd import log
+from exmlrd.cell import ParsedSheet
+from exmlrd.compact import CompactSheet
+from exmlrd.sharedstyle import SharedStyle
+from exmlrd.styles import Styels
+
+logger = log.get_logger(__name__)
+
+DEFAULT_DISK_CACHE_BYTES = 4 * 1024 * 1024 * 1024
+
+# Sidecar layout: MAGIC, length of the JSON header (uint64 little endian), the JSON
+# header, then the binary blobs aligned on 8 bytes. The header holds the offset,
+# length and array typecode of every blob next to the small metadata of the part.
+# Blobs are stored in native byte order, a sidecar from another platform is a miss.
+MAGIC = b"EXMLRD\x00\x01"
+HEADER = struct.Struct("<8sQ")
+ALIGN = 8
+
+SHEET_BLOBS = ("rows", "cols", "types", "styles", "sst", "values", "offsets")
+
+
+class DiskCache:
+    """
+    Directory of parsed workbooks shared between processes and runs
+
+    Every workbook gets one entry named after a digest of its file size, mtime and the
+    CRC of every zip member, so a modified file never hits a stale entry. An entry holds
+    one binary sidecar per part (shared strings, styles and each parsed worksheet),
+    whose arrays are read back as they are instead of parsing the XML again. The
+    arrays are copied out of the memory map, which is closed right away, so entries
+    can be pruned or replaced while a reader uses them, even on Windows.
+
+    Entries are evicted least recently used first once the directory exceeds
+    ``max_bytes``. Writes go through a temporary file and a rename, so concurrent
+    readers never see a partial sidecar.
+
+    Attributes:
+        directory (str): Cache directory, created when missing
+        max_bytes (int): Size cap of the directory in bytes
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_DISK_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, archive: ZipFile) -> str:
+        """Return the cache key of an opened workbook."""
+        if archive.filename is None:
+            raise ValueError("The disk cache needs a workbook opened from a path")
+        stat = os.stat(archive.filename)
+        digest = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        for info in archive.infolist():
+            digest.update(f"{info.filename}:{info.CRC}:{info.file_size};".encode())
+        return digest.hexdigest()
+
+    def __path(self, key: str, part: str) -> str:
+        return os.path.join(self.directory, key, part + ".bin")
+
+    def read(
+        self, key: str, part: str
+    ) -> Optional[Tuple[Dict[str, Any], Dict[str, Union[bytes, array]]]]:
+        """Read a sidecar through a memory map.
+
+        Returns:
+            tuple | None: The metadata and the blobs of the part, bytes or arrays of
+                their typecode, None on a miss.
+        """
+        path = self.__path(key, part)
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            with mm:
+                meta, blobs = self.__read_blobs(mm)
+        except (ValueError, KeyError, struct.error) as e:
+            logger.debug(f"[{path}] {e}")
+            self.__remove(path)
+            return None
+        self.__touch(key)
+        return meta, blobs
+
+    def __read_blobs(
+        self, mm: mmap.mmap
+    ) -> Tuple[Dict[str, Any], Dict[str, Union[bytes, array]]]:
+        # Slicing the map copies the bytes, no view of the map outlives it
+        magic, meta_len = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Unknown sidecar format: {magic!r}")
+        meta = json.loads(mm[HEADER.size : HEADER.size + meta_len])
+        if meta.pop("byteorder") != sys.byteorder:
+            raise ValueError("The sidecar was written on another platform")
+        base = self.__align(HEADER.size + meta_len)
+        blobs: Dict[str, Union[bytes, array]] = {}
+        for name, (offset, length, typecode) in meta.pop("blobs").items():
+            data = mm[base + offset : base + offset + length]
+            if len(data) != length:
+                raise ValueError(f"Truncated blob: {name}")
+            if typecode == "B":
+                blobs[name] = data
+            else:
+                values = array(typecode)
+                values.frombytes(data)
+                blobs[name] = values
+        return meta, blobs
+
+    def write(
+        self, key: str, part: str, meta: Dict[str, Any], blobs: Dict[str, Any]
+    ) -> None:
+        """Write a sidecar, then evict old entries to stay within the size cap.
+
+        Args:
+            key (str): Cache key of the workbook.
+            part (str): Name of the part.
+            meta (dict[str, Any]): Metadata of the part, serializable to JSON.
+            blobs (dict[str, Any]): Arrays or bytes-like objects by name.
+        """
+        entry = os.path.join(self.directory, key)
+        os.makedirs(entry, exist_ok=True)
+        views = {name: memoryview(blob) for name, blob in blobs.items()}
+
+        # Blob offsets are relative to the end of the header, aligned on 8 bytes
+        meta = dict(meta, byteorder=sys.byteorder, blobs={})
+        offset = 0
+        for name, view in views.items():
+            meta["blobs"][name] = [offset, view.nbytes, view.format]
+            offset = self.__align(offset + view.nbytes)
+        header = json.dumps(meta).encode()
+        base = self.__align(HEADER.size + len(header))
+
+        fd, tmp = tempfile.mkstemp(dir=entry, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(HEADER.pack(MAGIC, len(header)))
+                f.write(header)
+                for name, view in views.items():
+                    f.seek(base + meta["blobs"][name][0])
+                    f.write(view.cast("B"))
+            os.replace(tmp, self.__path(key, part))
+        except OSError as e:
+            logger.debug(f"[{key}/{part}] {e}")
+            self.__remove(tmp)
+            return
+        self.prune(keep=key)
+
+    def __align(self, offset: int) -> int:
+        return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+    def __touch(self, key: str) -> None:
+        try:
+            os.utime(os.path.join(self.directory, key))
+        except OSError:
+            pass
+
+    def __remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """Return the (last use, size in bytes, key) of every entry, oldest first."""
+        entries = []
+        for key in os.listdir(self.directory):
+            entry = os.path.join(self.directory, key)
+            try:
+                nbytes = sum(e.stat().st_size for e in os.scandir(entry))
+                entries.append((os.stat(entry).st_mtime, nbytes, key))
+            except OSError:
+                continue
+        return sorted(entries)
+
+    def prune(self, keep: Optional[str] = None) -> None:
+        """Evict the least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(nbytes for _, nbytes, _ in entries)
+        for _, nbytes, key in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+            total -= nbytes
+
+    def clear(self) -> None:
+        for key in os.listdir(self.directory):
+            shutil.rmtree(os.path.join(self.directory, key), ignore_errors=True)
+
+    def load_sheet(self, key: str, worksheet: int) -> Optional[CompactSheet]:
+        found = self.read(key, f"sheet{worksheet}")
+        if found is None:
+            return None
+        meta, blobs = found
+        compact = CompactSheet()
+        compact.dimension = meta["dimension"]
+        compact.mergecells = meta["mergecells"]
+        compact.formulas = {int(i): f for i, f in meta["formulas"].items()}
+        for name in SHEET_BLOBS:
+            setattr(compact, name, blobs[name])
+        return compact
+
+    def save_sheet(self, key: str, worksheet: int, sheet: ParsedSheet) -> None:
+        compact = CompactSheet.from_parsed(sheet)
+        meta = {
+            "dimension": compact.dimension,
+            "mergecells": compact.mergecells,
+            "formulas": compact.formulas,
+        }
+        blobs = {name: getattr(compact, name) for name in SHEET_BLOBS}
+        self.write(key, f"sheet{worksheet}", meta, blobs)
+
+    def load_sst(self, key: str) -> Optional[SharedStyle]:
+        found = self.read(key, "sst")
+        if found is None:
+            return None
+        meta, blobs = found
+        rich = {int(i): si.encode("utf-8") for i, si in meta["rich"].items()}
+        return SharedStyle.from_table(
+            blobs["buffer"], blobs["offsets"], rich  # type: ignore[arg-type]
+        )
+
+    def save_sst(self, key: str, sharedstyle: SharedStyle) -> None:
+        buffer, offsets, rich = sharedstyle.table()
+        meta = {"rich": {i: si.decode("utf-8") for i, si in rich.items()}}
+        self.write(key, "sst", meta, {"buffer": buffer, "offsets": offsets})
+
+    def load_styles(self, key: str) -> Optional[Styels]:
+        found = self.read(key, "styles")
+        if found is None:
+            return None
+        return Styels.from_table(found[0]["table"])
+
+    def save_styles(self, key: str, styles: Styels) -> None:
+        self.write(key, "styles", {"table": styles.table()}, {})
@@ -12,3 +12,7 @@ class NotFoundSheet(Exception):
 
 class NotFoundElemnt(Exception):
     ...
+
+
+class ColumnTypeConflict(ValueError):
+    ...
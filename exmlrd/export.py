@@ -0,0 +1,477 @@
+import io
+import json
+import re
+from dataclasses import asdict
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from exmlrd import log
+from exmlrd.addressing import CellRange
+from exmlrd.stats import phase_span
+
+if TYPE_CHECKING:
+    from exmlrd.cell import SheetKey, SheetXml
+    from exmlrd.stats import Progress
+
+logger = log.get_logger(__name__)
+
+# Built-in numFmtId used by Excel for dates and times
+DATE_NUMFMT_IDS = set(range(14, 23)) | set(range(45, 48))
+TEXT_NUMFMT_ID = 49
+# Seconds between the Excel epoch (1899-12-30) and the unix epoch
+EXCEL_EPOCH_OFFSET = 25569 * 86400
+# Same for workbooks with date1904 set, whose epoch is 1904-01-01
+EXCEL_1904_EPOCH_OFFSET = 24107 * 86400
+
+DATE_FORMATCODE = re.compile(r"(?<![\\_])[dmyhs]", re.IGNORECASE)
+
+
+def epoch_offset(sheetxml: "SheetXml") -> int:
+    """Seconds between the epoch of the date serials of a workbook and the unix epoch."""
+    if sheetxml.ws.manifest.date1904:
+        return EXCEL_1904_EPOCH_OFFSET
+    return EXCEL_EPOCH_OFFSET
+
+
+def import_numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(
+            "numpy is required for to_numpy(). Install it with `pip install exmlrd[numpy]`"
+        ) from e
+    return numpy
+
+
+def numfmt_kind(formatcode: str, numfmt_id: int) -> str:
+    """Classify a number format into "text", "datetime" or "number".
+
+    Args:
+        formatcode (str): formatCode of the numFmt, "" for built-in formats.
+        numfmt_id (int): numFmtId of the cellXfs entry.
+
+    Returns:
+        str: The kind of values displayed with this number format.
+
+    Example:
+        >>> numfmt_kind("@", 49)
+        'text'
+        >>> numfmt_kind("yyyy/m/d", 176)
+        'datetime'
+        >>> numfmt_kind("0.000", 176)
+        'number'
+    """
+    if numfmt_id == TEXT_NUMFMT_ID or formatcode == "@":
+        return "text"
+    if numfmt_id in DATE_NUMFMT_IDS:
+        return "datetime"
+    # Ignore quoted literals and colors such as "[Red]" before looking for d/m/y/h/s
+    code = re.sub(r'"[^"]*"|\[[^\]]*\]', "", formatcode)
+    if DATE_FORMATCODE.search(code) and code.lower() != "general":
+        return "datetime"
+    return "number"
+
+
+def sheet_to_numpy(
+    sheetxml: "SheetXml",
+    worksheet: "SheetKey" = 1,
+    *,
+    ref: Optional[str] = None,
+    header: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Convert a worksheet into one typed numpy array per column.
+
+    The dtype of a column is inferred from the t attribute of its cells and the
+    number format behind their s attribute:
+
+    - numeric cells become int64, or float64 when a value is fractional or missing
+    - numeric cells with a date format become datetime64[ms], counted from the
+      1904 epoch when the workbook sets date1904
+    - boolean cells become bool, or a masked bool array when a value is missing
+    - any other column becomes an object array of str
+
+    Empty cells are NaN, NaT, masked or None depending on the dtype.
+
+    Args:
+        sheetxml (SheetXml): Parsed workbook.
+        worksheet (int | str): Worksheet number starting from 1, or sheet name.
+        ref (str, optional): Range in A1 format. Defaults to the used range of the sheet.
+        header (int, optional): Row number holding the column names.
+            Data starts on the next row. Without header, the columns are named by letter.
+
+    Returns:
+        dict[str, numpy.ndarray]: Arrays keyed by column name.
+    """
+    np = import_numpy()
+    sheet = sheetxml.get_sheet(worksheet)
+    if ref is None:
+        ref = sheetxml.get_used_address(worksheet=worksheet)
+    if ref is None:
+        return {}
+    cellrange = CellRange.parse(ref)
+    (min_row, min_col), (max_row, max_col) = cellrange.bounds
+
+    names: List[str] = []
+    seen = set()
+    for col, letter in cellrange.columns():
+        name = ""
+        if header is not None:
+            name = sheetxml.get_cell(header, col, worksheet=worksheet).value
+        if name == "" or name in seen:
+            name = letter
+        seen.add(name)
+        names.append(name)
+    if header is not None:
+        min_row = max(min_row, header + 1)
+
+    nrows = max(max_row - min_row + 1, 0)
+    ncols = max_col - min_col + 1
+    values: List[List[Optional[str]]] = [[None] * nrows for _ in range(ncols)]
+    kinds: List[set] = [set() for _ in range(ncols)]
+    style_kinds: Dict[int, str] = {}
+
+    for row, raw_cols in sheet.rows.items():
+        if row < min_row or max_row < row:
+            continue
+        for col, raw_cell in raw_cols.items():
+            if col < min_col or max_col < col or raw_cell.value == "":
+                continue
+            if raw_cell.type == "n":
+                s = raw_cell.style_index
+                if s not in style_kinds:
+                    style_kinds[s] = style_kind(sheetxml, s)
+                kind = style_kinds[s]
+            elif raw_cell.type == "b":
+                kind = "bool"
+            else:
+                kind = "text"
+            values[col - min_col][row - min_row] = raw_cell.value
+            kinds[col - min_col].add(kind)
+
+    offset = epoch_offset(sheetxml)
+    return {
+        name: column_to_numpy(np, column, kind, offset)
+        for name, column, kind in zip(names, values, kinds)
+    }
+
+
+def style_kind(sheetxml: "SheetXml", index: int) -> str:
+    cellxfs = sheetxml.style.get_cellXfs(index)
+    if not cellxfs.numFmtId:
+        return "number"
+    numfmt_id = int(cellxfs.numFmtId)
+    numfmt = sheetxml.style.get_numfmt(numfmt_id)
+    return numfmt_kind(numfmt.formatCode, numfmt_id)
+
+
+def column_to_numpy(
+    np, column: List[Optional[str]], kinds: set, offset: int = EXCEL_EPOCH_OFFSET
+):
+    if kinds and kinds <= {"number", "datetime"}:
+        serial = np.array(
+            ["nan" if v is None else v for v in column], dtype=np.str_
+        ).astype(np.float64)
+        missing = np.isnan(serial)
+        if kinds == {"datetime"}:
+            ms = np.round((serial * 86400 - offset) * 1000)
+            dates = np.where(missing, 0, ms).astype(np.int64).astype("M8[ms]")
+            dates[missing] = np.datetime64("NaT")
+            return dates
+        if (
+            not missing.any()
+            and np.all(serial == np.floor(serial))
+            and np.all(np.abs(serial) < 2**53)
+        ):
+            return serial.astype(np.int64)
+        return serial
+    if kinds == {"bool"}:
+        flags = np.array(["0" if v is None else v for v in column], dtype=np.str_)
+        if None not in column:
+            return flags == "1"
+        return np.ma.masked_array(flags == "1", mask=[v is None for v in column])
+    return np.array(column, dtype=object)
+
+
+def get_encoder(name: Optional[str] = "json", *, indent: Optional[int] = None):
+    """Return a function serialising an object to a JSON string.
+
+    orjson writes no space after separators, so its output differs from the json
+    module byte for byte. It is only used when asked for.
+
+    Args:
+        name (str, optional): "json", "orjson" or "auto". "auto" uses orjson when
+            installed and when it supports the indent.
+        indent (int, optional): Indentation of the output. orjson only supports 2.
+
+    Returns:
+        Callable[[Any], str]: The encoder.
+    """
+    if name in ("auto", "orjson"):
+        if indent and indent != 2:
+            if name == "orjson":
+                raise ValueError(f"orjson only supports an indent of 2: {indent}")
+        else:
+            try:
+                import orjson  # type: ignore[import]
+            except ImportError:
+                if name == "orjson":
+                    raise ImportError(
+                        "orjson is required for encoder='orjson'. Install it with `pip install orjson`"
+                    )
+            else:
+                option = orjson.OPT_INDENT_2 if indent else 0
+                return lambda obj: orjson.dumps(obj, option=option).decode("utf-8")
+    elif name not in (None, "json"):
+        raise ValueError(f"Unknown json encoder: {name}")
+    return lambda obj: json.dumps(obj, indent=indent, ensure_ascii=False)
+
+
+def default_fields(cls) -> Dict[str, Any]:
+    if cls not in DEFAULT_FIELDS:
+        DEFAULT_FIELDS[cls] = asdict(cls())
+    return DEFAULT_FIELDS[cls]
+
+
+DEFAULT_FIELDS: Dict[Any, Dict[str, Any]] = {}
+
+
+def prune_defaults(values: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    pruned = {}
+    for k, v in values.items():
+        default = defaults.get(k)
+        if isinstance(v, dict) and isinstance(default, dict):
+            v = prune_defaults(v, default)
+            if not v:
+                continue
+        elif v == default:
+            continue
+        pruned[k] = v
+    return pruned
+
+
+class CellSerializer:
+    """
+    Convert Cell objects into dicts ready to be encoded as JSON
+
+    The style of a cell is converted once per Format object, so cells sharing a
+    style do not pay for the conversion again.
+
+    Attributes:
+        compact (bool): Omit formula, rich text and style fields left at their default value
+    """
+
+    def __init__(self, *, compact: bool = False):
+        self.compact = compact
+        self.__styles: Dict[int, Tuple[Any, Optional[Dict[str, Any]]]] = {}
+
+    def __style(self, style) -> Optional[Dict[str, Any]]:
+        cached = self.__styles.get(id(style))
+        if cached is None or cached[0] is not style:
+            values = asdict(style)
+            if self.compact:
+                values = prune_defaults(values, default_fields(type(style)))
+            cached = (style, values or None)
+            self.__styles[id(style)] = cached
+        return cached[1]
+
+    def __shared(self, shared) -> Optional[Dict[str, Any]]:
+        if not self.compact:
+            return {"rpr": [asdict(r) for r in shared.rpr]}
+        runs = [prune_defaults(asdict(r), default_fields(type(r))) for r in shared.rpr]
+        if all(set(r) <= {"text"} for r in runs):
+            return None
+        return {"rpr": runs}
+
+    def to_dict(self, cell) -> Dict[str, Any]:
+        values: Dict[str, Any] = {
+            "row": cell.row,
+            "col": cell.col,
+            "address": cell.address,
+            "value": cell.value,
+        }
+        if cell.formula or not self.compact:
+            values["formula"] = cell.formula
+        shared = self.__shared(cell.shared)
+        if shared is not None:
+            values["shared"] = shared
+        style = self.__style(cell.style)
+        if style is not None:
+            values["style"] = style
+        return values
+
+
+def iter_sheet_cells(
+    sheetxml: "SheetXml", worksheet: "SheetKey" = 1, *, ref: Optional[str] = None
+) -> Generator[Any, None, None]:
+    """Stream the cells of a range row by row, including the empty ones.
+
+    Args:
+        sheetxml (SheetXml): Parsed workbook.
+        worksheet (int | str): Worksheet number starting from 1, or sheet name.
+        ref (str, optional): Range in A1 format. Defaults to the used range of the
+            sheet: its dimension, or the range of its stored cells when the dimension
+            is missing or wrong.
+
+    Yields:
+        Cell: Cells in row-major order.
+    """
+    if ref is None:
+        ref = sheetxml.get_used_address(worksheet=worksheet)
+    if ref is None:
+        return
+
+    (min_row, min_col), (max_row, max_col) = CellRange.parse(ref).bounds
+    row = min_row
+    for cells in sheetxml.iter_rows(worksheet, min_row=min_row, max_row=max_row):
+        yield from cells[min_col - 1 : max_col]
+        for col in range(max(len(cells) + 1, min_col), max_col + 1):
+            yield sheetxml.empty_cell(row, col)
+        row += 1
+    for row in range(row, max_row + 1):
+        for col in range(min_col, max_col + 1):
+            yield sheetxml.empty_cell(row, col)
+
+
+def dump_json(
+    sheetxml: "SheetXml",
+    fp: Union[str, IO],
+    worksheet: "SheetKey" = 1,
+    *,
+    ref: Optional[str] = None,
+    lines: bool = False,
+    compact: bool = False,
+    encoder: Optional[str] = "json",
+    chunk_size: int = 1000,
+    progress: Optional["Progress"] = None,
+) -> int:
+    """Write the cells of a worksheet as JSON while the sheet is being read.
+
+    Args:
+        sheetxml (SheetXml): Parsed workbook.
+        fp (str | IO): Path or file-like object to write to. Streams of the io module
+            deriving from RawIOBase or BufferedIOBase, and objects whose mode holds
+            "b", are written bytes, any other object str.
+        worksheet (int | str): Worksheet number starting from 1, or sheet name.
+        ref (str, optional): Range in A1 format. Defaults to the used range of the sheet.
+        lines (bool): Write JSON Lines, one cell per line with its worksheet name.
+            Otherwise write {"<sheet name>": [cells...]} like to_json().
+        compact (bool): Omit formula, rich text and style fields left at their default value.
+        encoder (str, optional): "json", "orjson" or "auto", see get_encoder.
+        chunk_size (int): Number of cells buffered between two writes.
+        progress (Callable[[int, int | None], None], optional): Called after every
+            write with the number of cells written and the number of cells of the range.
+
+    Returns:
+        int: Number of cells written.
+    """
+    if isinstance(fp, str):
+        with open(fp, mode="w", encoding="utf-8") as f:
+            return dump_json(
+                sheetxml,
+                f,
+                worksheet,
+                ref=ref,
+                lines=lines,
+                compact=compact,
+                encoder=encoder,
+                chunk_size=chunk_size,
+                progress=progress,
+            )
+
+    binary = is_binary(fp)
+
+    with phase_span(sheetxml.stats, "serialize") as span:
+
+        def write(text: str) -> None:
+            data = text.encode("utf-8") if binary else text
+            fp.write(data)  # type: ignore[union-attr]
+            span.nbytes += len(data)
+
+        return write_json(
+            sheetxml,
+            write,
+            worksheet,
+            ref,
+            lines,
+            compact,
+            encoder,
+            chunk_size,
+            progress,
+        )
+
+
+def is_binary(fp: IO) -> bool:
+    # Text writers need not subclass io.TextIOBase nor have a mode, binary streams
+    # of the io module are told by their class
+    if isinstance(fp, (io.RawIOBase, io.BufferedIOBase)):
+        return True
+    if isinstance(fp, io.TextIOBase):
+        return False
+    return "b" in getattr(fp, "mode", "")
+
+
+def write_json(
+    sheetxml: "SheetXml",
+    write: Callable[[str], None],
+    worksheet: "SheetKey",
+    ref: Optional[str],
+    lines: bool,
+    compact: bool,
+    encoder: Optional[str],
+    chunk_size: int,
+    progress: Optional["Progress"],
+) -> int:
+    """Write the JSON of dump_json() through a write callback."""
+    dumps = get_encoder(encoder)
+    serializer = CellSerializer(compact=compact)
+    ws_name = sheetxml.worksheet(worksheet)
+    separator = "\n" if lines else ",\n"
+    if not lines:
+        write("{" + dumps(ws_name) + ": [\n")
+
+    total = None
+    if progress is not None:
+        total = range_size(sheetxml, worksheet, ref)
+    count = 0
+    chunk: List[str] = []
+    for cell in iter_sheet_cells(sheetxml, worksheet, ref=ref):
+        values = serializer.to_dict(cell)
+        if lines:
+            values = {"worksheet": ws_name, **values}
+        chunk.append(dumps(values))
+        count += 1
+        if len(chunk) >= chunk_size:
+            write(("" if count == len(chunk) else separator) + separator.join(chunk))
+            chunk = []
+            if progress is not None:
+                progress(count, total)
+    if chunk:
+        write(("" if count == len(chunk) else separator) + separator.join(chunk))
+    if not lines:
+        write("\n]}\n")
+    elif count:
+        write("\n")
+    if progress is not None:
+        progress(count, total)
+    return count
+
+
+def range_size(
+    sheetxml: "SheetXml", worksheet: "SheetKey", ref: Optional[str] = None
+) -> Optional[int]:
+    """Number of cells of a range, or of the used range of the sheet by default."""
+    if ref is None:
+        ref = sheetxml.get_used_address(worksheet=worksheet)
+    if ref is None:
+        return None
+    return len(CellRange.parse(ref))
@@ -0,0 +1,149 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from zipfile import ZipFile
+
+from exmlrd import log
+from exmlrd.addressing import CellRange
+from exmlrd.cell import SheetKey, SheetXml
+
+logger = log.get_logger(__name__)
+
+
+class ExtractResult(NamedTuple):
+    """
+    Outcome of extracting a template from one workbook
+
+    Attributes:
+        path (str): Path of the workbook
+        values (dict[str, Any] | None): Extracted values by field name, None on error
+        error (str | None): "ExceptionName: message" when the workbook could not be read
+    """
+
+    path: str
+    values: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class Template:
+    """
+    Compiled set of cells to read from workbooks sharing one layout
+
+    A field is either a single cell ("C3"), extracted as its value, or a range
+    ("B10:F40"), extracted as a list of rows of values. The addresses are
+    compiled once into the target columns of every target row, so each workbook
+    is read in a single streaming pass that stops after the last target row.
+
+    Attributes:
+        fields (dict[str, tuple]): Corners of every field and whether it is a range
+        targets (dict[int, set[int]]): Target columns by row number, sorted by row
+    """
+
+    def __init__(self, fields: Mapping[str, str]):
+        self.fields: Dict[str, Tuple[Tuple[int, int], Tuple[int, int], bool]] = {}
+        targets: Dict[int, Set[int]] = {}
+        for name, ref in fields.items():
+            cells = CellRange.parse(ref)
+            start, end = cells.bounds
+            self.fields[name] = (start, end, ":" in ref)
+            cols = range(cells.min_col, cells.max_col + 1)
+            for row in range(cells.min_row, cells.max_row + 1):
+                targets.setdefault(row, set()).update(cols)
+        self.targets = dict(sorted(targets.items()))
+
+    @property
+    def last_row(self) -> int:
+        return max(self.targets, default=0)
+
+    def extract(self, sheetxml: SheetXml, worksheet: SheetKey = 1) -> Dict[str, Any]:
+        """Read the fields of the template from a worksheet.
+
+        Args:
+            sheetxml (SheetXml): Workbook to read.
+            worksheet (int | str): Worksheet number starting from 1, or sheet name.
+
+        Returns:
+            dict[str, Any]: Cell value, or list of rows of values, by field name.
+        """
+        cells = sheetxml.scan_cells(self.targets, worksheet=worksheet)
+        values: Dict[str, Any] = {}
+        for name, (start, end, is_range) in self.fields.items():
+            (min_row, min_col), (max_row, max_col) = start, end
+            rows: List[List[str]] = []
+            for row in range(min_row, max_row + 1):
+                rows.append(
+                    [
+                        cells[(row, col)].value if (row, col) in cells else ""
+                        for col in range(min_col, max_col + 1)
+                    ]
+                )
+            values[name] = rows if is_range else rows[0][0]
+        return values
+
+
+def extract_file(
+    path: str, template: Template, worksheet: SheetKey = 1
+) -> ExtractResult:
+    """Extract a template from one workbook, reporting failures in the result."""
+    try:
+        with ZipFile(path) as archive:
+            sheetxml = SheetXml(archive, cache_bytes=0)
+            return ExtractResult(path, template.extract(sheetxml, worksheet))
+    except Exception as e:
+        logger.debug(f"[{path}] {type(e).__name__}: {e}")
+        return ExtractResult(path, error=f"{type(e).__name__}: {e}")
+
+
+def extract_many(
+    paths: Iterable[str],
+    template: Union[Template, Mapping[str, str]],
+    *,
+    worksheet: SheetKey = 1,
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+) -> Iterator[ExtractResult]:
+    """Extract the same cells from many workbooks sharing one layout.
+
+    Args:
+        paths (Iterable[str]): Paths of the workbooks.
+        template (Template | Mapping[str, str]): Cell or range by field name,
+            e.g. {"name": "C3", "items": "B10:F40"}.
+        worksheet (int | str): Worksheet number starting from 1, or sheet name.
+        workers (int, optional): Number of processes. Defaults to the number of CPUs,
+            1 extracts in the calling process.
+        chunksize (int): Number of workbooks sent to a process at once.
+
+    Yields:
+        ExtractResult: One result per workbook, in the order of paths.
+
+    Example:
+        >>> for result in extract_many(paths, {"name": "C3"}, workers=4):
+        ...     print(result.path, result.values or result.error)
+    """
+    if not isinstance(template, Template):
+        template = Template(template)
+    task = partial(extract_file, template=template, worksheet=worksheet)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        yield from map(task, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(task, paths, chunksize=chunksize)
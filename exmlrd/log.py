@@ -1,14 +1,10 @@
 import logging
 
+# The library only emits records, handlers and levels are left to the application.
+# Without a configured handler nothing is printed, and disabled records cost a
+# level check.
+logging.getLogger("exmlrd").addHandler(logging.NullHandler())
+
 
 def get_logger(name: str) -> logging.Logger:
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-    handler = logging.StreamHandler()
-    handler.setLevel(logging.DEBUG)
-    formatter = logging.Formatter(
-        "%(asctime)s - [%(name)s](%(levelname)s) - %(message)s"
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-    return logger
+    return logging.getLogger(name)
@@ -0,0 +1,188 @@
+import posixpath
+import xml.etree.ElementTree as ET
+from typing import Dict, List, NamedTuple, Optional, Union
+from zipfile import ZipFile
+
+from exmlrd import log
+from exmlrd.exceptions import NotFoundSheet
+from exmlrd.tags import WorkbookTag
+from exmlrd.tools import del_namespace
+
+logger = log.get_logger(__name__)
+
+RELATIONSHIPS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+DOCUMENT_RELATIONSHIPS_NS = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+)
+OFFICE_DOCUMENT_TYPE = DOCUMENT_RELATIONSHIPS_NS + "/officeDocument"
+
+
+class SheetEntry(NamedTuple):
+    number: int
+    name: str
+    sheet_id: str
+    rid: str
+    path: Optional[str]
+    state: str = "visible"
+
+
+class MemberInfo(NamedTuple):
+    filename: str
+    compress_size: int
+    file_size: int
+    content_type: Optional[str]
+
+
+class Manifest:
+    """
+    Map of the parts of a workbook, read once from its package metadata
+
+    The worksheets are listed in the order of workbook.xml and resolved to their zip
+    member through xl/_rels/workbook.xml.rels, so reordered, renamed or deleted sheets
+    point at the right sheetX.xml. The content type of every member comes from
+    [Content_Types].xml.
+
+    Attributes:
+        workbook_path (str): Zip member of the workbook part
+        sheets (list[SheetEntry]): Worksheets in workbook order
+        date1904 (bool): Date serials count from 1904-01-01 instead of 1899-12-30
+        members (dict[str, MemberInfo]): Every zip member by filename
+    """
+
+    content_types_path = "[Content_Types].xml"
+    package_rels_path = "_rels/.rels"
+    default_workbook_path = "xl/workbook.xml"
+
+    def __init__(self, archive: ZipFile):
+        self.archive = archive
+        content_types = self.__read_content_types()
+        self.members: Dict[str, MemberInfo] = {}
+        for info in archive.infolist():
+            ext = posixpath.splitext(info.filename)[1][1:].lower()
+            content_type = content_types.get(
+                "/" + info.filename, content_types.get(ext)
+            )
+            self.members[info.filename] = MemberInfo(
+                info.filename, info.compress_size, info.file_size, content_type
+            )
+        self.workbook_path = self.__find_workbook()
+        root = self.__parse(self.workbook_path)
+        self.sheets: List[SheetEntry] = self.__read_sheets(root)
+        self.date1904 = self.__read_date1904(root)
+        self.__by_name = {sheet.name: sheet for sheet in self.sheets}
+
+    def __len__(self) -> int:
+        return len(self.sheets)
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self.members
+
+    def __parse(self, filename: str) -> Optional[ET.Element]:
+        if filename not in self.archive.NameToInfo:
+            return None
+        with self.archive.open(filename) as fp:
+            return ET.parse(fp).getroot()
+
+    def __read_content_types(self) -> Dict[str, str]:
+        # Overrides are keyed by part name ("/xl/workbook.xml"), defaults by extension
+        content_types: Dict[str, str] = {}
+        root = self.__parse(self.content_types_path)
+        if root is None:
+            return content_types
+        for elem in root:
+            tag = del_namespace(elem.tag, CONTENT_TYPES_NS)
+            if tag == "Default":
+                content_types[elem.attrib["Extension"].lower()] = elem.attrib[
+                    "ContentType"
+                ]
+            elif tag == "Override":
+                content_types[elem.attrib["PartName"]] = elem.attrib["ContentType"]
+        return content_types
+
+    def __read_rels(self, source: str) -> Dict[str, Dict[str, str]]:
+        base, name = posixpath.split(source)
+        root = self.__parse(posixpath.join(base, "_rels", name + ".rels"))
+        rels: Dict[str, Dict[str, str]] = {}
+        if root is None:
+            return rels
+        for elem in root:
+            if del_namespace(elem.tag, RELATIONSHIPS_NS) == "Relationship":
+                rels[elem.attrib["Id"]] = {
+                    "type": elem.attrib.get("Type", ""),
+                    "target": self.__resolve(base, elem.attrib.get("Target", "")),
+                }
+        return rels
+
+    def __resolve(self, base: str, target: str) -> str:
+        if target.startswith("/"):
+            return target.lstrip("/")
+        return posixpath.normpath(posixpath.join(base, target))
+
+    def __find_workbook(self) -> str:
+        for rel in self.__read_rels(self.package_rels_path).values():
+            if rel["type"] == OFFICE_DOCUMENT_TYPE:
+                return rel["target"]
+        return self.default_workbook_path
+
+    def __read_date1904(self, root: Optional[ET.Element]) -> bool:
+        if root is None:
+            return False
+        for elem in root:
+            if del_namespace(elem.tag) == WorkbookTag.WORKBOOKPR.value:
+                return elem.attrib.get("date1904", "") in ("1", "true")
+        return False
+
+    def __read_sheets(self, root: Optional[ET.Element]) -> List[SheetEntry]:
+        if root is None:
+            return []
+        rels = self.__read_rels(self.workbook_path)
+        sheets: List[SheetEntry] = []
+        sheet_elems = [
+            elem
+            for _ex_sheets in root
+            if del_namespace(_ex_sheets.tag) == WorkbookTag.SHEETS.value
+            for elem in _ex_sheets
+        ]
+        for elem in sheet_elems:
+            if not elem.attrib.get("name"):
+                continue
+            rid = elem.attrib.get("{%s}id" % DOCUMENT_RELATIONSHIPS_NS, "")
+            rel = rels.get(rid)
+            path = rel["target"] if rel is not None else None
+            if path is not None and path not in self.members:
+                logger.debug(f"[{elem.attrib['name']}] {path} is not in the archive")
+                path = None
+            sheets.append(
+                SheetEntry(
+                    len(sheets) + 1,
+                    elem.attrib["name"],
+                    elem.attrib.get("sheetId", ""),
+                    rid,
+                    path,
+                    elem.attrib.get("state", "visible"),
+                )
+            )
+        return sheets
+
+    def sheet(self, key: Union[int, str]) -> SheetEntry:
+        """Return a worksheet by number or name.
+
+        Args:
+            key (int | str): Worksheet number starting from 1, or sheet name.
+
+        Returns:
+            SheetEntry: The worksheet.
+        """
+        if isinstance(key, str):
+            entry = self.__by_name.get(key)
+        else:
+            entry = self.sheets[key - 1] if 0 < key <= len(self.sheets) else None
+        if entry is None:
+            raise NotFoundSheet(
+                "The sheet could not be read. (Either the index is wrong or the sheet does not exist)"
+            )
+        return entry
+
+    def member(self, filename: str) -> Optional[MemberInfo]:
+        return self.members.get(filename)
@@ -0,0 +1,107 @@
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from exmlrd.addressing import CellRange
+
+
+class MergeRange(NamedTuple):
+    min_row: int
+    min_col: int
+    max_row: int
+    max_col: int
+    ref: str
+
+    @classmethod
+    def from_ref(cls, ref: str) -> "MergeRange":
+        cellrange = CellRange.parse(ref)
+        return cls(*cellrange.bounds[0], *cellrange.bounds[1], ref)
+
+    @property
+    def range(self) -> CellRange:
+        return CellRange(self.min_row, self.min_col, self.max_row, self.max_col)
+
+
+class MergeIndex:
+    """
+    Index of the merged ranges of a worksheet answering point and range queries
+
+    The rows are cut into bands at every first row and past-the-last row of a merged
+    range, so the set of ranges crossing a band is constant. Merged ranges never
+    overlap, hence the ranges of a band are disjoint column intervals sorted by
+    their first column, and a lookup is two binary searches. Each range of a band
+    carries its position in ranges, so range queries return them in document order
+    without scanning ranges.
+
+    Attributes:
+        ranges (list[MergeRange]): All merged ranges in document order
+    """
+
+    def __init__(self, ranges: Iterable[MergeRange]):
+        self.ranges = list(ranges)
+        self.__breakpoints: List[int] = []
+        # First columns, and positions in ranges with the ranges, of every band
+        self.__bands: List[Tuple[List[int], List[Tuple[int, MergeRange]]]] = []
+        self.__build()
+
+    def __len__(self) -> int:
+        return len(self.ranges)
+
+    def __build(self) -> None:
+        starts: Dict[int, List[int]] = {}
+        ends: Dict[int, List[int]] = {}
+        for position, mrange in enumerate(self.ranges):
+            starts.setdefault(mrange.min_row, []).append(position)
+            ends.setdefault(mrange.max_row + 1, []).append(position)
+
+        active: Dict[int, MergeRange] = {}
+        for row in sorted(set(starts) | set(ends)):
+            for position in ends.get(row, []):
+                active.pop(position, None)
+            for position in starts.get(row, []):
+                active[position] = self.ranges[position]
+            band = sorted(active.items(), key=lambda item: item[1].min_col)
+            self.__breakpoints.append(row)
+            self.__bands.append(([m.min_col for _, m in band], band))
+
+    def find(self, row: int, col: int) -> Optional[MergeRange]:
+        """Return the merged range containing a cell.
+
+        Args:
+            row (int): Row number starting from 1.
+            col (int): Column number starting from 1.
+
+        Returns:
+            MergeRange | None: The merged range, None when the cell is not merged.
+        """
+        band = bisect_right(self.__breakpoints, row) - 1
+        if band < 0:
+            return None
+        cols, mranges = self.__bands[band]
+        i = bisect_right(cols, col) - 1
+        if i < 0 or mranges[i][1].max_col < col:
+            return None
+        return mranges[i][1]
+
+    def overlapping(
+        self, min_row: int, min_col: int, max_row: int, max_col: int
+    ) -> List[MergeRange]:
+        """Return every merged range intersecting a range of cells.
+
+        Args:
+            min_row (int): First row of the range.
+            min_col (int): First column of the range.
+            max_row (int): Last row of the range.
+            max_col (int): Last column of the range.
+
+        Returns:
+            list[MergeRange]: Intersecting merged ranges in document order.
+        """
+        found: Dict[int, MergeRange] = {}
+        band = max(bisect_right(self.__breakpoints, min_row) - 1, 0)
+        while band < len(self.__bands) and self.__breakpoints[band] <= max_row:
+            cols, mranges = self.__bands[band]
+            for position, mrange in mranges[: bisect_right(cols, max_col)]:
+                if min_col <= mrange.max_col:
+                    found[position] = mrange
+            band += 1
+        return [found[position] for position in sorted(found)]
@@ -0,0 +1,78 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from zipfile import ZipFile
+
+from exmlrd.cell import SheetXml
+from exmlrd.compact import CompactSheet
+from exmlrd.sharedstyle import SharedStyle
+
+# Workbook of the worker process, set up once by init_worker
+WORKER_FILEPATH: Optional[str] = None
+WORKER_PARSER: Optional[str] = None
+# Shared strings shipped by the parent, or parsed by the first task of the worker
+WORKER_SHAREDSTYLE: Optional[SharedStyle] = None
+WORKER_SHIPPED = False
+
+
+def init_worker(filepath: str, sst: Optional[tuple], parser: Optional[str]) -> None:
+    """Set up a worker process.
+
+    A ZipFile cannot be pickled, so every task reopens the archive by path and
+    closes it when done. The shared strings already parsed by the parent are
+    shipped once here instead of being parsed again in every worker.
+    """
+    global WORKER_FILEPATH, WORKER_PARSER, WORKER_SHAREDSTYLE, WORKER_SHIPPED
+    WORKER_FILEPATH = filepath
+    WORKER_PARSER = parser
+    WORKER_SHAREDSTYLE = None if sst is None else SharedStyle.from_table(*sst)
+    WORKER_SHIPPED = sst is not None
+
+
+def parse_sheet(worksheet: int) -> CompactSheet:
+    global WORKER_SHAREDSTYLE
+    if WORKER_FILEPATH is None:
+        raise RuntimeError("The worker has not been initialised")
+    with ZipFile(WORKER_FILEPATH) as archive:
+        sheetxml = SheetXml(archive, cache_bytes=0, parser=WORKER_PARSER)
+        if WORKER_SHAREDSTYLE is not None:
+            sheetxml.sharedstyle = WORKER_SHAREDSTYLE
+        sheet = sheetxml.get_sheet(worksheet)
+        if "sharedstyle" in vars(sheetxml):
+            WORKER_SHAREDSTYLE = sheetxml.sharedstyle
+    # The parent resolves the shared strings from the table it shipped
+    return CompactSheet.from_parsed(sheet, sst_text=not WORKER_SHIPPED)
+
+
+def read_sheets(
+    filepath: str,
+    indices: Iterable[int],
+    *,
+    workers: int,
+    sharedstyle: Optional[SharedStyle] = None,
+    parser: Optional[str] = "auto",
+) -> Dict[int, CompactSheet]:
+    """Parse several worksheets concurrently in a process pool.
+
+    Args:
+        filepath (str): Path of the workbook.
+        indices (Iterable[int]): Worksheet numbers starting from 1.
+        workers (int): Number of processes.
+        sharedstyle (SharedStyle, optional): Shared strings already parsed by the
+            caller. The sheets then carry the index of their shared strings only,
+            resolved through this table.
+        parser (str, optional): XML backend of the workers, see get_parser.
+
+    Returns:
+        dict[int, CompactSheet]: Parsed worksheets keyed by worksheet number.
+    """
+    indices = list(indices)
+    sst = None if sharedstyle is None else sharedstyle.table()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(filepath, sst, parser),
+    ) as executor:
+        sheets: List[CompactSheet] = list(executor.map(parse_sheet, indices))
+    for sheet in sheets:
+        sheet.sharedstyle = sharedstyle
+    return dict(zip(indices, sheets))
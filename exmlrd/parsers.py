@@ -0,0 +1,379 @@
+import xml.etree.ElementTree as ET
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+from xml.parsers import expat
+from xml.sax.saxutils import escape, quoteattr
+
+from exmlrd import log
+from exmlrd.tags import MAIN_NS, qname
+
+logger = log.get_logger(__name__)
+
+# Qualified names compared against element tags, instead of stripping the namespace
+# of every element
+QN_DIMENSION = qname("dimension")
+QN_SHEETDATA = qname("sheetData")
+QN_ROW = qname("row")
+QN_C = qname("c")
+QN_V = qname("v")
+QN_F = qname("f")
+QN_IS = qname("is")
+QN_T = qname("t")
+QN_R = qname("r")
+QN_RPR = qname("rPr")
+QN_MERGECELL = qname("mergeCell")
+QN_SI = qname("si")
+
+# r, t, s attributes of a <c> element, the text of its <v> and <f>, and its inline text
+CellTuple = Tuple[
+    Optional[str], str, Optional[str], Optional[str], Optional[str], Optional[str]
+]
+# r attribute of a <row> element and its cells
+RowTuple = Tuple[Optional[str], List[CellTuple]]
+# Text of an <si> element, and the serialized element when it holds rich-text runs
+SharedItemTuple = Tuple[str, Optional[bytes]]
+
+CHUNK_SIZE = 64 * 1024
+
+
+class SheetInfo:
+    """
+    Worksheet metadata collected while the rows are streamed
+
+    Attributes:
+        dimension (str | None): ref attribute of the dimension tag
+        mergecells (list[str]): ref attribute of the mergeCell tags read so far
+    """
+
+    def __init__(self) -> None:
+        self.dimension: Optional[str] = None
+        self.mergecells: List[str] = []
+
+
+class EtreeParser:
+    """
+    Parser backend on xml.etree.ElementTree.iterparse
+
+    Every <row> and <si> is cleared and detached once it has been read, so memory
+    stays flat regardless of the size of the part.
+    """
+
+    name = "etree"
+
+    def iterparse(
+        self, fp: IO[bytes], tags: Tuple[str, ...], parent_tag: Optional[str]
+    ) -> Iterator[Any]:
+        root = parent = None
+        for event, elem in ET.iterparse(fp, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                    parent = elem if parent_tag is None else None
+                elif elem.tag == parent_tag:
+                    parent = elem
+                continue
+            if elem.tag in tags:
+                yield elem
+                if parent is not None and elem.tag == tags[0]:
+                    elem.clear()
+                    parent.remove(elem)
+
+    def rows(self, fp: IO[bytes], info: SheetInfo) -> Iterator[RowTuple]:
+        tags = (QN_ROW, QN_DIMENSION, QN_MERGECELL)
+        for elem in self.iterparse(fp, tags, QN_SHEETDATA):
+            if elem.tag == QN_ROW:
+                yield elem.get("r"), [self.cell(c) for c in elem if c.tag == QN_C]
+            elif elem.tag == QN_DIMENSION:
+                info.dimension = elem.get("ref")
+            elif elem.get("ref"):
+                info.mergecells.append(elem.attrib["ref"])
+
+    def cell(self, elem: Any) -> CellTuple:
+        v = f = inline = None
+        for child in elem:
+            tag = child.tag
+            if tag == QN_V:
+                v = child.text or ""
+            elif tag == QN_F:
+                f = child.text or ""
+            elif tag == QN_IS:
+                inline = self.inline_text(child)
+        return elem.get("r"), elem.get("t", "n"), elem.get("s"), v, f, inline
+
+    def inline_text(self, elem: Any) -> str:
+        # <t> children and the <t> of <r> runs, phonetic <rPh> runs are skipped
+        text = ""
+        for child in elem:
+            if child.tag == QN_R:
+                child = child.find(QN_T)
+            elif child.tag != QN_T:
+                continue
+            if child is not None and child.text:
+                text += child.text
+        return text
+
+    def shared_items(self, fp: IO[bytes]) -> Iterator[SharedItemTuple]:
+        for elem in self.iterparse(fp, (QN_SI,), None):
+            text: Optional[str] = None
+            plain = True
+            for child in elem:
+                if child.tag == QN_T:
+                    text = child.text or ""
+                elif child.tag == QN_R:
+                    plain = False
+            if plain and text is not None:
+                yield text, None
+            else:
+                yield self.inline_text(elem), ET.tostring(elem)
+
+
+class LxmlParser(EtreeParser):
+    """
+    Parser backend on lxml.etree.iterparse, which filters the tags in C
+    """
+
+    name = "lxml"
+
+    def __init__(self) -> None:
+        from lxml import etree  # type: ignore[import]
+
+        self.etree = etree
+
+    def iterparse(
+        self, fp: IO[bytes], tags: Tuple[str, ...], parent_tag: Optional[str]
+    ) -> Iterator[Any]:
+        for _, elem in self.etree.iterparse(fp, events=("end",), tag=tags):
+            yield elem
+            if elem.tag == tags[0]:
+                elem.clear()
+                # Drop the cleared siblings so that the tree does not grow
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+
+
+class SheetHandler:
+    """
+    pyexpat handlers turning the <row> elements of sheetData into RowTuple
+    """
+
+    def __init__(self, info: SheetInfo, separator: str):
+        self.info = info
+        self.rows: List[RowTuple] = []
+        self.row: Optional[str] = None
+        self.cells: List[CellTuple] = []
+        self.cell: Tuple[Optional[str], str, Optional[str]] = (None, "n", None)
+        self.v: Optional[str] = None
+        self.f: Optional[str] = None
+        self.inline: Optional[List[str]] = None
+        self.text: List[str] = []
+        self.collecting = False
+        self.phonetic = False
+        (
+            self.N_ROW,
+            self.N_C,
+            self.N_V,
+            self.N_F,
+            self.N_IS,
+            self.N_T,
+            self.N_RPH,
+            self.N_DIMENSION,
+            self.N_MERGECELL,
+        ) = (
+            MAIN_NS + separator + tag
+            for tag in (
+                "row",
+                "c",
+                "v",
+                "f",
+                "is",
+                "t",
+                "rPh",
+                "dimension",
+                "mergeCell",
+            )
+        )
+
+    def start(self, name: str, attrs: Dict[str, str]) -> None:
+        if name == self.N_C:
+            self.cell = (attrs.get("r"), attrs.get("t", "n"), attrs.get("s"))
+            self.v = self.f = self.inline = None
+        elif name == self.N_V or name == self.N_F:
+            self.text = []
+            self.collecting = True
+        elif name == self.N_ROW:
+            self.row = attrs.get("r")
+            self.cells = []
+        elif name == self.N_IS:
+            self.inline = []
+        elif name == self.N_T and self.inline is not None and not self.phonetic:
+            self.text = []
+            self.collecting = True
+        elif name == self.N_RPH:
+            self.phonetic = True
+        elif name == self.N_DIMENSION:
+            self.info.dimension = attrs.get("ref")
+        elif name == self.N_MERGECELL and attrs.get("ref"):
+            self.info.mergecells.append(attrs["ref"])
+
+    def end(self, name: str) -> None:
+        if name == self.N_V:
+            self.v = "".join(self.text)
+            self.collecting = False
+        elif name == self.N_C:
+            r, t, s = self.cell
+            inline = None if self.inline is None else "".join(self.inline)
+            self.cells.append((r, t, s, self.v, self.f, inline))
+        elif name == self.N_ROW:
+            self.rows.append((self.row, self.cells))
+        elif name == self.N_F:
+            self.f = "".join(self.text)
+            self.collecting = False
+        elif name == self.N_T and self.collecting:
+            if self.inline is not None:
+                self.inline.append("".join(self.text))
+            self.collecting = False
+        elif name == self.N_RPH:
+            self.phonetic = False
+
+    def characters(self, data: str) -> None:
+        if self.collecting:
+            self.text.append(data)
+
+
+class SharedItemHandler:
+    """
+    pyexpat handlers turning the <si> elements of sharedStrings.xml into SharedItemTuple
+
+    Rich-text entries are serialized again from their runs, in the same shape as
+    the original <si>, so that SharedStyle can build their SiTag on demand.
+    """
+
+    def __init__(self, separator: str):
+        self.separator = separator
+        self.items: List[SharedItemTuple] = []
+        self.plain: List[str] = []
+        self.runs: List[Tuple[List[Tuple[str, Dict[str, str]]], str]] = []
+        self.rpr: Optional[List[Tuple[str, Dict[str, str]]]] = None
+        self.text: List[str] = []
+        self.collecting = False
+        self.phonetic = False
+        self.N_SI, self.N_R, self.N_RPR, self.N_T, self.N_RPH = (
+            MAIN_NS + separator + tag for tag in ("si", "r", "rPr", "t", "rPh")
+        )
+
+    def start(self, name: str, attrs: Dict[str, str]) -> None:
+        if name == self.N_T:
+            if not self.phonetic:
+                self.text = []
+                self.collecting = True
+        elif name == self.N_SI:
+            self.plain = []
+            self.runs = []
+        elif name == self.N_R:
+            self.rpr = []
+        elif name == self.N_RPH:
+            self.phonetic = True
+        elif self.rpr is not None and name != self.N_RPR:
+            self.rpr.append((name.rpartition(self.separator)[2], attrs))
+
+    def end(self, name: str) -> None:
+        if name == self.N_T:
+            if self.collecting:
+                if self.rpr is not None:
+                    self.runs.append((self.rpr, "".join(self.text)))
+                else:
+                    self.plain.append("".join(self.text))
+                self.collecting = False
+        elif name == self.N_R:
+            self.rpr = None
+        elif name == self.N_RPH:
+            self.phonetic = False
+        elif name == self.N_SI:
+            if self.runs:
+                text = "".join(self.plain[:1]) + "".join(t for _, t in self.runs)
+                self.items.append((text, self.serialize()))
+            else:
+                self.items.append(("".join(self.plain[:1]), None))
+
+    def characters(self, data: str) -> None:
+        if self.collecting:
+            self.text.append(data)
+
+    def serialize(self) -> bytes:
+        xml = ['<si xmlns="%s">' % MAIN_NS]
+        for t in self.plain[:1]:
+            xml.append(f"<t>{escape(t)}</t>")
+        for rpr, t in self.runs:
+            xml.append("<r><rPr>")
+            for tag, attrs in rpr:
+                attributes = "".join(f" {k}={quoteattr(v)}" for k, v in attrs.items())
+                xml.append(f"<{tag}{attributes}/>")
+            xml.append(f"</rPr><t>{escape(t)}</t></r>")
+        xml.append("</si>")
+        return "".join(xml).encode("utf-8")
+
+
+class ExpatParser:
+    """
+    Parser backend on pyexpat callbacks, without building any element
+
+    The handlers only track the few elements of sheetData and sst and emit tuples,
+    which avoids creating an Element and its attribute dict for every <c> and <v>.
+    """
+
+    name = "expat"
+    # pyexpat reports namespaced names as "namespace local"
+    separator = " "
+
+    def __parse(self, fp: IO[bytes], handler: Any, pending: List[Any]) -> Iterator[Any]:
+        parser = expat.ParserCreate(namespace_separator=self.separator)
+        parser.buffer_text = True
+        parser.StartElementHandler = handler.start
+        parser.EndElementHandler = handler.end
+        parser.CharacterDataHandler = handler.characters
+        while True:
+            chunk = fp.read(CHUNK_SIZE)
+            parser.Parse(chunk, not chunk)
+            if pending:
+                yield from pending
+                pending.clear()
+            if not chunk:
+                break
+
+    def rows(self, fp: IO[bytes], info: SheetInfo) -> Iterator[RowTuple]:
+        handler = SheetHandler(info, self.separator)
+        return self.__parse(fp, handler, handler.rows)
+
+    def shared_items(self, fp: IO[bytes]) -> Iterator[SharedItemTuple]:
+        handler = SharedItemHandler(self.separator)
+        return self.__parse(fp, handler, handler.items)
+
+
+PARSERS = {"etree": EtreeParser, "lxml": LxmlParser, "expat": ExpatParser}
+
+
+def get_parser(name: Any = "auto"):
+    """Return a parser backend for sheetData and sharedStrings.xml.
+
+    Args:
+        name (str, optional): "etree", "lxml", "expat" or "auto". A backend instance
+            is returned as is.
+
+    Returns:
+        EtreeParser | LxmlParser | ExpatParser: The backend.
+    """
+    if isinstance(name, (EtreeParser, ExpatParser)):
+        return name
+    if name in (None, "auto"):
+        name = "expat"
+    if name not in PARSERS:
+        raise ValueError(
+            f"Unknown parser: {name} (expected one of auto, {', '.join(PARSERS)})"
+        )
+    if name == "lxml":
+        try:
+            return LxmlParser()
+        except ImportError:
+            raise ImportError(
+                "lxml is required for parser='lxml'. Install it with `pip install lxml`"
+            )
+    return PARSERS[name]()
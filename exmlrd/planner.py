@@ -0,0 +1,440 @@
+from typing import Dict, List, NamedTuple, Optional
+
+from exmlrd import log
+from exmlrd.seekindex import CHECKPOINT_NBYTES
+
+logger = log.get_logger(__name__)
+
+# Seconds per inflated byte of worksheet XML, measured with the expat backend on
+# workbooks of 100k to 1M cells. The parse costs include inflation.
+INFLATE_SECONDS_PER_BYTE = 5e-9
+# Rows decoded into tuples, as by iter_rows and the stop-early lookups
+STREAM_SECONDS_PER_BYTE = 85e-9
+# Rows decoded into the cell index of ParsedSheet
+INDEX_SECONDS_PER_BYTE = 200e-9
+# Inflation with a decompression checkpoint every checkpoint_rows rows
+CHECKPOINT_SECONDS_PER_BYTE = 13e-9
+# Row scan of the probe, when the dimension cannot be trusted
+SCAN_SECONDS_PER_BYTE = 20e-9
+# Reading the top of a worksheet up to <sheetData>
+PROBE_SECONDS = 1e-3
+# Building one Cell or RawCell of the result
+CELL_SECONDS = 50e-6
+# Average size of a <c> element, to estimate the cells of a worksheet from its size
+CELL_XML_BYTES = 32
+# Parser buffers and the block of inflated bytes of a streaming read
+STREAM_NBYTES = 1024 * 1024
+# Metadata of the probe
+PROBE_NBYTES = 64 * 1024
+# Linux memory counters, MemAvailable counts the reclaimable page cache as available
+MEMINFO_PATH = "/proc/meminfo"
+
+LOOKUPS = ("get_cell", "get_cells", "get_range")
+SCANS = (
+    "iter_rows",
+    "iter_cell_tuples",
+    "iter_record_batches",
+    "to_arrow",
+    "to_json",
+    "dump_json",
+)
+INDEXED = ("to_numpy", "get_sheet", "get_mergecell", "find_mergecells")
+PROBES = (
+    "probe_sheet",
+    "get_sheetrange_address",
+    "get_sheetrange_coordinate",
+    "get_used_address",
+)
+OPERATIONS = LOOKUPS + SCANS + INDEXED + PROBES
+
+
+class SheetSize(NamedTuple):
+    """
+    Signals the planner reads about one worksheet
+
+    Attributes:
+        file_size (int): Inflated size of the worksheet member
+        compress_size (int): Compressed size of the worksheet member
+        rows (int | None): Last row of a trusted dimension, None when unknown
+        sst_size (int): Inflated size of sharedStrings.xml still to read, 0 when the
+            table is loaded or the workbook has none
+        cached (bool): The parsed worksheet is in the cache
+        cache_bytes (int): Memory budget of the sheet cache
+        cell_nbytes (int): Estimated memory of one cell of a parsed worksheet
+        checkpoint_rows (int | None): Rows between two decompression checkpoints
+        checkpoints_built (bool): The checkpoints of the worksheet exist
+    """
+
+    file_size: int
+    compress_size: int
+    rows: Optional[int] = None
+    sst_size: int = 0
+    cached: bool = False
+    cache_bytes: int = 0
+    cell_nbytes: int = 256
+    checkpoint_rows: Optional[int] = None
+    checkpoints_built: bool = False
+
+    @property
+    def cells(self) -> int:
+        return self.file_size // CELL_XML_BYTES
+
+    def fraction(self, last_row: int) -> float:
+        # Share of sheetData before the end of last_row, the whole member when the
+        # number of rows is unknown
+        if not self.rows:
+            return 1.0
+        return min(last_row / self.rows, 1.0)
+
+
+class Cost(NamedTuple):
+    """
+    Estimated cost of a strategy
+
+    Attributes:
+        seconds (float): Wall time
+        memory (int): Bytes held at the peak, including the shared strings read
+        inflated (int): Inflated bytes of the worksheet member read
+        compressed (int): Compressed bytes of the worksheet member read
+    """
+
+    seconds: float
+    memory: int
+    inflated: int
+    compressed: int = 0
+
+
+class Plan(NamedTuple):
+    """
+    Strategy chosen for one read, see Planner
+
+    Attributes:
+        operation (str): Method of the read, such as "get_cell" or "to_json"
+        worksheet (int): Worksheet number starting from 1
+        strategy (str): "cached", "index", "stop_early", "seek", "stream" or "probe"
+        cost (Cost): Estimated cost of the strategy
+        reason (str): Why the strategy was chosen
+        cells (int): Number of requested cells, 0 for whole-sheet reads
+        budget (int | None): Memory budget the plan was made under
+        alternatives (dict[str, Cost]): Estimated cost of every strategy considered,
+            including the chosen one
+    """
+
+    operation: str
+    worksheet: int
+    strategy: str
+    cost: Cost
+    reason: str
+    cells: int = 0
+    budget: Optional[int] = None
+    alternatives: Dict[str, Cost] = {}
+
+    def format(self) -> str:
+        lines = [
+            f"{self.operation} on sheet {self.worksheet}: {self.strategy} "
+            f"({self.reason})"
+        ]
+        if self.budget is not None:
+            lines.append(f"memory budget {format_bytes(self.budget)}")
+        for strategy, cost in self.alternatives.items():
+            marker = "*" if strategy == self.strategy else " "
+            over = (
+                " over budget"
+                if self.budget is not None and cost.memory > self.budget
+                else ""
+            )
+            lines.append(
+                f"{marker} {strategy:<10} {cost.seconds:9.4f}s "
+                f"{format_bytes(cost.memory):>10} memory "
+                f"{format_bytes(cost.inflated):>10} inflated{over}"
+            )
+        return "\n".join(lines)
+
+
+def format_bytes(nbytes: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(nbytes) < 1024:
+            return f"{nbytes:.0f}{unit}" if unit == "B" else f"{nbytes:.1f}{unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f}GiB"
+
+
+def available_memory() -> Optional[int]:
+    """Memory available to new allocations without swapping, page cache included,
+    None where the platform does not report it."""
+    try:
+        with open(MEMINFO_PATH, "rb") as f:
+            for line in f:
+                if line.startswith(b"MemAvailable:"):
+                    # The value is in kB
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def parse_seconds(size: SheetSize, nbytes: float, seconds_per_byte: float) -> float:
+    # Stored members are not inflated
+    inflate = INFLATE_SECONDS_PER_BYTE if size.compress_size < size.file_size else 0.0
+    return nbytes * (seconds_per_byte + inflate)
+
+
+def compressed(size: SheetSize, nbytes: float) -> int:
+    if not size.file_size:
+        return 0
+    return int(size.compress_size * nbytes / size.file_size)
+
+
+def index_nbytes(size: SheetSize) -> int:
+    # Size the sheet cache accounts for the parsed worksheet
+    return size.cells * size.cell_nbytes
+
+
+def index_cost(size: SheetSize, cells: int) -> Cost:
+    return Cost(
+        parse_seconds(size, size.file_size, INDEX_SECONDS_PER_BYTE)
+        + cells * CELL_SECONDS,
+        index_nbytes(size) + size.sst_size,
+        size.file_size,
+        size.compress_size,
+    )
+
+
+def stop_early_cost(size: SheetSize, last_row: int, cells: int) -> Cost:
+    nbytes = size.file_size * size.fraction(last_row)
+    return Cost(
+        parse_seconds(size, nbytes, STREAM_SECONDS_PER_BYTE) + cells * CELL_SECONDS,
+        # The cells found are held until the end of the pass
+        STREAM_NBYTES + cells * size.cell_nbytes + size.sst_size,
+        int(nbytes),
+        compressed(size, nbytes),
+    )
+
+
+def seek_cost(size: SheetSize, first_row: int, last_row: int, cells: int) -> Cost:
+    # Building the checkpoints inflates the whole member once, then a lookup
+    # inflates from the checkpoint before first_row to last_row
+    every = size.checkpoint_rows or 1
+    rows = size.rows or size.cells
+    nbytes = size.file_size * min((last_row - first_row + every) / max(rows, 1), 1.0)
+    seconds = parse_seconds(size, nbytes, STREAM_SECONDS_PER_BYTE)
+    inflated = nbytes
+    if not size.checkpoints_built:
+        seconds += size.file_size * CHECKPOINT_SECONDS_PER_BYTE
+        inflated += size.file_size
+    checkpoints = (rows // every + 1) * CHECKPOINT_NBYTES
+    return Cost(
+        seconds + cells * CELL_SECONDS,
+        STREAM_NBYTES + checkpoints + cells * size.cell_nbytes + size.sst_size,
+        int(inflated),
+        compressed(size, inflated),
+    )
+
+
+def stream_cost(size: SheetSize) -> Cost:
+    return Cost(
+        parse_seconds(size, size.file_size, STREAM_SECONDS_PER_BYTE),
+        STREAM_NBYTES + size.sst_size,
+        size.file_size,
+        size.compress_size,
+    )
+
+
+def probe_cost(size: SheetSize, scan: bool = False) -> Cost:
+    if size.cached:
+        # The used range is taken from the cached rows
+        return Cost(PROBE_SECONDS, PROBE_NBYTES, 0)
+    if size.rows is not None and not scan:
+        return Cost(PROBE_SECONDS, PROBE_NBYTES, 0)
+    # The rows are scanned for the used range
+    return Cost(
+        PROBE_SECONDS + size.file_size * SCAN_SECONDS_PER_BYTE,
+        PROBE_NBYTES,
+        size.file_size,
+        size.compress_size,
+    )
+
+
+class Planner:
+    """
+    Choose how a read gets the cells of a worksheet from cost estimates
+
+    A lookup either parses the whole worksheet into the cell index of the cache
+    ("index"), or streams sheetData up to the last requested row ("stop_early"),
+    from the nearest decompression checkpoint when checkpoint_rows is set ("seek").
+    Indexing costs about twice a full streaming pass and holds every cell in memory,
+    but makes the next lookups free.
+
+    Lookups never index a worksheet whose index is larger than the sheet cache,
+    which would not keep it. Without a memory budget, lookups index the worksheet
+    unless the caller passes cache=False, the cache is disabled or checkpoint_rows
+    is set. With a budget, lookups stream while indexing does not fit the budget,
+    and otherwise until the estimated time of the streamed lookups of a worksheet
+    adds up to the time of indexing it, so that a single lookup into a large sheet
+    never pays for the index and many lookups never cost more than twice the index.
+
+    Whole-sheet reads always stream, except the numpy export and merged cells that
+    need the index, and the dimension is probed from the top of the member.
+
+    Attributes:
+        memory_budget (int | None): Bytes a read may hold, None to keep the default
+            strategies
+    """
+
+    def __init__(self, memory_budget: Optional[int] = None):
+        if memory_budget is not None and memory_budget < 0:
+            raise ValueError(f"memory_budget must not be negative: {memory_budget}")
+        self.memory_budget = memory_budget
+        # Estimated seconds spent on streamed lookups by worksheet since it was last
+        # indexed
+        self.__spent: Dict[int, float] = {}
+
+    def budget(self, size: SheetSize) -> Optional[int]:
+        """Bytes an index may take: the memory budget, capped by the sheet cache,
+        which does not keep larger sheets, and by the available memory."""
+        if self.memory_budget is None:
+            return None
+        budget = min(self.memory_budget, size.cache_bytes)
+        available = available_memory()
+        if available is not None:
+            budget = min(budget, available)
+        return budget
+
+    def plan_lookup(
+        self,
+        operation: str,
+        worksheet: int,
+        size: SheetSize,
+        rows: List[int],
+        cells: int,
+        *,
+        cache: bool = True,
+    ) -> Plan:
+        """Choose the strategy of a point or range read.
+
+        Args:
+            operation (str): "get_cell", "get_cells" or "get_range".
+            worksheet (int): Worksheet number starting from 1.
+            size (SheetSize): Signals about the worksheet.
+            rows (list[int]): Requested rows.
+            cells (int): Number of requested cells.
+            cache (bool): The caller allows caching the parsed worksheet.
+
+        Returns:
+            Plan: The chosen strategy and the cost of the alternatives.
+        """
+        budget = self.budget(size)
+        if size.cached:
+            cost = Cost(cells * CELL_SECONDS, 0, 0)
+            return Plan(
+                operation,
+                worksheet,
+                "cached",
+                cost,
+                "the parsed sheet is in the cache",
+                cells,
+                budget,
+                {"cached": cost},
+            )
+        first_row, last_row = min(rows, default=1), max(rows, default=1)
+        streamed = "stop_early"
+        alternatives = {"index": index_cost(size, cells)}
+        if size.checkpoint_rows is None:
+            alternatives[streamed] = stop_early_cost(size, last_row, cells)
+        else:
+            streamed = "seek"
+            alternatives[streamed] = seek_cost(size, first_row, last_row, cells)
+
+        def plan(strategy: str, reason: str) -> Plan:
+            return Plan(
+                operation,
+                worksheet,
+                strategy,
+                alternatives[strategy],
+                reason,
+                cells,
+                budget,
+                alternatives,
+            )
+
+        if not cache:
+            return plan(streamed, "cache=False")
+        if not size.cache_bytes:
+            return plan(streamed, "the sheet cache is disabled")
+        if index_nbytes(size) > size.cache_bytes:
+            return plan(
+                streamed,
+                f"the index needs {format_bytes(index_nbytes(size))}, more than "
+                f"the sheet cache of {format_bytes(size.cache_bytes)} keeps",
+            )
+        if budget is None:
+            if size.checkpoint_rows is not None:
+                return plan(streamed, "checkpoint_rows is set")
+            return plan("index", "sheets are indexed on first read without a budget")
+        index, lookup = alternatives["index"], alternatives[streamed]
+        if index.memory > budget:
+            reason = (
+                f"the index needs {format_bytes(index.memory)}, "
+                f"over the budget of {format_bytes(budget)}"
+            )
+            if lookup.memory > budget:
+                logger.debug(f"[{worksheet}] no strategy fits: {reason}")
+                reason += ", streaming holds less"
+            return plan(streamed, reason)
+        spent = self.__spent.get(worksheet, 0.0) + lookup.seconds
+        if spent >= index.seconds:
+            return plan(
+                "index",
+                f"streamed lookups would add up to {spent:.4f}s, "
+                f"indexing takes {index.seconds:.4f}s",
+            )
+        return plan(
+            streamed,
+            f"{lookup.seconds:.4f}s against {index.seconds:.4f}s to index the sheet",
+        )
+
+    def plan_read(self, operation: str, worksheet: int, size: SheetSize) -> Plan:
+        """Report the strategy of a whole-sheet read or of a probe.
+
+        These reads have a single strategy, the plan only estimates its cost.
+        """
+        if operation in PROBES:
+            # The range of the exports is checked against every row
+            scan = operation == "get_used_address"
+            strategy, cost = "probe", probe_cost(size, scan)
+            reason = "only the top of the member is read"
+            if size.rows is None:
+                reason = "no trusted dimension, the rows are scanned"
+            elif scan:
+                reason = "the dimension is checked against the rows"
+        elif operation in INDEXED:
+            strategy = "cached" if size.cached else "index"
+            cost = Cost(0.0, 0, 0) if size.cached else index_cost(size, 0)
+            reason = f"{operation} reads the parsed sheet"
+        elif operation in SCANS:
+            strategy, cost = "stream", stream_cost(size)
+            reason = f"{operation} streams the rows once"
+        else:
+            raise ValueError(
+                f"Unknown operation: {operation} (expected one of {', '.join(OPERATIONS)})"
+            )
+        return Plan(
+            operation,
+            worksheet,
+            strategy,
+            cost,
+            reason,
+            budget=self.budget(size),
+            alternatives={strategy: cost},
+        )
+
+    def record(self, plan: Plan) -> None:
+        """Account for a lookup that ran with the given plan."""
+        if plan.strategy in ("stop_early", "seek"):
+            spent = self.__spent.get(plan.worksheet, 0.0)
+            self.__spent[plan.worksheet] = spent + plan.cost.seconds
+        elif plan.strategy == "index":
+            self.__spent.pop(plan.worksheet, None)
+
+    def clear(self) -> None:
+        self.__spent.clear()
@@ -0,0 +1,344 @@
+import re
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+from xml.parsers import expat
+
+from exmlrd import log
+from exmlrd.addressing import COLUMN_NUMBERS, DIGITS, CellRange
+from exmlrd.seekindex import SHEETDATA_END
+from exmlrd.tags import SheetXmlTag
+
+logger = log.get_logger(__name__)
+
+# Inflated bytes fed to the probe at a time, the elements before sheetData rarely
+# take more than one block
+PROBE_READ_SIZE = 4 * 1024
+# Inflated bytes scanned at a time when the rows are scanned for the used range
+SCAN_READ_SIZE = 64 * 1024
+
+# <row> and <c> start tags, with or without a namespace prefix
+ROW_OR_CELL_TAG = re.compile(rb"<(?:[\w.-]+:)?(row|c)[\s/>]")
+R_ATTRIBUTE = re.compile(rb"""\sr\s*=\s*["']([A-Za-z]*)(\d+)["']""")
+# <c> start tags with the column letters and row digits of their r attribute, both
+# empty for cells without r
+CELL_REF = re.compile(
+    rb"""<(?:[\w.-]+:)?c(?:\s[^>]*?\br=["']([A-Za-z]+)(\d+)|[\s/>])"""
+)
+
+# Bounds of stored cells: min_row, min_col, max_row, max_col
+Bounds = Tuple[int, int, int, int]
+
+
+class SheetProbe(NamedTuple):
+    """
+    Metadata at the top of a worksheet, read without parsing sheetData
+
+    Attributes:
+        dimension (str | None): ref attribute of the dimension tag, as stored
+        used_range (str | None): Range of the stored cells. It is the dimension, unless
+            the dimension is missing, invalid or contradicted by the first rows, in
+            which case the rows are scanned. None when the sheet holds no cell.
+            Without a scan, rows past the first block are not checked
+        scanned (bool): used_range was found by scanning the rows
+        sheet_pr (dict | None): Attributes of sheetPr, and those of its children such
+            as tabColor or outlinePr under the name of the child
+        sheet_views (list[dict] | None): Attributes of every sheetView, with the
+            attributes of its pane under "pane" and of its selections under "selection"
+        cols (list[dict] | None): Attributes of every col
+        format_pr (dict | None): Attributes of sheetFormatPr
+        nbytes (int): Inflated bytes read by the probe, including the row scan
+    """
+
+    dimension: Optional[str] = None
+    used_range: Optional[str] = None
+    scanned: bool = False
+    sheet_pr: Optional[Dict[str, Any]] = None
+    sheet_views: Optional[List[Dict[str, Any]]] = None
+    cols: Optional[List[Dict[str, str]]] = None
+    format_pr: Optional[Dict[str, str]] = None
+    nbytes: int = 0
+
+
+class ProbeHandler:
+    """
+    pyexpat handlers collecting the elements of a worksheet before sheetData
+
+    Once sheetData starts, the handlers only keep the bounds of the cells that are
+    parsed in the same block, to check the dimension against them.
+    """
+
+    def __init__(self, separator: str):
+        self.separator = separator
+        self.depth = 0
+        self.parent = ""
+        self.dimension: Optional[str] = None
+        self.sheet_pr: Dict[str, Any] = {}
+        self.sheet_views: List[Dict[str, Any]] = []
+        self.cols: List[Dict[str, str]] = []
+        self.format_pr: Dict[str, str] = {}
+        self.in_sheetdata = False
+        self.bounds: Optional[Bounds] = None
+        self.row = 0
+        self.col = 0
+
+    def start(self, name: str, attrs: Dict[str, str]) -> None:
+        tag = name.rpartition(self.separator)[2]
+        self.depth += 1
+        if self.in_sheetdata:
+            self.__sheetdata_start(tag, attrs)
+        elif self.depth == 2:
+            self.parent = tag
+            if tag == SheetXmlTag.SHEETPR.value:
+                self.sheet_pr = dict(attrs)
+            elif tag == SheetXmlTag.DIMENSION.value:
+                self.dimension = attrs.get("ref")
+            elif tag == SheetXmlTag.SHEETFORMATPR.value:
+                self.format_pr = dict(attrs)
+            elif tag == SheetXmlTag.SHEETDATA.value:
+                self.in_sheetdata = True
+        elif self.depth == 3:
+            if self.parent == SheetXmlTag.SHEETPR.value:
+                self.sheet_pr[tag] = dict(attrs)
+            elif self.parent == SheetXmlTag.SHEETVIEWS.value and tag == "sheetView":
+                self.sheet_views.append(dict(attrs))
+            elif self.parent == SheetXmlTag.COLS.value and tag == "col":
+                self.cols.append(dict(attrs))
+        elif self.depth == 4 and self.parent == SheetXmlTag.SHEETVIEWS.value:
+            if not self.sheet_views:
+                return
+            view = self.sheet_views[-1]
+            if tag == "pane":
+                view["pane"] = dict(attrs)
+            elif tag == "selection":
+                view.setdefault("selection", []).append(dict(attrs))
+
+    def __sheetdata_start(self, tag: str, attrs: Dict[str, str]) -> None:
+        if tag == "row":
+            r = attrs.get("r")
+            self.row = int(r) if r and r.isdigit() else self.row + 1
+            self.col = 0
+        elif tag == "c":
+            ref = attrs.get("r")
+            col = COLUMN_NUMBERS.get(ref.rstrip(DIGITS)) if ref else None
+            self.col = col or self.col + 1
+            self.bounds = extend(self.bounds, self.row, self.col)
+
+    def end(self, name: str) -> None:
+        self.depth -= 1
+
+
+def extend(bounds: Optional[Bounds], row: int, col: int) -> Bounds:
+    if bounds is None:
+        return row, col, row, col
+    min_row, min_col, max_row, max_col = bounds
+    return min(min_row, row), min(min_col, col), max(max_row, row), max(max_col, col)
+
+
+def bounds_range(bounds: Optional[Bounds]) -> Optional[str]:
+    return None if bounds is None else CellRange(*bounds).ref
+
+
+def is_trusted(dimension: Optional[str], bounds: Optional[Bounds]) -> bool:
+    """Whether a dimension is valid and holds the cells read so far."""
+    if not dimension:
+        return False
+    try:
+        cellrange = CellRange.parse(dimension)
+    except ValueError:
+        return False
+    if bounds is None:
+        return True
+    min_row, min_col, max_row, max_col = bounds
+    return (
+        cellrange.min_row <= min_row
+        and cellrange.min_col <= min_col
+        and (max_row <= cellrange.max_row and max_col <= cellrange.max_col)
+    )
+
+
+def covering_range(
+    dimension: Optional[str], used_range: Optional[str]
+) -> Optional[str]:
+    """Smallest range holding a valid dimension and the range of the stored cells."""
+    if dimension is None or not is_trusted(dimension, None):
+        return used_range
+    cellrange = CellRange.parse(dimension)
+    if used_range is not None:
+        cellrange = cellrange.union(CellRange.parse(used_range))
+    return cellrange.ref
+
+
+def read_head(fp: IO[bytes]) -> Tuple[ProbeHandler, int]:
+    """Parse a worksheet member up to the block holding the <sheetData> start tag.
+
+    Returns:
+        tuple[ProbeHandler, int]: The collected elements and the inflated bytes read.
+    """
+    handler = ProbeHandler(" ")
+    parser = expat.ParserCreate(namespace_separator=" ")
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+    nbytes = 0
+    while not handler.in_sheetdata:
+        chunk = fp.read(PROBE_READ_SIZE)
+        nbytes += len(chunk)
+        parser.Parse(chunk, not chunk)
+        if not chunk:
+            break
+    return handler, nbytes
+
+
+def scan_bounds(fp: IO[bytes]) -> Tuple[Optional[Bounds], int]:
+    """Find the bounds of the stored cells by matching the <row> and <c> tags.
+
+    The tags are matched on the inflated bytes without parsing the XML, and the scan
+    stops at </sheetData>. Cells and rows without an r attribute follow the previous
+    ones.
+
+    Returns:
+        tuple[tuple[int, int, int, int] | None, int]: (min_row, min_col, max_row,
+            max_col) of the stored cells, None without cells, and the bytes read.
+    """
+    bounds: Optional[Bounds] = None
+    tail = b""
+    row = col = 0
+    nbytes = 0
+    while True:
+        chunk = fp.read(SCAN_READ_SIZE)
+        nbytes += len(chunk)
+        tail += chunk
+        # Only mergeCells and the like follow sheetData
+        end_tag = SHEETDATA_END.search(tail)
+        if end_tag is not None:
+            cut = end_tag.start()
+        elif chunk:
+            # Every tag before the last ">" is complete, a split tag may follow it
+            cut = tail.rfind(b">") + 1
+        else:
+            cut = len(tail)
+        segment = tail[:cut]
+        refs = CELL_REF.findall(segment)
+        letters = {ref[0] for ref in refs}
+        if b"" in letters:
+            bounds, row, col = tags_bounds(bounds, segment, row, col)
+        elif refs:
+            # Every cell has its address, the tags need not be walked one by one
+            bounds, row, col = refs_bounds(bounds, refs, letters)
+        if end_tag is not None or not chunk:
+            break
+        tail = tail[cut:]
+    return bounds, nbytes
+
+
+def refs_bounds(
+    bounds: Optional[Bounds], refs: List[Tuple[bytes, bytes]], letters: Set[bytes]
+) -> Tuple[Bounds, int, int]:
+    """Extend bounds with cell addresses split into letters and digits.
+
+    Rows are in ascending order, as in any worksheet Excel opens, so the rows of the
+    first and the last address are the bounds.
+
+    Returns:
+        tuple[tuple[int, int, int, int], int, int]: The bounds, and the row and
+            column of the last address.
+    """
+    cols = [column_number(col) for col in letters]
+    first_row, last_row = int(refs[0][1]), int(refs[-1][1])
+    bounds = extend(bounds, min(first_row, last_row), min(cols))
+    bounds = extend(bounds, max(first_row, last_row), max(cols))
+    return bounds, last_row, column_number(refs[-1][0])
+
+
+def column_number(letters: bytes) -> int:
+    return COLUMN_NUMBERS.get(letters.upper().decode(), 0)
+
+
+def tags_bounds(
+    bounds: Optional[Bounds], segment: bytes, row: int, col: int
+) -> Tuple[Optional[Bounds], int, int]:
+    """Extend bounds with the cells of complete tags, numbering them by position
+    when they have no r attribute.
+
+    Returns:
+        tuple[tuple[int, int, int, int] | None, int, int]: The bounds, and the row and
+            column of the last cell.
+    """
+    for match in ROW_OR_CELL_TAG.finditer(segment):
+        start = match.start()
+        end = segment.find(b">", start)
+        r = R_ATTRIBUTE.search(segment, start, end)
+        if match.group(1) == b"row":
+            row = int(r.group(2)) if r else row + 1
+            col = 0
+        else:
+            col = (column_number(r.group(1)) if r else 0) or col + 1
+            bounds = extend(bounds, row, col)
+    return bounds, row, col
+
+
+def rows_bounds(rows: Mapping[int, Mapping[int, Any]]) -> Optional[Bounds]:
+    """Bounds of the cells of an already parsed worksheet."""
+    bounds: Optional[Bounds] = None
+    for row, cols in rows.items():
+        if cols:
+            bounds = extend(bounds, row, min(cols))
+            bounds = extend(bounds, row, max(cols))
+    return bounds
+
+
+def probe_sheet(
+    open_member: Callable[[], IO[bytes]],
+    *,
+    scan: bool = False,
+    rows: Optional[Mapping[int, Mapping[int, Any]]] = None,
+) -> SheetProbe:
+    """Read the metadata of a worksheet from the first bytes of its member.
+
+    Args:
+        open_member (Callable[[], IO[bytes]]): Opens the worksheet member.
+        scan (bool): Scan the rows for the used range even when the dimension looks
+            right, e.g. for files written by tools that do not maintain it.
+        rows (Mapping[int, Mapping[int, Any]], optional): Cells by row and column of
+            the parsed worksheet, when it is cached. The used range is then taken from
+            them instead of scanning the member.
+
+    Returns:
+        SheetProbe: Metadata of the worksheet.
+    """
+    with open_member() as fp:
+        handler, nbytes = read_head(fp)
+    dimension = handler.dimension
+    if not scan and is_trusted(dimension, handler.bounds):
+        used_range = CellRange.parse(dimension).ref if dimension else None
+        scanned = False
+    else:
+        if dimension:
+            logger.debug(f"dimension {dimension} is not trusted, scanning the rows")
+        if rows is not None:
+            bounds = rows_bounds(rows)
+        else:
+            with open_member() as fp:
+                bounds, scanned_bytes = scan_bounds(fp)
+            nbytes += scanned_bytes
+        used_range = bounds_range(bounds)
+        scanned = True
+    return SheetProbe(
+        dimension=dimension,
+        used_range=used_range,
+        scanned=scanned,
+        sheet_pr=handler.sheet_pr,
+        sheet_views=handler.sheet_views,
+        cols=handler.cols,
+        format_pr=handler.format_pr,
+        nbytes=nbytes,
+    )
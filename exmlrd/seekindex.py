@@ -0,0 +1,259 @@
+import re
+import zlib
+from bisect import bisect_right
+from typing import IO, Any, List, NamedTuple, Optional
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+from exmlrd import log
+
+logger = log.get_logger(__name__)
+
+# Compressed bytes fed to the decompressor at a time
+READ_SIZE = 64 * 1024
+# Smallest block, read when a checkpoint is due so that it lands close to its row
+CHECKPOINT_READ_SIZE = 4 * 1024
+# Approximate size of a checkpoint: the 32 KiB inflate window and the zlib state
+CHECKPOINT_NBYTES = 40 * 1024
+
+# Start tags matched on the inflated bytes, with or without a namespace prefix
+SHEETDATA_TAG = re.compile(rb"<(?:[\w.-]+:)?sheetData[\s/>]")
+SHEETDATA_END = re.compile(rb"</(?:[\w.-]+:)?sheetData\s*>")
+ROW_TAG = re.compile(rb"<(?:[\w.-]+:)?row[\s/>]")
+ROW_NUMBER = re.compile(rb"""\sr\s*=\s*["'](\d+)["']""")
+# Longest partial tag kept between two inflated blocks
+TAIL_BYTES = 64
+
+
+class Checkpoint(NamedTuple):
+    """
+    Point of a worksheet member where inflation can resume
+
+    Attributes:
+        row (int): Row number of the <row> tag the checkpoint leads to
+        row_offset (int): Offset of that <row> tag in the inflated member
+        in_offset (int): Offset in the compressed member of the block to resume from
+        out_offset (int): Offset in the inflated member where that block starts
+        state (zlib.Decompress | None): Copy of the decompressor before that block,
+            None for stored members
+    """
+
+    row: int
+    row_offset: int
+    in_offset: int
+    out_offset: int
+    state: Any
+
+
+def open_raw(archive: ZipFile, info: ZipInfo) -> IO[bytes]:
+    """Open the compressed bytes of a zip member, seekable without inflating."""
+    raw = ZipInfo(info.filename, info.date_time)
+    raw.header_offset = info.header_offset
+    raw.compress_type = ZIP_STORED
+    raw.compress_size = raw.file_size = info.compress_size
+    raw.flag_bits = info.flag_bits
+    # The CRC covers the inflated bytes, it cannot be checked on the raw ones
+    raw.CRC = None  # type: ignore[assignment]
+    return archive.open(raw)
+
+
+class SeekIndex:
+    """
+    Decompression checkpoints of a worksheet member for random access to its rows
+
+    The index is built in one streaming pass: every `every` rows of sheetData it keeps
+    a copy of the zlib decompressor next to the compressed offset it was at. Reading a
+    far-down row then inflates from the nearest checkpoint instead of the start of the
+    member, and the parser is fed the bytes up to <sheetData> followed by the rows from
+    the checkpoint on, so any parser backend reads them as a regular worksheet.
+
+    Attributes:
+        archive (ZipFile): Excel archive information
+        info (ZipInfo): The worksheet member
+        every (int): Rows between two checkpoints
+        prefix (bytes): Inflated bytes up to the end of the <sheetData> start tag
+        checkpoints (list[Checkpoint]): Checkpoints ordered by row
+    """
+
+    def __init__(
+        self,
+        archive: ZipFile,
+        info: ZipInfo,
+        every: int,
+        prefix: bytes,
+        checkpoints: List[Checkpoint],
+    ):
+        self.archive = archive
+        self.info = info
+        self.every = every
+        self.prefix = prefix
+        self.checkpoints = checkpoints
+        self.__rows = [checkpoint.row for checkpoint in checkpoints]
+
+    def __len__(self) -> int:
+        return len(self.checkpoints)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.prefix) + len(self.checkpoints) * CHECKPOINT_NBYTES
+
+    @classmethod
+    def build(cls, archive: ZipFile, name: str, every: int) -> "SeekIndex":
+        """Inflate a worksheet member once and record a checkpoint every `every` rows.
+
+        Args:
+            archive (ZipFile): Excel archive information.
+            name (str): Path of the worksheet member.
+            every (int): Rows between two checkpoints.
+
+        Returns:
+            SeekIndex: The index of the member.
+        """
+        if every < 1:
+            raise ValueError(f"Rows between checkpoints must be positive: {every}")
+        info = archive.getinfo(name)
+        if info.compress_type not in (ZIP_STORED, ZIP_DEFLATED):
+            raise ValueError(
+                f"{name}: checkpoints need a stored or deflated member "
+                f"(compression method {info.compress_type})"
+            )
+        decompressor = None
+        if info.compress_type == ZIP_DEFLATED:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        checkpoints: List[Checkpoint] = []
+        prefix: Optional[bytes] = None
+        head = b""
+        # Unscanned bytes carried over from the previous block and their offset
+        tail = b""
+        tail_offset = 0
+        in_offset = out_offset = 0
+        row = 0
+        # Rows seen in total and since the last checkpoint
+        nrows = since = 0
+        with open_raw(archive, info) as fp:
+            while True:
+                pending = None
+                size = READ_SIZE
+                if prefix is not None and since >= every:
+                    state = None if decompressor is None else decompressor.copy()
+                    pending = (in_offset, out_offset, state)
+                    size = CHECKPOINT_READ_SIZE
+                elif nrows:
+                    # Stop short of the next checkpoint, from the compressed size of
+                    # the rows read so far
+                    size = (every - since) * in_offset // nrows
+                    size = min(max(size, CHECKPOINT_READ_SIZE), READ_SIZE)
+                chunk = fp.read(size)
+                if not chunk:
+                    break
+                data = chunk if decompressor is None else decompressor.decompress(chunk)
+                block_offset = out_offset
+                in_offset += len(chunk)
+                out_offset += len(data)
+                if prefix is None:
+                    head += data
+                    match = SHEETDATA_TAG.search(head)
+                    end = -1 if match is None else head.find(b">", match.start())
+                    if end < 0:
+                        continue
+                    prefix = head[: end + 1]
+                    if prefix.endswith(b"/>"):
+                        # <sheetData/> holds no rows
+                        break
+                    tail, tail_offset, head = head[end + 1 :], end + 1, b""
+                else:
+                    tail += data
+                scan = 0
+                for match in ROW_TAG.finditer(tail):
+                    start = match.start()
+                    end = tail.find(b">", start)
+                    if end < 0:
+                        break
+                    number = ROW_NUMBER.search(tail, start, end)
+                    row = int(number.group(1)) if number else row + 1
+                    offset = tail_offset + start
+                    if pending is not None and offset >= block_offset:
+                        checkpoints.append(Checkpoint(row, offset, *pending))
+                        pending = None
+                        since = 0
+                    since += 1
+                    nrows += 1
+                    scan = end + 1
+                if SHEETDATA_END.search(tail, scan):
+                    # Only mergeCells and the like follow sheetData
+                    break
+                # Keep the bytes that may hold a split tag, but never a row already seen
+                keep = max(scan, len(tail) - TAIL_BYTES)
+                unfinished = ROW_TAG.search(tail, scan)
+                if unfinished is not None:
+                    keep = min(keep, unfinished.start())
+                tail_offset += keep
+                tail = tail[keep:]
+        logger.debug(f"[{name}] {len(checkpoints)} checkpoints over {row} rows")
+        return cls(archive, info, every, prefix or b"", checkpoints)
+
+    def find(self, row: int) -> Optional[Checkpoint]:
+        """Return the last checkpoint at or before a row, None to read from the start."""
+        i = bisect_right(self.__rows, row)
+        return self.checkpoints[i - 1] if i else None
+
+    def open(self, checkpoint: Checkpoint) -> "CheckpointReader":
+        """Open the worksheet as seen from a checkpoint, see CheckpointReader."""
+        return CheckpointReader(self, checkpoint)
+
+
+class CheckpointReader:
+    """
+    Readable worksheet member resumed from a checkpoint
+
+    It reads as the prefix up to <sheetData> followed by the inflated member from the
+    <row> of the checkpoint on.
+    """
+
+    def __init__(self, index: SeekIndex, checkpoint: Checkpoint):
+        self.fp = open_raw(index.archive, index.info)
+        self.fp.seek(checkpoint.in_offset)
+        self.decompressor = None
+        if checkpoint.state is not None:
+            # Work on a copy so that the checkpoint can be resumed again
+            self.decompressor = checkpoint.state.copy()
+        self.buffer = bytearray(index.prefix)
+        self.skip = checkpoint.row_offset - checkpoint.out_offset
+        self.eof = False
+
+    def __inflate(self) -> bytes:
+        chunk = self.fp.read(READ_SIZE)
+        if self.decompressor is None:
+            data = chunk
+        elif chunk:
+            data = self.decompressor.decompress(chunk)
+        else:
+            data = self.decompressor.flush()
+        if not chunk:
+            self.eof = True
+        if self.skip:
+            skipped = min(self.skip, len(data))
+            data = data[skipped:]
+            self.skip -= skipped
+        return data
+
+    def read(self, size: int = -1) -> bytes:
+        while not self.eof and (size < 0 or len(self.buffer) < size):
+            self.buffer += self.__inflate()
+        if size < 0 or size > len(self.buffer):
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    @property
+    def closed(self) -> bool:
+        return self.fp.closed
+
+    def close(self) -> None:
+        self.fp.close()
+
+    def __enter__(self) -> "CheckpointReader":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
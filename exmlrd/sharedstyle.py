@@ -1,11 +1,14 @@
 import xml.etree.ElementTree as ET
-from typing import Any, List, Optional
+from array import array
+from typing import IO, Any, Dict, List, Optional, Sequence, Tuple
 from xml.etree.ElementTree import Element
 from zipfile import ZipFile
 
 from pydantic import Field, dataclasses
 
 from exmlrd import log
+from exmlrd.parsers import get_parser
+from exmlrd.stats import Stats, open_member
 from exmlrd.tools import del_namespace, set_classattr
 
 logger = log.get_logger(__name__)
@@ -34,52 +37,147 @@ class SiTag:
         return "".join(text)
 
 
+class SharedItems(Sequence):
+    """
+    Read-only sequence of SiTag built on access from the compact SharedStyle table
+    """
+
+    def __init__(self, sharedstyle: "SharedStyle"):
+        self.sharedstyle = sharedstyle
+
+    def __len__(self) -> int:
+        return len(self.sharedstyle)
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("shared item index out of range")
+        return self.sharedstyle.build_shareitem(index)
+
+
 class SharedStyle:
+    """
+    Class to retrieve shared strings
+
+    The texts of sharedStrings.xml are stored compactly in one UTF-8 buffer with an
+    offsets array, so a text lookup is a single slice. SiTag and RichText objects are
+    only built when an entry is requested through get_shareitem.
+
+    Attributes:
+        buffer (bytes): UTF-8 text of all the <si> entries concatenated
+        offsets (array): Start of each entry in buffer, followed by the end of the last one
+        rich (dict[int, bytes]): Serialized <si> of the entries with rich-text runs
+        si (SharedItems): SiTag of each entry, built on access
+        complete (bool): The whole of sharedStrings.xml was read, False when the table
+            was cut at `limit` entries
+    """
 
     sharedstyle_xml = "xl/sharedStrings.xml"
 
-    def __init__(self, archive: ZipFile):
+    def __init__(
+        self,
+        archive: ZipFile,
+        *,
+        parser: Any = "auto",
+        stats: Optional[Stats] = None,
+        limit: Optional[int] = None,
+    ):
         self.archive = archive
+        self.parser = get_parser(parser)
+        self.offsets = array("q", [0])
+        self.rich: Dict[int, bytes] = {}
+        self.complete = True
 
         try:
-            self.root_tree = ET.parse(self.archive.open(self.sharedstyle_xml)).getroot()
+            fp = open_member(self.archive, self.sharedstyle_xml, stats)
         except KeyError:
-            self.root_tree = None
-        self.si = self.__get_shareitem()
+            self.buffer = b""
+        else:
+            with fp:
+                self.buffer = self.__read_shareitem(fp, limit)
+        self.__view = memoryview(self.buffer)
+        self.si = SharedItems(self)
+
+    @classmethod
+    def from_table(
+        cls, buffer: bytes, offsets: array, rich: Dict[int, bytes]
+    ) -> "SharedStyle":
+        """Rebuild a SharedStyle from the compact table of another one.
+
+        Used to ship the shared strings to other processes without reparsing them.
+        """
+        sharedstyle = cls.__new__(cls)
+        sharedstyle.buffer = buffer
+        sharedstyle.offsets = offsets
+        sharedstyle.rich = rich
+        sharedstyle.complete = True
+        sharedstyle.__view = memoryview(buffer)
+        sharedstyle.si = SharedItems(sharedstyle)
+        return sharedstyle
+
+    def table(self) -> Tuple[bytes, array, Dict[int, bytes]]:
+        return self.buffer, self.offsets, self.rich
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __read_shareitem(self, fp: IO[bytes], limit: Optional[int]) -> bytes:
+        # With a limit, the rest of the member is neither inflated nor parsed
+        buffer = bytearray()
+        offsets_append = self.offsets.append
+        for text, serialized in self.parser.shared_items(fp):
+            if limit is not None and len(self.offsets) > limit:
+                self.complete = False
+                break
+            if serialized is not None:
+                self.rich[len(self.offsets) - 1] = serialized
+            buffer += text.encode("utf-8")
+            offsets_append(len(buffer))
+        return bytes(buffer)
+
+    def __build_sitag(self, elem: Element) -> SiTag:
+        si = SiTag()
+        for _e_parents in elem:
+            attribute = {}
+            if del_namespace(_e_parents.tag) == "r":
+                for _e_child in _e_parents:
+                    tag = del_namespace(_e_child.tag)
+                    if tag == "t":
+                        attribute["text"] = (
+                            _e_child.text if isinstance(_e_child.text, str) else ""
+                        )
+                    elif tag == "rPr":
+                        for _e in _e_child:
+                            _tag = del_namespace(_e.tag)
+                            if _e.attrib.get("val"):
+                                attribute[_tag] = _e.attrib["val"]
+                            if _e.attrib.get("theme"):
+                                attribute[_tag] = _e.attrib["theme"]
+                __rich = RichText(**attribute)
+                si.rpr.append(__rich)
+            elif del_namespace(_e_parents.tag) == "t":
+                __text = _e_parents.text if isinstance(_e_parents.text, str) else ""
+                __rich = RichText(text=__text)
+                si.rpr.append(__rich)
+        return si
 
-    def __get_shareitem(self) -> list[Optional[SiTag]]:
-        if self.root_tree is None:
-            si = SiTag()
-            return []
-        shareditems: list[Any] = []
-        shared_appned = shareditems.append
-        for _e_root in self.root_tree:
-            si = SiTag()
-            __text: str = ""
-            for _e_parents in _e_root:
-                attribute = {}
-                if del_namespace(_e_parents.tag) == "r":
-                    for _e_child in _e_parents:
-                        tag = del_namespace(_e_child.tag)
-                        if tag == "t":
-                            attribute["text"] = (
-                                _e_child.text if isinstance(_e_child.text, str) else ""
-                            )
-                        elif tag == "rPr":
-                            for _e in _e_child:
-                                _tag = del_namespace(_e.tag)
-                                if _e.attrib.get("val"):
-                                    attribute[_tag] = _e.attrib["val"]
-                                if _e.attrib.get("theme"):
-                                    attribute[_tag] = _e.attrib["theme"]
-                        __rich = RichText(**attribute)
-                    si.rpr.append(__rich)
-                elif del_namespace(_e_parents.tag) == "t":
-                    __text = _e_parents.text if isinstance(_e_parents.text, str) else ""
-                    __rich = RichText(text=__text)
-                    si.rpr.append(__rich)
-            shared_appned(si)
-        return shareditems
+    def build_shareitem(self, index: int) -> SiTag:
+        serialized = self.rich.get(index)
+        if serialized is not None:
+            return self.__build_sitag(ET.fromstring(serialized))
+        return SiTag(rpr=[RichText(text=self.get_text(index))])
+
+    def get_text(self, index: int) -> str:
+        try:
+            start = self.offsets[index]
+            end = self.offsets[index + 1]
+        except IndexError as e:
+            logger.debug(e)
+            return ""
+        return str(self.__view[start:end], "utf-8")
 
     def get_shareitem(self, index: int) -> SiTag:
         try:
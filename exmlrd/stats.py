@@ -0,0 +1,180 @@
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import (
+    IO,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+)
+from zipfile import ZipFile
+
+# Phases timed by Stats, each one exclusive of the phases nested in it:
+#   inflate   reading and decompressing zip members
+#   parse     parsing sheetData of a worksheet
+#   sst       building the shared strings table
+#   styles    parsing styles.xml and resolving the format of the cells
+#   cells     creating Cell objects
+#   serialize encoding cells to JSON
+PHASES = ("inflate", "parse", "sst", "styles", "cells", "serialize")
+COUNTERS = (
+    "sheet_cache_hits",
+    "sheet_cache_misses",
+    "disk_cache_hits",
+    "disk_cache_misses",
+)
+
+# hook(phase, seconds, nbytes) is called for every recorded span
+Hook = Callable[[str, float, int], None]
+# progress(done, total) reports rows or cells done, total is None when unknown
+Progress = Callable[[int, Optional[int]], None]
+
+
+class PhaseStats:
+    """
+    Accumulated cost of one phase
+
+    Attributes:
+        seconds (float): Time spent in the phase, excluding nested phases
+        nbytes (int): Bytes processed, uncompressed XML or written JSON
+        calls (int): Number of recorded spans
+    """
+
+    __slots__ = ("seconds", "nbytes", "calls")
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.nbytes = 0
+        self.calls = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"seconds": self.seconds, "bytes": self.nbytes, "calls": self.calls}
+
+
+class Span:
+    """Open span of a phase, the bytes it processed can be set before it ends."""
+
+    __slots__ = ("nbytes",)
+
+    def __init__(self) -> None:
+        self.nbytes = 0
+
+
+class Stats:
+    """
+    Per-phase instrumentation of a workbook
+
+    Instrumentation is off unless a Stats is given to SheetXml, so the read paths
+    only pay an `is None` check. Nested spans are exclusive: the time of a phase
+    does not include the phases measured inside it, e.g. the zip inflation done
+    while a worksheet is parsed is counted under "inflate" only.
+
+    Attributes:
+        phases (dict[str, PhaseStats]): Cost of every phase of PHASES
+        counters (dict[str, int]): Cache hits and misses
+        hooks (list[Callable]): Called with (phase, seconds, nbytes) for every span
+    """
+
+    def __init__(self, hooks: Iterable[Hook] = ()):
+        self.hooks: List[Hook] = list(hooks)
+        self.phases: Dict[str, PhaseStats] = {}
+        self.counters: Dict[str, int] = {}
+        # Time of the nested spans of every open span
+        self.__stack: List[float] = []
+        self.reset()
+
+    def reset(self) -> None:
+        self.phases = {phase: PhaseStats() for phase in PHASES}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def __record(self, phase: str, seconds: float, nbytes: int, calls: int) -> None:
+        stats = self.phases[phase]
+        stats.seconds += seconds
+        stats.nbytes += nbytes
+        stats.calls += calls
+        for hook in self.hooks:
+            hook(phase, seconds, nbytes)
+
+    def add(self, phase: str, seconds: float, nbytes: int = 0, calls: int = 1) -> None:
+        """Record time measured by the caller, inside the current span if any."""
+        if self.__stack:
+            self.__stack[-1] += seconds
+        self.__record(phase, seconds, nbytes, calls)
+
+    def count(self, counter: str, n: int = 1) -> None:
+        self.counters[counter] += n
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[Span]:
+        """Time a block of code as one span of a phase."""
+        span = Span()
+        self.__stack.append(0.0)
+        start = perf_counter()
+        try:
+            yield span
+        finally:
+            elapsed = perf_counter() - start
+            nested = self.__stack.pop()
+            if self.__stack:
+                self.__stack[-1] += elapsed
+            self.__record(phase, elapsed - nested, span.nbytes, 1)
+
+    def open(self, archive: ZipFile, name: str) -> "InflateReader":
+        """Open a zip member, timing its decompression under "inflate"."""
+        return InflateReader(archive.open(name), self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "phases": {phase: s.as_dict() for phase, s in self.phases.items()},
+            "counters": dict(self.counters),
+        }
+
+
+class InflateReader:
+    """
+    Readable zip member recording the time and bytes of every read
+
+    The reads are added to the enclosing span once the member is closed.
+    """
+
+    def __init__(self, fp: IO[bytes], stats: Stats):
+        self.fp = fp
+        self.stats = stats
+        self.seconds = 0.0
+        self.nbytes = 0
+
+    def read(self, size: int = -1) -> bytes:
+        start = perf_counter()
+        data = self.fp.read(size)
+        self.seconds += perf_counter() - start
+        self.nbytes += len(data)
+        return data
+
+    def close(self) -> None:
+        if not self.fp.closed:
+            self.fp.close()
+            self.stats.add("inflate", self.seconds, self.nbytes)
+
+    def __enter__(self) -> "InflateReader":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def open_member(archive: ZipFile, name: str, stats: Optional[Stats]) -> IO[bytes]:
+    """Open a zip member, through an InflateReader when instrumentation is on."""
+    if stats is None:
+        return archive.open(name)
+    return stats.open(archive, name)  # type: ignore[return-value]
+
+
+def phase_span(stats: Optional[Stats], phase: str) -> ContextManager[Span]:
+    """Span of a phase, or a no-op when instrumentation is off."""
+    if stats is None:
+        return nullcontext(Span())
+    return stats.span(phase)
@@ -1,19 +1,33 @@
 import re
 import xml.etree.ElementTree as ET
-from typing import Dict, List, Optional, Tuple
+from dataclasses import asdict, fields
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
 from xml.etree.ElementTree import Element
 from zipfile import ZipFile
 
 from pydantic import Field, dataclasses
 
 from exmlrd import log
+from exmlrd.stats import Stats, open_member
 from exmlrd.tags import StylesTag
-from exmlrd.tools import del_namespace, set_classattr
+from exmlrd.tools import del_namespace
 
 logger = log.get_logger(__name__)
 
 
-@dataclasses.dataclass
+@lru_cache(maxsize=None)
+def _field_names(cls: type) -> FrozenSet[str]:
+    return frozenset(field.name for field in fields(cls))
+
+
+def _known_fields(cls: type, values: Mapping[str, Any]) -> Dict[str, Any]:
+    """Keep the values named after a field of a style dataclass."""
+    names = _field_names(cls)
+    return {k: v for k, v in values.items() if k in names}
+
+
+@dataclasses.dataclass(frozen=True)
 class Font:
     sz: str = ""
     name: str = ""
@@ -32,26 +46,26 @@ class Font:
     vertAlign: str = ""
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class FgColor:
     theme: Optional[str] = ""
     rgb: Optional[str] = ""
     tint: Optional[str] = ""
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class BgColor:
     indexed: str = ""
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class Fills:
     patternFill: str = ""
     fgColor: Optional[FgColor] = None
     bgColor: Optional[BgColor] = None
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class Border:
     left: bool = False
     right: bool = False
@@ -60,7 +74,7 @@ class Border:
     diagonal: bool = False
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class NumFmt:
     id: str = ""
     formatCode: str = ""
@@ -133,7 +147,7 @@ class XFS:
     applyProtection: str = ""
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class Format:
     numFmt: NumFmt = Field(default_factory=NumFmt)
     font: Font = Field(default_factory=Font)
@@ -148,8 +162,9 @@ class Styels:
     Get cell formatting (font, font size, fill, border, etc.) from sytle.xml
 
     Attributes:
-        root_tree (Element | Any): The root element in the xml structure of sytle.xml
-        cellxfs (list[XFS]): Another class attribute with a description.
+        root_tree (Element | None): The root element in the xml structure of sytle.xml,
+            None when the styles were restored from the disk cache
+        cellxfs (list[XFS]): All xf in cellXfs tag, identical xf share one XFS object
         fontid (list[Font]): All element information in font tag in sytle.xml
         fillid (list[Fills]): All element information in fill tag in sytle.xml
         borders (list[Border]): All element information in borders tag in sytle.xml
@@ -158,13 +173,46 @@ class Styels:
 
     styles_xml = "xl/styles.xml"
 
-    def __init__(self, archive: ZipFile):
-        self.root_tree = ET.parse(archive.open(self.styles_xml)).getroot()
+    def __init__(self, archive: ZipFile, *, stats: Optional[Stats] = None):
+        with open_member(archive, self.styles_xml, stats) as fp:
+            self.root_tree: Optional[Element] = ET.parse(fp).getroot()
         self.cellxfs = self.__get_cellXfs()
         self.fontid = self.__get_fontid()
         self.fillid = self.__get_fillid()
         self.borders = self.__get_borders()
         self.numfmt = self.__get_numfmt()
+        self.__formats: Dict[Tuple[str, str, str, str], Format] = {}
+
+    @classmethod
+    def from_table(cls, table: Dict[str, Any]) -> "Styels":
+        """Rebuild a Styels from the plain tables returned by table().
+
+        Used to restore the styles from the disk cache without parsing styles.xml.
+        """
+        styles = cls.__new__(cls)
+        styles.root_tree = None
+        interned: Dict[Tuple[Tuple[str, Any], ...], XFS] = {}
+        styles.cellxfs = []
+        for attrib in table["cellxfs"]:
+            key = tuple(sorted(attrib.items()))
+            if key not in interned:
+                interned[key] = XFS(**attrib)
+            styles.cellxfs.append(interned[key])
+        styles.fontid = [Font(**font) for font in table["fontid"]]
+        styles.fillid = [Fills(**fill) for fill in table["fillid"]]
+        styles.borders = [Border(**border) for border in table["borders"]]
+        styles.numfmt = {k: NumFmt(**v) for k, v in table["numfmt"].items()}
+        styles.__formats = {}
+        return styles
+
+    def table(self) -> Dict[str, Any]:
+        return {
+            "cellxfs": [asdict(xfs) for xfs in self.cellxfs],
+            "fontid": [asdict(font) for font in self.fontid],
+            "fillid": [asdict(fill) for fill in self.fillid],
+            "borders": [asdict(border) for border in self.borders],
+            "numfmt": {k: asdict(v) for k, v in self.numfmt.items()},
+        }
 
     def __get_elem_index(self, elem: Element, word: str) -> Optional[int]:
         if not isinstance(elem, Element):
@@ -175,70 +223,70 @@ class Styels:
                     return index
         return None
 
+    def __children(self, word: str) -> List[Element]:
+        # Children of the table element named word, none when it is missing
+        if self.root_tree is None:
+            return []
+        index = self.__get_elem_index(self.root_tree, word)
+        if index is None:
+            return []
+        return list(self.root_tree[index])
+
     def __get_fontid(self) -> list[Font]:
         fontlists: list[Font] = []
-        __eidx = self.__get_elem_index(self.root_tree, StylesTag.FONTS.value)
-        if __eidx is None:
-            return fontlists
-
         font_appned = fontlists.append
-        for _e_parents in self.root_tree[__eidx]:
-            font = Font()
+        for _e_parents in self.__children(StylesTag.FONTS.value):
+            values: Dict[str, Any] = {}
             for _e_child_avalue in _e_parents:
                 tag = del_namespace(_e_child_avalue.tag)
                 if _e_child_avalue.attrib.get("val"):
-                    set_classattr(font, key=tag, value=_e_child_avalue.attrib["val"])
+                    values[tag] = _e_child_avalue.attrib["val"]
                 elif _e_child_avalue.attrib.get("theme"):
-                    set_classattr(font, key=tag, value=_e_child_avalue.attrib["theme"])
+                    values[tag] = _e_child_avalue.attrib["theme"]
                 elif _e_child_avalue.attrib.get("rgb"):
-                    set_classattr(font, key=tag, value=_e_child_avalue.attrib["rgb"])
+                    values[tag] = _e_child_avalue.attrib["rgb"]
 
                 if tag in ["b", "i", "u", "strike", "outline", "shadow"]:
-                    set_classattr(font, key=tag, value=True)
-            font_appned(font)
+                    values[tag] = True
+            font_appned(Font(**_known_fields(Font, values)))
         return fontlists
 
     def get_fontid(self, index: int) -> Font:
-        try:
-            item = self.fontid[index]
-        except IndexError as e:
-            logger.debug(e)
-            item = Font()
-        return item
+        # Out of range indices (missing or truncated tables) resolve to the default
+        if 0 <= index < len(self.fontid):
+            return self.fontid[index]
+        return Font()
 
     def __get_cellXfs(self) -> list[XFS]:
         cellXfslists: list[XFS] = []
-        __eidx = self.__get_elem_index(self.root_tree, StylesTag.CELLXFS.value)
-        if __eidx is None:
-            return cellXfslists
-
+        # Bloated styles.xml often repeat the same xf thousands of times.
+        # Identical xf are interned so that they share one XFS (and one Format).
+        interned: Dict[Tuple[Tuple[str, str], ...], XFS] = {}
         xfs_appned = cellXfslists.append
-        for _e_parents in self.root_tree[__eidx]:
+        for _e_parents in self.__children(StylesTag.CELLXFS.value):
             if del_namespace(_e_parents.tag):
-                xfs_appned(XFS(**_e_parents.attrib))
+                key = tuple(sorted(_e_parents.attrib.items()))
+                xfs = interned.get(key)
+                if xfs is None:
+                    xfs = XFS(**_e_parents.attrib)
+                    interned[key] = xfs
+                xfs_appned(xfs)
         return cellXfslists
 
     def get_cellXfs(self, index: int) -> XFS:
-        try:
-            cellxfs = self.cellxfs[index]
-        except IndexError as e:
-            logger.debug(e)
-            cellxfs = XFS()
-        return cellxfs
+        if 0 <= index < len(self.cellxfs):
+            return self.cellxfs[index]
+        return XFS()
 
     def __get_fillid(self) -> list[Fills]:
         fillslists: list[Fills] = []
-        __eidx = self.__get_elem_index(self.root_tree, StylesTag.FILLS.value)
-        if __eidx is None:
-            return fillslists
-
         fill_appned = fillslists.append
-        for _e_parents in self.root_tree[__eidx]:
-            fills = Fills()
+        for _e_parents in self.__children(StylesTag.FILLS.value):
+            values: Dict[str, Any] = {}
             for _e_child in _e_parents:
                 tag = del_namespace(_e_child.tag)
                 if tag == "patternFill":
-                    fills.patternFill = (
+                    values["patternFill"] = (
                         _e_child.attrib["patternType"]
                         if "patternType" in _e_child.attrib
                         else ""
@@ -246,63 +294,47 @@ class Styels:
                     for _e in _e_child:
                         tag = del_namespace(_e.tag)
                         if tag == "fgColor":
-                            fgcolor = FgColor()
-                            set_classattr(fgcolor, container=_e.attrib)
-                            fills.fgColor = fgcolor
+                            values["fgColor"] = FgColor(
+                                **_known_fields(FgColor, _e.attrib)
+                            )
                         elif tag == "bgColor":
-                            bgcolor = BgColor()
-                            set_classattr(bgcolor, container=_e.attrib)
-                            fills.bgColor = bgcolor
-            fill_appned(fills)
+                            values["bgColor"] = BgColor(
+                                **_known_fields(BgColor, _e.attrib)
+                            )
+            fill_appned(Fills(**values))
         return fillslists
 
     def get_fillid(self, index: int) -> Fills:
-        try:
-            fills = self.fillid[index]
-        except IndexError as e:
-            logger.debug(e)
-            fills = Fills()
-        return fills
+        if 0 <= index < len(self.fillid):
+            return self.fillid[index]
+        return Fills()
 
     def __get_borders(self) -> list[Border]:
         borderlists: list[Border] = []
-        __eidx = self.__get_elem_index(self.root_tree, StylesTag.BORDERS.value)
-        if __eidx is None:
-            return borderlists
-
         borders_appned = borderlists.append
-        for _e_parents in self.root_tree[__eidx]:
-            borders = Border()
+        for _e_parents in self.__children(StylesTag.BORDERS.value):
+            values: Dict[str, bool] = {}
             for _e_child in _e_parents:
                 tag = del_namespace(_e_child.tag)
-                if tag == "left" and _e_child.get("style"):
-                    borders.left = True
-                elif tag == "right" and _e_child.get("style"):
-                    borders.right = True
-                elif tag == "top" and _e_child.get("style"):
-                    borders.top = True
-                elif tag == "bottom" and _e_child.get("style"):
-                    borders.bottom = True
-                elif tag == "diagonal" and _e_child.get("style"):
-                    borders.diagonal = True
-            borders_appned(borders)
+                if tag in (
+                    "left",
+                    "right",
+                    "top",
+                    "bottom",
+                    "diagonal",
+                ) and _e_child.get("style"):
+                    values[tag] = True
+            borders_appned(Border(**values))
         return borderlists
 
     def get_borders(self, index: int) -> Border:
-        try:
-            borders = self.borders[index]
-        except IndexError as e:
-            logger.debug(e)
-            borders = Border()
-        return borders
+        if 0 <= index < len(self.borders):
+            return self.borders[index]
+        return Border()
 
     def __get_numfmt(self) -> dict[str, NumFmt]:
         numfmts: dict[str, NumFmt] = {}
-        __eidx = self.__get_elem_index(self.root_tree, StylesTag.NUMFMTS.value)
-        if __eidx is None:
-            return numfmts
-
-        for _e_parents in self.root_tree[__eidx]:
+        for _e_parents in self.__children(StylesTag.NUMFMTS.value):
             fid = _e_parents.attrib["numFmtId"]
             if fid:
                 numfmts[fid] = NumFmt(**_e_parents.attrib)
@@ -321,10 +353,34 @@ class Styels:
         return numfmt
 
     def get_format(self, index: int) -> Format:
+        """Return the resolved format of a cellXfs index.
+
+        Formats and their numFmt, font, fill and border are immutable and
+        memoised: every xf resolving to the same parts shares a single
+        Format object.
+
+        Args:
+            index (int): s attribute of the cell.
+
+        Returns:
+            Format: Number format, font, fill and border of the cell.
+        """
         cellxfs = self.get_cellXfs(index)
-        numfmt = self.get_numfmt(int(cellxfs.numFmtId))
-        font = self.get_fontid(int(cellxfs.fontId) - 1)
-        fill = self.get_fillid(int(cellxfs.fillId))
-        border = self.get_borders(int(cellxfs.borderId))
+        key = (cellxfs.numFmtId, cellxfs.fontId, cellxfs.fillId, cellxfs.borderId)
+        fmt = self.__formats.get(key)
+        if fmt is None:
+            fmt = self.__build_format(cellxfs)
+            self.__formats[key] = fmt
+        return fmt
+
+    def __build_format(self, cellxfs: XFS) -> Format:
+        if not (
+            cellxfs.numFmtId or cellxfs.fontId or cellxfs.fillId or cellxfs.borderId
+        ):
+            return Format()
+        numfmt = self.get_numfmt(int(cellxfs.numFmtId or 0))
+        font = self.get_fontid(int(cellxfs.fontId or 0))
+        fill = self.get_fillid(int(cellxfs.fillId or 0))
+        border = self.get_borders(int(cellxfs.borderId or 0))
 
         return Format(numFmt=numfmt, font=font, fill=fill, border=border)
@@ -1,5 +1,12 @@
 from enum import Enum
 
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+
+def qname(tag: str, namespace: str = MAIN_NS) -> str:
+    """Return the qualified name of a tag as ElementTree reports it ("{ns}tag")."""
+    return "{%s}%s" % (namespace, tag)
+
 
 class SheetXmlTag(Enum):
     DIMENSION = "dimension"
@@ -13,6 +20,7 @@ class SheetXmlTag(Enum):
     HEADERFOOTER = "headerFooter"
     DRAWING = "drawing"
     SHEETPR = "sheetPr"
+    SHEETFORMATPR = "sheetFormatPr"
 
 
 class WorkbookTag(Enum):
@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+
+from exmlrd.addressing import (
+    COLUMN_LETTERS,
+    MAX_COL,
+    CellRange,
+    addresses_to_numpy,
+    cell_address,
+    column_letter,
+    column_number,
+    join_addresses,
+    numpy_to_addresses,
+    split_address,
+    split_addresses,
+)
+
+
+@pytest.mark.parametrize(
+    "col, letters",
+    [
+        (1, "A"),
+        (26, "Z"),
+        (27, "AA"),
+        (52, "AZ"),
+        (702, "ZZ"),
+        (703, "AAA"),
+        (16384, "XFD"),
+        (MAX_COL, "ZZZ"),
+        (MAX_COL + 1, "AAAA"),
+    ],
+)
+def test_column_tables(col, letters):
+    assert column_letter(col) == letters
+    assert column_number(letters) == col
+
+
+def test_column_letters_table():
+    assert len(COLUMN_LETTERS) == MAX_COL + 1
+    assert all(column_number(COLUMN_LETTERS[c]) == c for c in range(1, MAX_COL + 1))
+
+
+@pytest.mark.parametrize(
+    "address, expected",
+    [
+        ("A1", (1, 1)),
+        ("AA2", (2, 27)),
+        ("$C$5", (5, 3)),
+        ("XFD1048576", (1048576, 16384)),
+    ],
+)
+def test_split_address(address, expected):
+    assert split_address(address) == expected
+
+
+@pytest.mark.parametrize("address", ["8A2", "A", "12", "", "a1", "A1B", "A-1"])
+def test_invalid_address(address):
+    with pytest.raises(ValueError):
+        split_address(address)
+
+
+def test_batch_conversion():
+    addresses = ["A1", "B2", "$AA$10", "ZZZ3"]
+    rows, cols = split_addresses(addresses)
+    assert rows == [1, 2, 10, 3]
+    assert cols == [1, 2, 27, MAX_COL]
+    assert join_addresses(rows, cols) == ["A1", "B2", "AA10", "ZZZ3"]
+
+
+def test_numpy_conversion():
+    addresses = [
+        cell_address(r, c) for r in (1, 99, 1048576) for c in (1, 26, 27, 16384)
+    ]
+    rows, cols = addresses_to_numpy(np.array(addresses))
+    assert (rows.tolist(), cols.tolist()) == split_addresses(addresses)
+    assert numpy_to_addresses(rows, cols).tolist() == addresses
+    with pytest.raises(ValueError):
+        addresses_to_numpy(["A1", "1A"])
+
+
+def test_cellrange_parse():
+    cells = CellRange.parse("C5:$A$1")
+    assert cells == CellRange(1, 1, 5, 3)
+    assert cells.ref == "A1:C5"
+    assert cells.shape == (5, 3)
+    assert len(cells) == 15
+    assert CellRange.parse("B2").ref == "B2"
+    assert hash(cells) == hash(CellRange.parse("A1:C5"))
+    with pytest.raises(AttributeError):
+        cells.min_row = 2
+
+
+def test_cellrange_iterate():
+    cells = CellRange.parse("A1:B2")
+    assert list(cells) == [(1, 1), (1, 2), (2, 1), (2, 2)]
+    assert list(cells.addresses()) == [["A1", "B1"], ["A2", "B2"]]
+
+
+def test_cellrange_contains():
+    cells = CellRange.parse("B2:D4")
+    assert "C3" in cells
+    assert (4, 4) in cells
+    assert "A1" not in cells
+    assert CellRange.parse("B2:C3") in cells
+    assert CellRange.parse("B2:E3") not in cells
+
+
+def test_cellrange_algebra():
+    a = CellRange.parse("A1:C3")
+    b = CellRange.parse("B2:E5")
+    assert a.intersect(b) == CellRange.parse("B2:C3")
+    assert a & b == a.intersect(b)
+    assert a.union(b) == CellRange.parse("A1:E5")
+    assert a | b == a.union(b)
+    assert a.intersect(CellRange.parse("D4:E5")) is None
+    assert a.overlaps(b)
+
+
+def test_cellrange_clip():
+    cells = CellRange.parse("A1:Z100")
+    assert cells.clip("B2:D9") == CellRange.parse("B2:D9")
+    assert cells.clip(None) is cells
+    assert CellRange.parse("AA1:AB2").clip("A1:I9") is None
+
+
+def test_single_cell_dimension(tmp_path):
+    from zipfile import ZipFile
+
+    from exmlrd.cell import SheetXml
+
+    path = tmp_path / "single.xlsx"
+    with ZipFile(path, "w") as z:
+        z.writestr(
+            "xl/worksheets/sheet1.xml",
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            '<dimension ref="A1"/><sheetData/></worksheet>',
+        )
+    sheetxml = SheetXml(ZipFile(path))
+    assert sheetxml.get_dimension_coordinate(worksheet=1) == ((1, 1), (1, 1))
+    assert sheetxml.get_dimension_range(worksheet=1) == CellRange(1, 1, 1, 1)
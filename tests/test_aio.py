@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from benchmarks.generator import generate
+from exmlrd.aio import AsyncExcelArchive
+from exmlrd.archive import ExcelArchive
+
+
+def test_get_cell_concurrent(setup_excel):
+    async def main():
+        async with AsyncExcelArchive("tests/sample.xlsx", max_workers=2) as archive:
+            cells = await asyncio.gather(
+                *(archive.get_cell(row, 2, raw=True) for row in range(1, 5))
+            )
+            ref = await archive.get_mergecell("B8", 1)
+            block = await archive.get_range("A1:B2")
+            return cells, ref, block
+
+    cells, ref, block = asyncio.run(main())
+    expected = ExcelArchive("tests/sample.xlsx")
+    assert cells == [expected.get_cell(row, 2, raw=True) for row in range(1, 5)]
+    assert ref == "A7:G9"
+    assert block == expected.get_range("A1:B2")
+
+
+def test_iter_rows(setup_excel):
+    async def main():
+        async with AsyncExcelArchive("tests/sample.xlsx", queue_size=1) as archive:
+            return [
+                row async for row in archive.iter_rows(values_only=True, chunk_size=2)
+            ]
+
+    rows = asyncio.run(main())
+    expected = ExcelArchive("tests/sample.xlsx").iter_rows(values_only=True)
+    assert rows == list(expected)
+
+
+def test_iter_rows_stop_early(setup_excel):
+    async def main():
+        async with AsyncExcelArchive("tests/sample.xlsx", queue_size=1) as archive:
+            rows = []
+            async for row in archive.iter_rows(values_only=True, chunk_size=1):
+                rows.append(row)
+                if len(rows) == 2:
+                    break
+            return rows
+
+    rows = asyncio.run(asyncio.wait_for(main(), timeout=5))
+    assert len(rows) == 2
+
+def test_get_cell_inside_iter_rows(setup_excel):
+    # The producer holds no worker while the consumer awaits other reads
+    async def consume(archive):
+        cells = []
+        async for row in archive.iter_rows(values_only=True, chunk_size=1):
+            cells.append(await archive.get_cell(1, 1, raw=True))
+        return cells
+
+    async def main(max_workers, consumers):
+        async with AsyncExcelArchive("tests/sample.xlsx", max_workers=max_workers, queue_size=1) as archive:
+            return await asyncio.gather(*(consume(archive) for _ in range(consumers)))
+
+    expected = ExcelArchive("tests/sample.xlsx").get_cell(1, 1, raw=True)
+    for max_workers, consumers in ((1, 1), (4, 4)):
+        results = asyncio.run(asyncio.wait_for(main(max_workers, consumers), timeout=10))
+        assert all(cells and set(cells) == {expected} for cells in results)
+
+def test_get_cell_shared_cache(tmp_path):
+    # 50 sheets and a cache holding 3 of them: parses and evictions run concurrently
+    path = generate(str(tmp_path), "sheets", 50000)
+    targets = [(row, 1 + (row * 7) % 50) for row in range(1, 201)]
+
+    async def main():
+        async with AsyncExcelArchive(path, max_workers=8, cache_bytes=3 * 1000 * 256) as archive:
+            return await asyncio.gather(
+                *(archive.get_cell(row % 5 + 1, 2, worksheet=sheet, raw=True) for row, sheet in targets)
+            )
+
+    cells = asyncio.run(main())
+    expected = ExcelArchive(path)
+    assert cells == [expected.get_cell(row % 5 + 1, 2, worksheet=sheet, raw=True) for row, sheet in targets]
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def test_iter_rows_producer_interrupted(setup_excel):
+    def rows(*args, **kwargs):
+        yield ["A"]
+        raise Interrupted()
+
+    async def main():
+        async with AsyncExcelArchive("tests/sample.xlsx") as archive:
+            archive.archive.iter_rows = rows
+            return [row async for row in archive.iter_rows(chunk_size=1)]
+
+    with pytest.raises(Interrupted):
+        asyncio.run(asyncio.wait_for(main(), timeout=5))
+
+
+def test_archive_options(setup_excel, tmp_path):
+    async def main():
+        async with AsyncExcelArchive(
+            "tests/sample.xlsx", cache_bytes=1024, parser="expat", checkpoint_rows=2, cache_dir=str(tmp_path)
+        ) as archive:
+            sheetxml = archive.archive.sheetxml
+            assert sheetxml.cache.max_bytes == 1024
+            assert sheetxml.checkpoint_rows == 2
+            assert sheetxml.disk_cache is not None
+            return await archive.get_cell(1, 1, raw=True)
+
+    assert asyncio.run(main()) == ExcelArchive("tests/sample.xlsx").get_cell(1, 1, raw=True)
@@ -1,10 +1,13 @@
+import io
+import json
 import os
 
 import pytest
 
+from benchmarks.generator import generate
 from exmlrd import log
 from exmlrd.archive import ExcelArchive
-from exmlrd.cell import Format
+from exmlrd.cell import Format, RawCell
 from exmlrd.sharedstyle import SiTag
 
 logger = log.get_logger(__name__)
@@ -103,3 +106,126 @@ def test_convert_json_contents(setup_excel):
     
     
     
+
+def test_iter_rows_values(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    rows = list(archive.iter_rows(1, values_only=True))
+    assert len(rows) == 9
+    assert rows[0] == ["8", "31", "59", "66", "23", "", "", "1000"]
+    assert rows[4] == []
+    assert rows[6] == ["SampleText"]
+
+def test_iter_rows_range(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    rows = list(archive.iter_rows(1, min_row=2, max_row=3))
+    assert len(rows) == 2
+    assert rows[0][1].address == "B2"
+    assert rows[0][1].value == "57"
+    assert rows[1][2].address == "C3"
+    assert rows[1][2].value == "90"
+
+def test_get_range(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    rows = archive.get_range("B2:C3")
+    assert [[c.address for c in r] for r in rows] == [["B2", "C2"], ["B3", "C3"]]
+    assert [[c.value for c in r] for r in rows] == [["57", "76"], ["19", "90"]]
+
+def test_get_range_outside_data(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    rows = archive.get_range("$F$5:G6")
+    assert [[c.address for c in r] for r in rows] == [["F5", "G5"], ["F6", "G6"]]
+    assert all(c.value == "" for r in rows for c in r)
+
+def test_get_cells(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    cells = archive.get_cells(["H1", "A7", "B2", "Z100"])
+    assert list(cells.keys()) == ["H1", "A7", "B2", "Z100"]
+    assert cells["H1"].value == "1000"
+    assert cells["A7"].value == "SampleText"
+    assert cells["B2"].value == "57"
+    assert cells["Z100"].value == ""
+
+def test_dump_json_lines(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    stream = io.StringIO()
+    count = archive.dump_json(stream, range="A1:B2", lines=True, encoder="json")
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert count == 4
+    assert [r["address"] for r in records] == ["A1", "B1", "A2", "B2"]
+    assert records[3]["worksheet"] == "Test1"
+    assert records[3]["value"] == "57"
+
+def test_dump_json_array_compact(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    stream = io.BytesIO()
+    count = archive.dump_json(stream, range="A1:C1", compact=True, encoder="json")
+    contents = json.loads(stream.getvalue().decode("utf-8"))
+    assert count == 3
+    assert contents == {"Test1": [
+        {"row": 1, "col": 1, "address": "A1", "value": "8"},
+        {"row": 1, "col": 2, "address": "B1", "value": "31"},
+        {"row": 1, "col": 3, "address": "C1", "value": "59"}]}
+
+def test_dump_json_matches_to_json(setup_excel, rmjsonfile):
+    archive = ExcelArchive("tests/sample.xlsx")
+    count = archive.dump_json("tests/output.json", encoder="json")
+    with open("tests/output.json", encoding="utf-8") as f:
+        dumped = json.load(f)
+    assert count == 9 * 9
+    assert dumped == json.loads(archive.to_json())
+
+def test_get_cell_raw(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    cell = archive.get_cell(2, 2, raw=True)
+    assert isinstance(cell, RawCell)
+    assert cell == RawCell(2, 2, "B2", "57", "", "n", 1, None)
+    assert archive.get_cell(7, 1, raw=True).value == "SampleText"
+    assert archive.get_cell(5, 5, raw=True) == RawCell(5, 5, "E5")
+
+def test_raw_range_and_rows(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    rows = archive.get_range("A1:B2", raw=True)
+    assert [[c.value for c in r] for r in rows] == [["8", "31"], ["69", "57"]]
+    cells = archive.get_cells(["H1"], raw=True)
+    assert cells["H1"].value == "1000"
+    streamed = list(archive.iter_rows(min_row=1, max_row=1, raw=True))
+    assert streamed[0][5] == RawCell(1, 6, "F1")
+    assert streamed[0][7].value == "1000"
+
+def test_styled_cells_share_format(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx", styled=True)
+    a1 = archive.get_cell(1, 1)
+    b2 = archive.get_cell(2, 2)
+    assert a1.style is b2.style
+    assert a1.style.font.name == "メイリオ"
+    assert a1.style.font.b
+    assert archive.get_cell(7, 1).style.font.name == "Calibri"
+    assert archive.get_cell(20, 20).style is archive.get_cell(7, 1).style
+
+def test_format_is_immutable(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx", styled=True)
+    style = archive.get_cell(1, 1).style
+    with pytest.raises(Exception):
+        style.font = None
+
+def test_uncached_lookups(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    assert archive.get_cell(2, 2, raw=True, cache=False) == RawCell(2, 2, "B2", "57", "", "n", 1, None)
+    assert archive.get_cell(7, 1, cache=False).value == "SampleText"
+    assert archive.get_cell(5, 5, cache=False).value == ""
+    rows = archive.get_range("A1:B2", cache=False)
+    assert [[c.value for c in r] for r in rows] == [["8", "31"], ["69", "57"]]
+    cells = archive.get_cells(["H1", "A7", "Z100"], cache=False)
+    assert [c.value for c in cells.values()] == ["1000", "SampleText", ""]
+    assert len(archive.sheetxml.cache) == 0
+
+def test_uncached_lookup_stops_early(tmp_path):
+    path = generate(str(tmp_path), "sst", 20000)
+    archive = ExcelArchive(path, instrument=True)
+    cells = archive.get_cells(["A1", "C5", "B3"], cache=False)
+    inflated = archive.stats()["phases"]["inflate"]["bytes"]
+    member = archive.get_archive_member("xl/worksheets/sheet1.xml")
+    assert inflated < member.file_size / 2
+    assert len(archive.sheetxml.cache) == 0
+    expected = ExcelArchive(path).get_cells(["A1", "C5", "B3"])
+    assert cells == expected
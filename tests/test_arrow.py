@@ -0,0 +1,100 @@
+import datetime
+import os
+
+import openpyxl
+import pytest
+
+from benchmarks.generator import generate
+from exmlrd.archive import ExcelArchive
+from exmlrd.exceptions import ColumnTypeConflict
+
+pa = pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def typed_excel():
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["id", "value", "date", "name", "flag"])
+    for i in range(1, 11):
+        sheet.append([i, i / 4 if i % 3 else None, datetime.datetime(2023, 1, i),
+                      f"name{i % 3}" if i != 5 else None, i % 2 == 0])
+    workbook.save("tests/typed.xlsx")
+    yield "tests/typed.xlsx"
+    os.remove("tests/typed.xlsx")
+
+
+def test_to_arrow_types(typed_excel):
+    table = ExcelArchive(typed_excel).to_arrow(header=1)
+    assert table.column_names == ["id", "value", "date", "name", "flag"]
+    assert table.num_rows == 10
+    assert table.schema.field("id").type == pa.float64()
+    assert table.column("id").to_pylist() == [float(i) for i in range(1, 11)]
+    assert table.column("value").null_count == 3
+    assert table.schema.field("date").type == pa.timestamp("ms")
+    assert table.column("date")[1].as_py() == datetime.datetime(2023, 1, 2)
+    assert pa.types.is_dictionary(table.schema.field("name").type)
+    assert table.column("name").to_pylist()[3:6] == ["name1", None, "name0"]
+    assert table.column("flag").to_pylist()[:2] == [False, True]
+
+def test_record_batches(typed_excel):
+    excel = ExcelArchive(typed_excel)
+    batches = list(excel.iter_record_batches(header=1, batch_rows=4))
+    assert [batch.num_rows for batch in batches] == [4, 4, 2]
+    assert all(batch.schema == batches[0].schema for batch in batches)
+    assert pa.Table.from_batches(batches).to_pylist() == excel.to_arrow(header=1).to_pylist()
+
+def test_shared_strings_are_dictionary_indices(tmp_path):
+    path = generate(str(tmp_path), "sst", 1000)
+    excel = ExcelArchive(path)
+    sharedstyle = excel.sheetxml.sharedstyle
+    column = excel.to_arrow(batch_rows=30).column("C")
+    assert column.num_chunks == 4
+    for chunk in column.chunks:
+        # The dictionary is the shared strings table itself
+        assert len(chunk.dictionary) == len(sharedstyle)
+    assert column.chunk(0).indices[4].as_py() == excel.get_cell(5, 3, raw=True).sst_index
+    assert column.to_pylist()[4] == excel.get_cell(5, 3).value
+
+def test_to_arrow_range_and_inline_strings(setup_excel):
+    table = ExcelArchive("tests/sample.xlsx").to_arrow(range="A6:H8")
+    assert table.column_names == list("ABCDEFGH")
+    assert table.num_rows == 3
+    assert table.column("A").to_pylist() == [None, "SampleText", None]
+    assert table.column("H").null_count == 3
+
+def test_dense_rows_until_dimension(setup_excel):
+    table = ExcelArchive("tests/sample.xlsx").to_arrow()
+    assert table.num_rows == 9
+    assert table.num_columns == 9
+    assert table.column("H").to_pylist()[0] == 1000
+    assert table.column("A").to_pylist()[6] == "SampleText"
+
+def test_batch_type_conflict(tmp_path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for value in [1, 2, 3, "text"]:
+        sheet.append([value])
+    path = str(tmp_path / "mixed.xlsx")
+    workbook.save(path)
+    excel = ExcelArchive(path)
+    with pytest.raises(ColumnTypeConflict):
+        list(excel.iter_record_batches(batch_rows=2))
+    assert excel.to_arrow().column("A").to_pylist() == ["1", "2", "3", "text"]
+    scanned = excel.to_arrow(batch_rows=2, scan_types=True)
+    assert scanned.column("A").to_pylist() == ["1", "2", "3", "text"]
+
+def test_compact_dictionary(tmp_path):
+    excel = ExcelArchive(generate(str(tmp_path), "sst", 1000))
+    shared = excel.to_arrow(batch_rows=30)
+    compact = excel.to_arrow(batch_rows=30, compact_dictionary=True)
+    assert compact.to_pylist() == shared.to_pylist()
+    assert len(compact.column("C").chunk(0).dictionary) <= 30
+
+def test_to_arrow_date1904(tmp_path):
+    workbook = openpyxl.Workbook()
+    workbook.epoch = openpyxl.utils.datetime.CALENDAR_MAC_1904
+    workbook.active.append([datetime.datetime(2023, 1, 2)])
+    workbook.save(tmp_path / "1904.xlsx")
+    table = ExcelArchive(str(tmp_path / "1904.xlsx")).to_arrow()
+    assert table.column("A")[0].as_py() == datetime.datetime(2023, 1, 2)
@@ -0,0 +1,75 @@
+import hashlib
+
+import openpyxl
+import pytest
+
+from benchmarks import runner
+from benchmarks.__main__ import main
+from benchmarks.generator import SHAPES, SHEETS, generate, parse_size
+from exmlrd.archive import ExcelArchive
+
+
+def digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+@pytest.mark.parametrize('size, expected', [
+    ("1k", 1000), ("250K", 250000), ("10M", 10000000), ("1.5k", 1500), ("42", 42)])
+def test_parse_size(size, expected):
+    assert parse_size(size) == expected
+
+def test_generator_is_deterministic(tmp_path):
+    first = generate(str(tmp_path / "a"), "sst", 1000, seed=1)
+    second = generate(str(tmp_path / "b"), "sst", 1000, seed=1)
+    other = generate(str(tmp_path / "c"), "sst", 1000, seed=2)
+    assert digest(first) == digest(second)
+    assert digest(first) != digest(other)
+
+@pytest.mark.parametrize('shape', SHAPES)
+def test_generated_shapes(tmp_path, shape):
+    path = generate(str(tmp_path), shape, 2000)
+    workbook = openpyxl.load_workbook(path)
+    excel = ExcelArchive(path, styled=shape == "styled")
+    nsheets = SHEETS if shape == "sheets" else 1
+    assert len(workbook.sheetnames) == nsheets
+    assert excel.worksheet(nsheets) == workbook.sheetnames[-1]
+    sheet = workbook.worksheets[0]
+    assert excel.get_cell(3, 3).value == str(sheet.cell(3, 3).value)
+    if shape == "merged":
+        assert excel.get_mergecell("B2", 1) == "A1:B2"
+    if shape == "styled":
+        assert excel.get_cell(1, 1).style.font.name == sheet.cell(1, 1).font.name
+
+def test_measure(tmp_path):
+    path = generate(str(tmp_path), "numeric", 100)
+    measured = runner.measure("get_cell", path, "numeric", 2)
+    assert len(measured["times"]) == 2
+    assert measured["min"] <= measured["median"]
+    assert measured["tracemalloc_peak"] > 0
+
+def result(scenario, median, peak):
+    return {"shape": "sst", "cells": 1000, "scenario": scenario, "median": median,
+            "tracemalloc_peak": peak}
+
+def test_compare():
+    old = {"version": 1, "results": [
+        result("open", 1.0, 100), result("get_cell", 1.0, 100), result("to_json", 1.0, 100),
+        result("sheet_names", 1.0, 100)]}
+    new = {"version": 1, "results": [
+        result("open", 1.05, 100), result("get_cell", 1.5, 100), result("to_json", 0.5, 100),
+        result("sheet_names", 1.0, 200), result("merge_lookup", 1.0, 100)]}
+    rows = runner.compare(old, new, threshold=0.1)
+    assert [(r.scenario, r.status) for r in rows] == [
+        ("open", "same"), ("get_cell", "regression"), ("to_json", "improvement"),
+        ("sheet_names", "regression")]
+
+def test_cli_run_and_compare(tmp_path, capsys):
+    out = str(tmp_path / "results.json")
+    args = ["--shapes", "numeric", "--sizes", "100", "--workdir", str(tmp_path)]
+    assert main(["run", *args, "--scenarios", "open,sheet_names", "--repeat", "1",
+                 "--no-isolate", "--out", out]) == 0
+    results = runner.load(out)
+    assert [r["scenario"] for r in results["results"]] == ["open", "sheet_names"]
+    assert main(["compare", out, out, "--fail-on-regression"]) == 0
+    assert "sheet_names" in capsys.readouterr().out
@@ -0,0 +1,74 @@
+import pytest
+
+from exmlrd.archive import ExcelArchive
+from exmlrd.cache import SheetCache
+
+
+def test_put_get():
+    cache = SheetCache(100)
+    cache.put(1, "sheet1", 10)
+    assert cache.get(1) == "sheet1"
+    assert cache.get(2) is None
+    assert cache.nbytes == 10
+
+def test_lru_eviction():
+    cache = SheetCache(100)
+    cache.put(1, "sheet1", 40)
+    cache.put(2, "sheet2", 40)
+    cache.get(1)
+    cache.put(3, "sheet3", 40)
+    assert 1 in cache
+    assert 2 not in cache
+    assert 3 in cache
+    assert cache.nbytes == 80
+
+def test_over_budget_is_kept_apart():
+    cache = SheetCache(100)
+    cache.put(1, "sheet1", 10)
+    cache.put(2, "sheet2", 101)
+    assert cache.get(2) == "sheet2"
+    assert cache.nbytes == 10
+    # Only the most recent oversize entry is kept, the others stay
+    cache.put(3, "sheet3", 200)
+    assert 2 not in cache and 1 in cache and 3 in cache
+    assert cache.evict(3) and 3 not in cache
+    disabled = SheetCache(0)
+    disabled.put(1, "sheet1", 1)
+    assert 1 not in disabled
+
+def test_oversize_sheet_is_parsed_once(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx", cache_bytes=1, instrument=True)
+    sheet = archive.sheetxml.get_sheet(1)
+    assert archive.sheetxml.get_sheet(1) is sheet
+    assert archive.get_mergecell("B8", 1) == "A7:G9"
+    assert archive.stats()["counters"]["sheet_cache_misses"] == 1
+
+def test_evict_and_clear():
+    cache = SheetCache(100)
+    cache.put(1, "sheet1", 10)
+    cache.put(2, "sheet2", 10)
+    assert cache.evict(1)
+    assert not cache.evict(1)
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+def test_sheet_is_parsed_once(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    archive.get_cell(1, 1)
+    sheet = archive.sheetxml.cache.get(1)
+    archive.get_cell(2, 2)
+    assert archive.sheetxml.cache.get(1) is sheet
+    assert archive.evict(1)
+    assert 1 not in archive.sheetxml.cache
+
+@pytest.mark.parametrize('row, col, address, value', [
+    (7, 1, "A7", "SampleText"),
+    (1, 8, "H1", "1000"),
+    (5, 1, "A5", ""),
+    (1, 6, "F1", "")])
+def test_sparse_sheet(setup_excel, row, col, address, value):
+    archive = ExcelArchive("tests/sample.xlsx")
+    cell = archive.get_cell(row, col)
+    assert cell.address == address
+    assert cell.value == value
@@ -142,4 +142,10 @@ class TestAddress2Coordinate:
     def test_convert_to_row_col_index(self, setup_excel, arch, expected_row, expected_col, address):
         row, col = arch.convert_to_row_col_index(cell_address=address)
         assert row == expected_row
-        assert col == expected_col
\ No newline at end of file
+        assert col == expected_col
+    @pytest.mark.parametrize('ref, expected', [
+        ("A1:C5", ((1, 1), (5, 3))),
+        ("$B$2", ((2, 2), (2, 2))),
+        ("C5:A1", ((1, 1), (5, 3)))])
+    def test_convert_to_range_index(self, setup_excel, arch, ref, expected):
+        assert arch.convert_to_range_index(ref) == expected
@@ -0,0 +1,103 @@
+import csv
+import json
+import os
+import shutil
+
+import openpyxl
+import pytest
+
+from exmlrd import convert
+from exmlrd.__main__ import main
+from exmlrd.convert import convert_file, convert_many, find_workbooks, output_path
+
+
+@pytest.fixture
+def workbooks(setup_excel, tmp_path):
+    src = tmp_path / "in"
+    (src / "sub").mkdir(parents=True)
+    shutil.copy("tests/sample.xlsx", src / "a.xlsx")
+    shutil.copy("tests/sample.xlsx", src / "sub" / "b.xlsx")
+    shutil.copy("tests/sample.xlsx", src / "~$a.xlsx")
+    (src / "notes.txt").write_text("not a workbook")
+    return src
+
+def test_find_workbooks(workbooks):
+    found = find_workbooks([str(workbooks), str(workbooks / "sub" / "*.xlsx")])
+    assert [relpath for _, relpath in found] == ["a.xlsx", os.path.join("sub", "b.xlsx")]
+
+def test_output_path():
+    assert output_path("out", os.path.join("sub", "b.xlsx"), "Q1/Q2", "csv") == os.path.join(
+        "out", "sub", "b.Q1_Q2.csv")
+
+def test_convert_csv(workbooks, tmp_path):
+    out = str(tmp_path / "out")
+    result = convert_file((str(workbooks / "a.xlsx"), "a.xlsx"), out, "csv")
+    assert result.ok
+    assert [output.worksheet for output in result.outputs] == ["Test1"]
+    with open(result.outputs[0].path, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["8", "31", "59", "66", "23", "", "", "1000"]
+    assert rows[6] == ["SampleText"]
+
+def test_convert_jsonl_header(workbooks, tmp_path):
+    result = convert_file((str(workbooks / "a.xlsx"), "a.xlsx"), str(tmp_path), "jsonl",
+                          header=1)
+    with open(result.outputs[0].path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert records[0] == {"8": "69", "31": "57", "59": "76", "66": "66", "23": "23"}
+    assert records[-1] == {"8": "SampleText"}
+
+def test_convert_parquet(workbooks, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    result = convert_file((str(workbooks / "a.xlsx"), "a.xlsx"), str(tmp_path), "parquet")
+    table = pq.read_table(result.outputs[0].path)
+    assert table.num_rows == 9
+    assert table.column("A").to_pylist()[6] == "SampleText"
+
+def test_parquet_type_conflict(tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(convert, "DEFAULT_BATCH_ROWS", 4)
+    workbook = openpyxl.Workbook()
+    for value in [1, 2, 3, 4, 5, "Total"]:
+        workbook.active.append([value])
+    workbook.save(tmp_path / "total.xlsx")
+    result = convert_file((str(tmp_path / "total.xlsx"), "total.xlsx"), str(tmp_path), "parquet")
+    assert result.ok
+    assert pq.read_table(result.outputs[0].path).column("A").to_pylist()[-1] == "Total"
+
+@pytest.mark.parametrize("header", [None, 1])
+def test_cells_count_alike(workbooks, tmp_path, header):
+    pytest.importorskip("pyarrow.parquet")
+    workbook = (str(workbooks / "a.xlsx"), "a.xlsx")
+    counts = {fmt: convert_file(workbook, str(tmp_path), fmt, header=header).cells
+              for fmt in ("csv", "jsonl", "parquet")}
+    assert len(set(counts.values())) == 1 and counts["csv"] > 0
+
+def test_skip_up_to_date(workbooks, tmp_path):
+    workbook = (str(workbooks / "a.xlsx"), "a.xlsx")
+    first = convert_file(workbook, str(tmp_path), "csv")
+    second = convert_file(workbook, str(tmp_path), "csv")
+    assert second.outputs[0].skipped and second.cells == 0
+    os.utime(workbook[0], (0, os.path.getmtime(first.outputs[0].path) + 10))
+    assert not convert_file(workbook, str(tmp_path), "csv").outputs[0].skipped
+    assert not convert_file(workbook, str(tmp_path), "csv", force=True).outputs[0].skipped
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+
+def test_sheet_selection_and_failures(workbooks, tmp_path):
+    (workbooks / "broken.xlsx").write_bytes(b"not a zip")
+    results = list(convert_many(find_workbooks([str(workbooks)]), str(tmp_path), "csv",
+                                sheets=[1], workers=1))
+    assert [result.ok for result in results] == [True, False, True]
+    assert "BadZipFile" in results[1].error
+    missing = convert_file((str(workbooks / "a.xlsx"), "a.xlsx"), str(tmp_path), "csv",
+                           sheets=[2])
+    assert "NotFoundSheet" in missing.error
+
+def test_main(workbooks, tmp_path, capsys):
+    out = str(tmp_path / "out")
+    assert main([str(workbooks), "-o", out, "--sheets", "Test1", "-j", "2", "-q"]) == 0
+    assert "2 files (0 failed), 2 sheets written" in capsys.readouterr().out
+    assert os.path.exists(os.path.join(out, "sub", "b.Test1.csv"))
+    assert main([str(workbooks), "-o", out, "-q"]) == 0
+    assert "2 up to date" in capsys.readouterr().out
+    assert main([str(tmp_path / "missing"), "-o", out]) == 2
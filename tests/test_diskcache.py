@@ -0,0 +1,118 @@
+import os
+from zipfile import ZipFile
+
+import pytest
+
+from exmlrd.archive import ExcelArchive
+from exmlrd.cell import SheetXml
+from exmlrd.compact import CompactRows
+from exmlrd.diskcache import DiskCache
+from exmlrd.sharedstyle import SharedStyle
+
+SST_XML = (
+    '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    "<si><t>plain</t></si>"
+    '<si><r><rPr><sz val="16"/></rPr><t>rich </t></r><r><t>text</t></r></si>'
+    "</sst>"
+)
+
+
+def fail(*args, **kwargs):
+    raise AssertionError("The XML was parsed again")
+
+
+def test_reopen_from_disk_cache(setup_excel, tmp_path, monkeypatch):
+    first = ExcelArchive("tests/sample.xlsx", styled=True, cache_dir=str(tmp_path))
+    expected = first.get_range("A1:I9")
+    expected_merge = first.get_mergecell("B8", 1)
+    key = first.sheetxml.disk_key
+    assert sorted(os.listdir(tmp_path / key)) == ["sheet1.bin", "styles.bin"]
+
+    monkeypatch.setattr(SheetXml, "_SheetXml__parse_sheet", fail)
+    monkeypatch.setattr("exmlrd.cell.Styels", fail)
+    second = ExcelArchive("tests/sample.xlsx", styled=True, cache_dir=str(tmp_path))
+    assert second.get_range("A1:I9") == expected
+    assert second.get_mergecell("B8", 1) == expected_merge
+    assert second.get_cell(2, 2).style.font.name == "メイリオ"
+
+
+def test_shared_strings_sidecar(tmp_path):
+    path = tmp_path / "sst.xlsx"
+    with ZipFile(path, "w") as z:
+        z.writestr("xl/sharedStrings.xml", SST_XML)
+    disk = DiskCache(str(tmp_path / "cache"))
+    with ZipFile(path) as archive:
+        key = disk.key(archive)
+        disk.save_sst(key, SharedStyle(archive))
+    shared = disk.load_sst(key)
+    assert len(shared) == 2
+    assert shared.get_text(0) == "plain"
+    assert shared.get_text(1) == "rich text"
+    assert shared.get_shareitem(1).rpr[0].sz == "16"
+
+
+def test_key_changes_with_content(tmp_path):
+    path = tmp_path / "book.xlsx"
+    disk = DiskCache(str(tmp_path / "cache"))
+    with ZipFile(path, "w") as z:
+        z.writestr("xl/a.xml", "<a/>")
+    with ZipFile(path) as archive:
+        before = disk.key(archive)
+    with ZipFile(path, "w") as z:
+        z.writestr("xl/a.xml", "<b/>")
+    with ZipFile(path) as archive:
+        assert disk.key(archive) != before
+
+
+def test_corrupt_sidecar_is_a_miss(tmp_path):
+    disk = DiskCache(str(tmp_path))
+    disk.write("key", "part", {"a": 1}, {"blob": b"abc"})
+    meta, blobs = disk.read("key", "part")
+    assert meta == {"a": 1}
+    assert bytes(blobs["blob"]) == b"abc"
+    with open(tmp_path / "key" / "part.bin", "wb") as f:
+        f.write(b"garbage")
+    assert disk.read("key", "part") is None
+    assert not os.path.exists(tmp_path / "key" / "part.bin")
+
+
+def test_lru_eviction(tmp_path):
+    disk = DiskCache(str(tmp_path))
+    for i, key in enumerate(["old", "unused", "new"]):
+        disk.write(key, "part", {}, {"blob": bytes(1000)})
+        os.utime(tmp_path / key, (i, i))
+    disk.read("old", "part")
+    disk.max_bytes = 2500
+    disk.prune()
+    assert sorted(os.listdir(tmp_path)) == ["new", "old"]
+
+
+def test_sheet_rows_decoded_on_access(setup_excel, tmp_path):
+    first = ExcelArchive("tests/sample.xlsx", cache_dir=str(tmp_path))
+    expected = first.sheetxml.get_sheet(1)
+    key = first.sheetxml.disk_key
+    disk = DiskCache(str(tmp_path))
+    sheet = disk.load_sheet(key, 1).to_parsed()
+    assert isinstance(sheet.rows, CompactRows)
+    # Rows without cells are not stored
+    stored = {row: cols for row, cols in expected.rows.items() if cols}
+    assert list(sheet.rows) == list(stored)
+    assert sheet.rows[2] == expected.rows[2]
+    assert sheet.rows.get(5) is None and 5 not in sheet.rows
+    assert sheet.rows == stored
+    assert sheet.ncells == expected.ncells
+
+
+def test_entries_pruned_while_in_use(tmp_path):
+    path = tmp_path / "sst.xlsx"
+    with ZipFile(path, "w") as z:
+        z.writestr("xl/sharedStrings.xml", SST_XML)
+    disk = DiskCache(str(tmp_path / "cache"))
+    with ZipFile(path) as archive:
+        key = disk.key(archive)
+        disk.save_sst(key, SharedStyle(archive))
+    shared = disk.load_sst(key)
+    # Nothing stays mapped, the sidecar can be removed under the reader
+    disk.clear()
+    assert os.listdir(tmp_path / "cache") == []
+    assert shared.get_text(1) == "rich text"
@@ -0,0 +1,120 @@
+import datetime
+import io
+import json
+import os
+import re
+import zipfile
+
+import openpyxl
+import pytest
+
+from exmlrd.archive import ExcelArchive
+from exmlrd.export import get_encoder, numfmt_kind
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def numeric_excel():
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["id", "value", "date", "name", "flag"])
+    sheet.append([1, 0.5, datetime.datetime(2023, 1, 2), "a", True])
+    sheet.append([2, None, datetime.datetime(2023, 1, 3, 12), "b", False])
+    sheet.append([3, 2.25, None, None, True])
+    workbook.save("tests/numeric.xlsx")
+    yield "tests/numeric.xlsx"
+    os.remove("tests/numeric.xlsx")
+
+
+@pytest.mark.parametrize('formatcode, numfmt_id, expected', [
+    ("", 0, "number"),
+    ("@", 49, "text"),
+    ("", 14, "datetime"),
+    ("yyyy/m/d", 176, "datetime"),
+    ('0.00"days"', 177, "number"),
+    ("[Red]0.0", 178, "number")])
+def test_numfmt_kind(formatcode, numfmt_id, expected):
+    assert numfmt_kind(formatcode, numfmt_id) == expected
+
+def test_to_numpy_dtypes(numeric_excel):
+    archive = ExcelArchive(numeric_excel)
+    columns = archive.to_numpy(header=1)
+    assert list(columns.keys()) == ["id", "value", "date", "name", "flag"]
+    assert columns["id"].dtype == np.int64
+    assert columns["id"].tolist() == [1, 2, 3]
+    assert columns["value"].dtype == np.float64
+    assert columns["value"][0] == 0.5
+    assert np.isnan(columns["value"][1])
+    assert columns["date"].dtype == np.dtype("M8[ms]")
+    assert columns["date"][1] == np.datetime64("2023-01-03T12:00")
+    assert np.isnat(columns["date"][2])
+    assert columns["name"].tolist() == ["a", "b", None]
+    assert columns["flag"].tolist() == [True, False, True]
+
+def test_to_numpy_missing_bool(tmp_path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for flag in (True, None, False):
+        sheet.append([1, flag])
+    workbook.save(tmp_path / "bool.xlsx")
+    flags = ExcelArchive(str(tmp_path / "bool.xlsx")).to_numpy()["B"]
+    assert flags.dtype == np.bool_
+    assert flags.tolist() == [True, None, False]
+    assert flags.mask.tolist() == [False, True, False]
+
+def test_to_numpy_date1904(tmp_path):
+    workbook = openpyxl.Workbook()
+    workbook.epoch = openpyxl.utils.datetime.CALENDAR_MAC_1904
+    workbook.active.append([datetime.datetime(2023, 1, 2, 6)])
+    workbook.save(tmp_path / "1904.xlsx")
+    archive = ExcelArchive(str(tmp_path / "1904.xlsx"))
+    assert archive.sheetxml.ws.manifest.date1904
+    assert archive.to_numpy()["A"][0] == np.datetime64("2023-01-02T06:00")
+
+def test_to_numpy_range(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    columns = archive.to_numpy(range="B2:C3")
+    assert list(columns.keys()) == ["B", "C"]
+    assert columns["B"].tolist() == [57, 19]
+    assert columns["C"].tolist() == [76, 90]
+
+
+def test_get_encoder():
+    assert get_encoder()({"a": [1]}) == '{"a": [1]}'
+    assert get_encoder("json", indent=4)([1]) == "[\n    1\n]"
+    # orjson only indents by 2, other indents fall back to json or are refused
+    assert get_encoder("auto", indent=4)([1]) == "[\n    1\n]"
+    with pytest.raises(ValueError):
+        get_encoder("orjson", indent=4)
+    with pytest.raises(ValueError):
+        get_encoder("yaml")
+
+
+def test_dump_json_text_writer(setup_excel):
+    # A writer without mode that does not derive from io.TextIOBase gets str
+    class Writer:
+        def __init__(self):
+            self.parts = []
+
+        def write(self, text):
+            assert isinstance(text, str)
+            self.parts.append(text)
+
+    writer = Writer()
+    assert ExcelArchive("tests/sample.xlsx").dump_json(writer, range="A1:B2") == 4
+    assert len(json.loads("".join(writer.parts))["Test1"]) == 4
+
+def test_dump_json_lines_without_cells(tmp_path):
+    # A sheet without cells nor dimension has no used range
+    path = tmp_path / "empty.xlsx"
+    openpyxl.Workbook().save(path)
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp_path / "nodim.xlsx", "w") as dst:
+        for name in src.namelist():
+            data = src.read(name)
+            if name == "xl/worksheets/sheet1.xml":
+                data = re.sub(rb"<dimension [^>]*/>", b"", data)
+            dst.writestr(name, data)
+    stream = io.StringIO()
+    assert ExcelArchive(str(tmp_path / "nodim.xlsx")).dump_json(stream, lines=True) == 0
+    assert stream.getvalue() == ""
@@ -0,0 +1,59 @@
+import os
+
+import openpyxl
+import pytest
+
+import exmlrd
+from exmlrd.extract import Template
+
+
+@pytest.fixture
+def forms():
+    paths = []
+    for i in range(3):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet["C3"] = f"customer{i}"
+        for row in range(10, 13):
+            sheet.append([])
+            sheet.cell(row=row, column=2, value=f"item{row}")
+            sheet.cell(row=row, column=3, value=row * i)
+        sheet["A100"] = "footer"
+        path = f"tests/form{i}.xlsx"
+        workbook.save(path)
+        paths.append(path)
+    with open("tests/broken.xlsx", "w") as f:
+        f.write("not a workbook")
+    paths.append("tests/broken.xlsx")
+    yield paths
+    for path in paths:
+        os.remove(path)
+
+
+def test_template_targets():
+    template = Template({"name": "C3", "items": "B10:C11"})
+    assert template.targets == {3: {3}, 10: {2, 3}, 11: {2, 3}}
+    assert template.last_row == 11
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_extract_many(forms, workers):
+    template = {"name": "C3", "items": "B10:D11"}
+    results = list(exmlrd.extract_many(forms, template, workers=workers))
+    assert [r.path for r in results] == forms
+    assert results[1].ok
+    assert results[1].values == {
+        "name": "customer1",
+        "items": [["item10", "10", ""], ["item11", "11", ""]],
+    }
+    assert not results[3].ok
+    assert results[3].values is None
+    assert results[3].error.startswith("BadZipFile")
+
+
+def test_scan_cells_stops_early(forms):
+    archive = exmlrd.excel_archiver(forms[0])
+    cells = archive.sheetxml.scan_cells({3: {3}, 10: {2, 5}})
+    assert sorted(cells) == [(3, 3), (10, 2)]
+    assert cells[(10, 2)].value == "item10"
+    assert len(archive.sheetxml.cache) == 0
@@ -1,7 +1,32 @@
+import pytest
+
 from exmlrd import excel_archiver
 from exmlrd.archive import ExcelArchive
 
 
 def test_excel_archiver(setup_excel):
     result = excel_archiver("tests/sample.xlsx")
-    assert isinstance(result, ExcelArchive)
\ No newline at end of file
+    assert isinstance(result, ExcelArchive)
+
+def test_components_are_loaded_lazily(setup_excel):
+    result = excel_archiver("tests/sample.xlsx")
+    loaded = vars(result.sheetxml)
+    assert "ws" not in loaded
+    assert "sharedstyle" not in loaded
+    assert "style" not in loaded
+    assert result.worksheet(1) == "Test1"
+    assert "ws" in loaded
+    assert "style" not in loaded
+
+
+def test_preload(setup_excel):
+    result = excel_archiver("tests/sample.xlsx", preload=("sst", "styles"))
+    loaded = vars(result.sheetxml)
+    assert "sharedstyle" in loaded
+    assert "style" in loaded
+    assert "ws" not in loaded
+
+
+def test_preload_unknown_component(setup_excel):
+    with pytest.raises(ValueError):
+        excel_archiver("tests/sample.xlsx", preload=("cells",))
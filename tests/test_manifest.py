@@ -0,0 +1,77 @@
+import os
+from zipfile import ZipFile
+
+import openpyxl
+import pytest
+
+from exmlrd.archive import ExcelArchive
+from exmlrd.exceptions import NotFoundSheet
+from exmlrd.manifest import Manifest
+
+
+@pytest.fixture
+def reordered_excel():
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "First"
+    workbook.active["A1"] = "first"
+    workbook.create_sheet("Second")["A1"] = "second"
+    workbook.save("tests/ordered.xlsx")
+
+    # Move "Second" in front: the first sheet now points at sheet2.xml
+    rels = "xl/_rels/workbook.xml.rels"
+    with ZipFile("tests/ordered.xlsx") as src, ZipFile(
+        "tests/reordered.xlsx", "w"
+    ) as dst:
+        for info in src.infolist():
+            data = src.read(info.filename)
+            if info.filename == rels:
+                data = (
+                    data.replace(b"sheet1.xml", b"sheetX.xml")
+                    .replace(b"sheet2.xml", b"sheet1.xml")
+                    .replace(b"sheetX.xml", b"sheet2.xml")
+                )
+            elif info.filename == "xl/workbook.xml":
+                data = (
+                    data.replace(b'"First"', b'"X"')
+                    .replace(b'"Second"', b'"First"')
+                    .replace(b'"X"', b'"Second"')
+                )
+            dst.writestr(info, data)
+    yield "tests/reordered.xlsx"
+    os.remove("tests/ordered.xlsx")
+    os.remove("tests/reordered.xlsx")
+
+
+def test_manifest_sheets(reordered_excel):
+    manifest = Manifest(ZipFile(reordered_excel))
+    assert [(s.number, s.name, s.path) for s in manifest.sheets] == [
+        (1, "Second", "xl/worksheets/sheet2.xml"),
+        (2, "First", "xl/worksheets/sheet1.xml"),
+    ]
+    assert manifest.sheet("First").number == 2
+    with pytest.raises(NotFoundSheet):
+        manifest.sheet("Third")
+    with pytest.raises(NotFoundSheet):
+        manifest.sheet(3)
+
+
+def test_manifest_members(reordered_excel):
+    manifest = Manifest(ZipFile(reordered_excel))
+    member = manifest.member("xl/worksheets/sheet1.xml")
+    assert member.file_size > 0 and member.compress_size > 0
+    assert member.content_type.endswith("worksheet+xml")
+    assert manifest.member("xl/_rels/workbook.xml.rels").content_type.endswith(
+        "relationships+xml"
+    )
+    assert manifest.member("xl/missing.xml") is None
+
+
+def test_worksheet_by_name(reordered_excel):
+    archive = ExcelArchive(reordered_excel)
+    assert archive.get_cell(1, 1).value == "second"
+    assert archive.get_cell(1, 1, worksheet="First").value == "first"
+    assert archive.get_cell(1, 1, worksheet=2).value == "first"
+    assert archive.worksheet(1) == "Second"
+    assert list(archive.iter_rows("First", values_only=True)) == [["first"]]
+    assert archive.get_archive_filename("xl/workbook.xml") == ["xl/workbook.xml"]
+    assert archive.get_archive_filename("xl/missing.xml") == []
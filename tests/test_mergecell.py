@@ -0,0 +1,60 @@
+import pytest
+
+from exmlrd.archive import ExcelArchive
+from exmlrd.mergecell import MergeIndex, MergeRange
+
+
+@pytest.fixture
+def mergeindex():
+    yield MergeIndex([
+        MergeRange(1, 8, 1, 9, "H1:I1"),
+        MergeRange(7, 1, 9, 7, "A7:G9"),
+        MergeRange(2, 13, 10, 13, "M2:M10"),
+        MergeRange(8, 10, 8, 12, "J8:L8"),
+    ])
+
+@pytest.mark.parametrize('row, col, expected', [
+    (1, 8, "H1:I1"),
+    (1, 9, "H1:I1"),
+    (1, 10, None),
+    (8, 4, "A7:G9"),
+    (9, 7, "A7:G9"),
+    (10, 2, None),
+    (10, 13, "M2:M10"),
+    (8, 13, "M2:M10"),
+    (11, 13, None),
+    (8, 11, "J8:L8"),
+    (11, 1, None),
+    (1, 1, None)])
+def test_find(mergeindex, row, col, expected):
+    mrange = mergeindex.find(row, col)
+    assert (mrange.ref if mrange else None) == expected
+
+def test_overlapping(mergeindex):
+    refs = [m.ref for m in mergeindex.overlapping(1, 1, 7, 3)]
+    assert refs == ["A7:G9"]
+    refs = [m.ref for m in mergeindex.overlapping(8, 8, 20, 20)]
+    assert refs == ["M2:M10", "J8:L8"]
+    assert mergeindex.overlapping(11, 1, 20, 20) == []
+    assert mergeindex.overlapping(1, 1, 20, 20) == mergeindex.ranges
+
+def test_empty_index():
+    mergeindex = MergeIndex([])
+    assert mergeindex.find(1, 1) is None
+    assert mergeindex.overlapping(1, 1, 10, 10) == []
+
+@pytest.mark.parametrize('cell, expected', [
+    ("I1", "H1:I1"), ("C8", "A7:G9"), ("$G$9", "A7:G9"), ("H9", "")])
+def test_get_mergecell_interior(setup_excel, cell, expected):
+    archive = ExcelArchive("tests/sample.xlsx")
+    assert archive.get_mergecell(cell, 1) == expected
+
+def test_find_mergecells(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    assert set(archive.find_mergecells("A1:I8", 1)) == {"H1:I1", "A7:G9"}
+    assert archive.find_mergecells("A2:F6", 1) == []
+
+def test_mergerange_from_ref():
+    mrange = MergeRange.from_ref("G9:A7")
+    assert mrange == MergeRange(7, 1, 9, 7, "G9:A7")
+    assert mrange.range.ref == "A7:G9"
@@ -0,0 +1,87 @@
+import os
+import pickle
+
+import openpyxl
+import pytest
+
+from benchmarks.generator import generate
+from exmlrd import parallel
+from exmlrd.archive import ExcelArchive
+from exmlrd.cell import RawCell
+from exmlrd.compact import CompactSheet
+
+
+@pytest.fixture
+def multi_sheet_excel():
+    workbook = openpyxl.Workbook()
+    for index in range(1, 4):
+        sheet = workbook.active if index == 1 else workbook.create_sheet()
+        sheet.title = f"Month{index}"
+        for row in range(1, 6):
+            sheet.append([index * 100 + row, f"name{row}", f"=A{row}*2"])
+    workbook.save("tests/multi.xlsx")
+    yield "tests/multi.xlsx"
+    os.remove("tests/multi.xlsx")
+
+
+def test_compact_sheet_roundtrip(multi_sheet_excel):
+    archive = ExcelArchive(multi_sheet_excel)
+    parsed = archive.sheetxml.get_sheet(2)
+    compact = pickle.loads(pickle.dumps(CompactSheet.from_parsed(parsed)))
+    assert len(compact) == 15
+    cells = list(compact)
+    assert cells[0] == RawCell(1, 1, "A1", "201", "", "n", 0, None)
+    assert cells[1].value == "name1"
+    assert cells[2].formula == "A1*2"
+    assert compact.to_parsed().rows == parsed.rows
+
+
+def test_read_sheets_in_process(multi_sheet_excel):
+    archive = ExcelArchive(multi_sheet_excel)
+    sheets = archive.read_sheets(workers=1)
+    assert list(sheets) == [1, 2, 3]
+    assert [c.value for c in sheets[3]][:2] == ["301", "name1"]
+
+
+def test_read_sheets_process_pool(multi_sheet_excel):
+    archive = ExcelArchive(multi_sheet_excel)
+    sheets = archive.read_sheets([3, 1], workers=2)
+    expected = archive.read_sheets([3, 1], workers=1)
+    assert list(sheets) == [3, 1]
+    assert [list(s) for s in sheets.values()] == [list(s) for s in expected.values()]
+
+
+def test_read_sheets_from_disk_cache(multi_sheet_excel, tmp_path):
+    expected = ExcelArchive(multi_sheet_excel, cache_dir=str(tmp_path)).read_sheets(workers=1)
+    archive = ExcelArchive(multi_sheet_excel, cache_dir=str(tmp_path))
+    # The shared strings come from the sidecar and are shipped to the workers
+    pickle.dumps(archive.sheetxml.sharedstyle.table())
+    sheets = archive.read_sheets(workers=2)
+    assert [list(s) for s in sheets.values()] == [list(s) for s in expected.values()]
+
+
+def test_worker_ships_shared_string_indices(tmp_path, monkeypatch):
+    for name in ("WORKER_FILEPATH", "WORKER_PARSER", "WORKER_SHAREDSTYLE", "WORKER_SHIPPED"):
+        monkeypatch.setattr(parallel, name, getattr(parallel, name))
+    parsers = []
+    worker_sheetxml = parallel.SheetXml
+
+    def sheetxml(*args, **kwargs):
+        parsers.append(kwargs["parser"])
+        return worker_sheetxml(*args, **kwargs)
+
+    monkeypatch.setattr(parallel, "SheetXml", sheetxml)
+    path = generate(str(tmp_path), "sst", 200)
+    archive = ExcelArchive(path)
+    expected = archive.sheetxml.get_sheet(1)
+    sharedstyle = archive.sheetxml.sharedstyle
+    parallel.init_worker(path, sharedstyle.table(), "etree")
+    compact = pickle.loads(pickle.dumps(parallel.parse_sheet(1)))
+    assert parsers == ["etree"]
+    # Only the index of the shared strings is shipped back
+    text = expected.find(1, 1).value
+    assert expected.find(1, 1).sst_index is not None
+    assert text.encode() not in bytes(compact.values)
+    compact.sharedstyle = sharedstyle
+    assert compact.to_parsed().rows == expected.rows
+    assert list(compact)[0].value == text
@@ -0,0 +1,91 @@
+from zipfile import ZipFile
+
+import pytest
+
+from exmlrd.archive import ExcelArchive
+from exmlrd.cell import SheetXml
+from exmlrd.parsers import ExpatParser, get_parser
+from exmlrd.sharedstyle import SharedStyle
+
+BACKENDS = ["etree", "lxml", "expat"]
+
+SHEET_XML = (
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<dimension ref="A1:C3"/>'
+    "<sheetData>"
+    '<row r="1"><c r="A1" t="s"><v>1</v></c><c r="C1"><f>SUM(1,2)</f><v>3</v></c></row>'
+    '<row><c><v>4</v></c><c t="inlineStr"><is><t>漢字</t><rPh sb="0" eb="2"><t>カンジ</t></rPh></is></c></row>'
+    '<row r="3"><c r="B3" t="inlineStr"><is><r><t>a</t></r><r><t>b</t></r></is></c></row>'
+    "</sheetData>"
+    '<mergeCells count="1"><mergeCell ref="A3:B3"/></mergeCells>'
+    "</worksheet>"
+)
+SST_XML = (
+    '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    "<si><t>plain</t></si>"
+    '<si><r><rPr><sz val="16"/><rFont val="Arial"/></rPr><t>rich &amp; </t></r><r><t>text</t></r></si>'
+    '<si><t>漢字</t><rPh sb="0" eb="2"><t>カンジ</t></rPh></si>'
+    "</sst>"
+)
+
+
+@pytest.fixture
+def handmade(tmp_path):
+    path = tmp_path / "handmade.xlsx"
+    with ZipFile(path, "w") as z:
+        z.writestr("xl/worksheets/sheet1.xml", SHEET_XML)
+        z.writestr("xl/sharedStrings.xml", SST_XML)
+    archive = ZipFile(path)
+    yield archive
+    archive.close()
+
+
+def rows(sheetxml):
+    sheet = sheetxml.get_sheet(1)
+    return sheet.dimension, sheet.mergecells, sheet.rows
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_backends_agree_on_sample(setup_excel, name):
+    expected = rows(SheetXml(ZipFile("tests/sample.xlsx"), parser="etree"))
+    assert rows(SheetXml(ZipFile("tests/sample.xlsx"), parser=name)) == expected
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_sheet_data(handmade, name):
+    sheetxml = SheetXml(handmade, parser=name)
+    dimension, mergecells, cells = rows(sheetxml)
+    assert dimension == "A1:C3"
+    assert mergecells == ["A3:B3"]
+    assert cells[1][1].value == "rich & text"
+    assert cells[1][1].sst_index == 1
+    assert cells[1][3].formula == "SUM(1,2)"
+    assert cells[1][3].value == "3"
+    # Rows and cells without r attribute follow the previous one
+    assert cells[2][1].value == "4"
+    assert cells[2][2].value == "漢字"
+    assert cells[3][2].value == "ab"
+
+
+@pytest.mark.parametrize("name", BACKENDS)
+def test_shared_items(handmade, name):
+    shared = SharedStyle(handmade, parser=name)
+    assert [shared.get_text(i) for i in range(3)] == ["plain", "rich & text", "漢字"]
+    assert list(shared.rich) == [1]
+    expected = SharedStyle(handmade, parser="etree").get_shareitem(1)
+    assert shared.get_shareitem(1) == expected
+    assert expected.rpr[0].sz == "16"
+    assert expected.rpr[0].rFont == "Arial"
+
+
+def test_get_parser():
+    assert isinstance(get_parser(), ExpatParser)
+    parser = get_parser("lxml")
+    assert get_parser(parser) is parser
+    with pytest.raises(ValueError):
+        get_parser("bogus")
+
+
+def test_archive_parser(setup_excel):
+    excel = ExcelArchive("tests/sample.xlsx", parser="etree")
+    assert excel.get_cell(1, 8).value == "1000"
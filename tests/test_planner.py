@@ -0,0 +1,129 @@
+import pytest
+
+from benchmarks.generator import generate
+from exmlrd import planner
+from exmlrd.archive import ExcelArchive
+from exmlrd.planner import Planner, SheetSize, available_memory
+
+MiB = 1024 * 1024
+# 1M cells of about 32 bytes, 100k rows
+LARGE = SheetSize(
+    file_size=32 * MiB, compress_size=8 * MiB, rows=100000, cache_bytes=512 * MiB
+)
+
+
+@pytest.fixture(autouse=True)
+def no_memory_limit(monkeypatch):
+    monkeypatch.setattr(planner, "available_memory", lambda: None)
+
+
+def test_plan_without_budget():
+    plans = Planner()
+    assert plans.plan_lookup("get_cell", 1, LARGE, [5], 1).strategy == "index"
+    assert plans.plan_lookup("get_cell", 1, LARGE, [5], 1, cache=False).strategy == "stop_early"
+    assert plans.plan_lookup("get_cell", 1, LARGE._replace(cache_bytes=0), [5], 1).strategy == "stop_early"
+    assert plans.plan_lookup("get_cell", 1, LARGE._replace(checkpoint_rows=1000), [5], 1).strategy == "seek"
+    assert plans.plan_lookup("get_cell", 1, LARGE._replace(cached=True), [5], 1).strategy == "cached"
+
+def test_plan_index_over_cache():
+    plan = Planner().plan_lookup("get_cell", 1, LARGE._replace(cache_bytes=MiB), [5], 1)
+    assert plan.strategy == "stop_early"
+    assert "sheet cache" in plan.reason
+
+def test_small_cache_does_not_index(tmp_path):
+    path = generate(str(tmp_path), "sst", 20000)
+    expected = ExcelArchive(path).get_cells(["A1", "C5", "B3"])
+    archive = ExcelArchive(path, cache_bytes=1000, instrument=True)
+    for _ in range(5):
+        assert archive.get_cells(["A1", "C5", "B3"]) == expected
+    assert archive.explain().strategy == "stop_early"
+    assert archive.stats()["counters"]["sheet_cache_misses"] == 0
+
+def test_plan_over_budget():
+    plan = Planner(64 * MiB).plan_lookup("get_cells", 1, LARGE, [5, 90000], 2)
+    assert plan.strategy == "stop_early"
+    assert plan.alternatives["index"].memory > 64 * MiB
+    assert plan.cost.memory < 64 * MiB
+    assert "over the budget" in plan.reason
+    assert "over budget" in plan.format()
+
+def test_plan_indexes_after_repeated_lookups():
+    plans = Planner(512 * MiB)
+    strategies = []
+    for row in range(1000, 100000, 1000):
+        plan = plans.plan_lookup("get_cell", 1, LARGE, [row], 1)
+        plans.record(plan)
+        strategies.append(plan.strategy)
+        if plan.strategy == "index":
+            break
+    # The first lookups stream, until they would have cost as much as the index
+    assert strategies[0] == "stop_early"
+    assert strategies[-1] == "index"
+    assert plans.plan_lookup("get_cell", 1, LARGE, [10], 1).strategy == "stop_early"
+
+def test_plan_costs():
+    plans = Planner(512 * MiB)
+    near = plans.plan_lookup("get_cell", 1, LARGE, [10], 1).cost
+    far = plans.plan_lookup("get_cell", 1, LARGE, [100000], 1).cost
+    assert near.seconds < far.seconds
+    assert near.inflated < far.inflated == LARGE.file_size
+    # Without a dimension the whole member is assumed to be read
+    unknown = plans.plan_lookup("get_cell", 1, LARGE._replace(rows=None), [10], 1)
+    assert unknown.cost.inflated == LARGE.file_size
+    assert plans.plan_read("to_json", 1, LARGE).strategy == "stream"
+    assert plans.plan_read("to_numpy", 1, LARGE).strategy == "index"
+    assert plans.plan_read("probe_sheet", 1, LARGE).cost.inflated == 0
+    # The range of the exports is checked against every row
+    assert plans.plan_read("get_used_address", 1, LARGE).cost.inflated == LARGE.file_size
+    with pytest.raises(ValueError):
+        plans.plan_read("unknown", 1, LARGE)
+    with pytest.raises(ValueError):
+        Planner(-1)
+
+def test_available_memory(tmp_path, monkeypatch):
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_bytes(b"MemTotal: 16000000 kB\nMemFree: 100 kB\nMemAvailable: 8000000 kB\n")
+    monkeypatch.setattr(planner, "MEMINFO_PATH", str(meminfo))
+    # The page cache counts as available, not only the free pages
+    assert available_memory() == 8000000 * 1024
+    monkeypatch.setattr(planner, "MEMINFO_PATH", str(tmp_path / "missing"))
+    assert available_memory() is None
+
+def test_memory_budget(tmp_path):
+    path = generate(str(tmp_path), "sst", 20000)
+    expected = ExcelArchive(path).get_cells(["A1", "C5", "B3"])
+    archive = ExcelArchive(path, memory_budget=100 * 1024)
+    assert archive.sheetxml.cache.max_bytes == 100 * 1024
+    assert archive.get_cells(["A1", "C5", "B3"]) == expected
+    assert len(archive.sheetxml.cache) == 0
+    assert archive.explain().strategy == "stop_early"
+
+def test_memory_budget_indexes_hot_sheet(tmp_path):
+    path = generate(str(tmp_path), "sst", 20000)
+    archive = ExcelArchive(path, memory_budget=64 * MiB)
+    archive.get_cell(5, 3)
+    assert len(archive.sheetxml.cache) == 0
+    for row in range(1, 2000, 10):
+        archive.get_cell(row, 2)
+        if archive.sheetxml.cache:
+            break
+    assert archive.explain().strategy == "index"
+    archive.get_cell(5, 3)
+    assert archive.explain().strategy == "cached"
+
+def test_explain(setup_excel):
+    archive = ExcelArchive("tests/sample.xlsx")
+    assert archive.explain() is None
+    assert archive.explain("get_cell", (1, 1)).strategy == "index"
+    assert archive.explain("get_range", "A1:B2").cells == 4
+    assert archive.explain("get_cells", ["A1", "B2"], cache=False).strategy == "stop_early"
+    assert archive.explain("to_json").strategy == "stream"
+    plan = archive.explain("probe_sheet")
+    assert plan.strategy == "probe" and plan.cost.inflated == 0
+    # Explaining does not read the sheet
+    assert len(archive.sheetxml.cache) == 0
+    archive.get_cell(1, 1)
+    assert archive.explain().operation == "get_cell"
+    assert archive.explain("get_cell", "A1").strategy == "cached"
+    with pytest.raises(ValueError):
+        archive.explain("get_cell")
@@ -0,0 +1,109 @@
+import io
+import json
+import re
+import zipfile
+
+import pytest
+
+from benchmarks.generator import generate
+from exmlrd import probe
+from exmlrd.archive import ExcelArchive
+from exmlrd.probe import scan_bounds
+
+SHEET = "xl/worksheets/sheet1.xml"
+
+
+def rewrite(path, out, transform):
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+        for name in src.namelist():
+            data = src.read(name)
+            if name == SHEET:
+                data = transform(data)
+            dst.writestr(name, data)
+    return str(out)
+
+def set_dimension(ref):
+    element = b"" if ref is None else b'<dimension ref="' + ref.encode() + b'"/>'
+    return lambda data: re.sub(rb"<dimension [^>]*/>", element, data)
+
+
+def test_probe_sheet(setup_excel):
+    excel = ExcelArchive("tests/sample.xlsx")
+    result = excel.probe_sheet()
+    assert result.dimension == "A1:I9"
+    assert result.used_range == "A1:I9"
+    assert not result.scanned
+    assert result.sheet_views[0]["workbookViewId"] == "0"
+    assert result.sheet_views[0]["selection"][0]["activeCell"] == "A1"
+    assert "defaultRowHeight" in result.format_pr
+    assert result.sheet_pr["outlinePr"] == {"summaryBelow": "1", "summaryRight": "1"}
+    assert excel.get_sheetrange_coordinate() == ((1, 1), (9, 9))
+    assert len(excel.sheetxml.cache) == 0
+
+@pytest.mark.parametrize("dimension", [None, "A1", "", "nonsense"])
+def test_probe_scans_rows(setup_excel, tmp_path, dimension):
+    path = rewrite("tests/sample.xlsx", tmp_path / "probe.xlsx", set_dimension(dimension))
+    excel = ExcelArchive(path)
+    result = excel.probe_sheet()
+    assert result.dimension == dimension
+    assert result.scanned
+    # The dimension written by openpyxl also covers the merged cells
+    assert result.used_range == "A1:H7"
+    assert excel.get_sheetrange_address() == dimension
+
+def test_to_json_without_dimension(setup_excel, tmp_path):
+    stream = io.StringIO()
+    ExcelArchive("tests/sample.xlsx").dump_json(stream, range="A1:H7", encoder="json")
+    expected = json.loads(stream.getvalue())
+    for dimension in (None, "A1"):
+        path = rewrite("tests/sample.xlsx", tmp_path / "probe.xlsx", set_dimension(dimension))
+        assert json.loads(ExcelArchive(path).to_json()) == expected
+
+def test_probe_scan_uses_cached_sheet(setup_excel):
+    excel = ExcelArchive("tests/sample.xlsx")
+    excel.get_cell(1, 1)
+    result = excel.probe_sheet(scan=True)
+    assert result.scanned
+    assert result.used_range == "A1:H7"
+
+def test_probe_scan_on_request(setup_excel, tmp_path):
+    # An oversized dimension holds the first rows, only a scan finds the stored cells
+    path = rewrite("tests/sample.xlsx", tmp_path / "probe.xlsx", set_dimension("A1:Z99"))
+    excel = ExcelArchive(path)
+    assert excel.probe_sheet().used_range == "A1:Z99"
+    assert excel.probe_sheet(scan=True).used_range == "A1:H7"
+    assert excel.probe_sheet().scanned
+
+def test_stale_dimension_past_first_block(tmp_path):
+    # 200 rows of 10 cells, the first block only holds the first rows
+    path = rewrite(generate(str(tmp_path), "sst", 2000), tmp_path / "stale.xlsx", set_dimension("A1:J100"))
+    excel = ExcelArchive(path)
+    assert excel.probe_sheet().used_range == "A1:J100"
+    assert excel.sheetxml.get_used_address() == "A1:J200"
+    cells = json.loads(excel.to_json())["Sheet1"]
+    assert len(cells) == 2000 and cells[-1]["address"] == "J200"
+    assert excel.sheetxml.get_dimension_address() == "A1:J100"
+
+def test_used_address_keeps_dimension(setup_excel, tmp_path):
+    # The dimension also covers the merged cells past the stored ones
+    assert ExcelArchive("tests/sample.xlsx").sheetxml.get_used_address() == "A1:I9"
+    path = rewrite("tests/sample.xlsx", tmp_path / "probe.xlsx", set_dimension("B2:C3"))
+    assert ExcelArchive(path).sheetxml.get_used_address() == "A1:H7"
+
+def test_probe_defaults():
+    result = probe.SheetProbe()
+    assert result.sheet_pr is None and result.cols is None
+
+@pytest.mark.parametrize("read_size", [7, 64 * 1024])
+def test_scan_bounds(monkeypatch, read_size):
+    monkeypatch.setattr(probe, "SCAN_READ_SIZE", read_size)
+    xml = (
+        b'<x:worksheet xmlns:x="main"><x:cols><x:col min="1" max="2"/></x:cols>'
+        b'<x:sheetData><x:row r="3"><x:c r="C3"><x:v>1</x:v></x:c><x:c><x:v>2</x:v></x:c></x:row>'
+        b'<x:row><x:c r="B4"/></x:row><x:row r="9"/></x:sheetData>'
+        b'<x:mergeCells><x:mergeCell ref="A1:Z99"/></x:mergeCells><x:c r="ZZ1"/></x:worksheet>'
+    )
+    bounds, nbytes = scan_bounds(io.BytesIO(xml))
+    assert bounds == (3, 2, 4, 4)
+    assert nbytes <= len(xml)
+    assert scan_bounds(io.BytesIO(b"<worksheet><sheetData/></worksheet>"))[0] is None
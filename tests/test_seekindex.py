@@ -0,0 +1,79 @@
+import re
+import zipfile
+
+import pytest
+
+from benchmarks.generator import generate
+from exmlrd.archive import ExcelArchive
+from exmlrd.seekindex import SeekIndex
+
+SHEET = "xl/worksheets/sheet1.xml"
+
+
+@pytest.fixture(scope="module")
+def large_excel(tmp_path_factory):
+    # 2000 rows of 10 cells
+    return generate(str(tmp_path_factory.mktemp("seek")), "numeric", 20000)
+
+def rewrite(path, out, compression=zipfile.ZIP_DEFLATED, transform=None):
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(out, "w", compression) as dst:
+        for name in src.namelist():
+            data = src.read(name)
+            if name == SHEET and transform is not None:
+                data = transform(data)
+            dst.writestr(name, data)
+    return str(out)
+
+def test_build_checkpoints(large_excel):
+    with zipfile.ZipFile(large_excel) as archive:
+        index = SeekIndex.build(archive, SHEET, 100)
+        with pytest.raises(ValueError):
+            SeekIndex.build(archive, SHEET, 0)
+    rows = [checkpoint.row for checkpoint in index.checkpoints]
+    assert len(index) > 5
+    assert rows == sorted(rows)
+    assert index.prefix.endswith(b"<sheetData>")
+    assert index.find(1) is None
+    assert index.find(rows[2]).row == rows[2]
+    assert index.find(rows[2] + 1).row == rows[2]
+
+@pytest.mark.parametrize('compression', [zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED])
+def test_seek_reads_match_full_parse(large_excel, tmp_path, compression):
+    path = rewrite(large_excel, tmp_path / "book.xlsx", compression)
+    full = ExcelArchive(path)
+    seek = ExcelArchive(path, checkpoint_rows=100, cache_bytes=0)
+    for row, col in [(1, 1), (150, 3), (999, 10), (1500, 1), (2000, 10), (2001, 1)]:
+        assert seek.get_cell(row, col, raw=True) == full.get_cell(row, col, raw=True)
+    assert len(seek.sheetxml.seek_index(1)) > 5
+    assert seek.sheetxml.get_range("C1795:E1805", raw=True) == full.sheetxml.get_range(
+        "C1795:E1805", raw=True)
+    addresses = ["J1999", "A5", "B1234"]
+    assert seek.get_cells(addresses, raw=True) == full.get_cells(addresses, raw=True)
+    assert list(seek.iter_rows(1, min_row=1990, values_only=True)) == list(
+        full.iter_rows(1, min_row=1990, values_only=True))
+
+def test_seek_inflates_from_checkpoint(large_excel):
+    excel = ExcelArchive(large_excel, checkpoint_rows=100, cache_bytes=0, instrument=True)
+    excel.sheetxml.seek_index(1)
+    excel.reset_stats()
+    excel.get_cell(1990, 2)
+    member = excel.get_archive_member(SHEET)
+    inflated = excel.stats()["phases"]["inflate"]["bytes"]
+    assert 0 < inflated < member.file_size / 4
+
+def test_seek_rows_without_r(large_excel, tmp_path):
+    # r is optional on <row> and <c>, rows are then numbered by position
+    path = rewrite(large_excel, tmp_path / "nor.xlsx",
+                   transform=lambda data: re.sub(rb' r="\w+"', b"", data))
+    full = ExcelArchive(large_excel)
+    seek = ExcelArchive(path, checkpoint_rows=100, cache_bytes=0)
+    assert len(seek.sheetxml.seek_index(1)) > 5
+    assert seek.get_cell(1777, 4).value == full.get_cell(1777, 4).value
+
+def test_cached_sheet_skips_checkpoints(setup_excel):
+    excel = ExcelArchive("tests/sample.xlsx", checkpoint_rows=1)
+    excel.sheetxml.get_sheet(1)
+    assert excel.get_cell(7, 1).value == "SampleText"
+    assert excel.get_cell(1, 8).value == "1000"
+    with pytest.raises(ValueError):
+        ExcelArchive("tests/sample.xlsx", checkpoint_rows=0)
@@ -85,4 +85,55 @@ def test_si_text():
     si = SiTag()
     si.rpr.append(rich1)
     si.rpr.append(rich2)
-    assert si.text == pred
\ No newline at end of file
+    assert si.text == pred
+
+SST_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="4" uniqueCount="4">'
+    '<si><t>plain</t></si>'
+    '<si><r><rPr><sz val="16"/><rFont val="Arial"/></rPr><t>rich </t></r><r><t>text</t></r></si>'
+    '<si><t>漢字</t><rPh sb="0" eb="2"><t>カンジ</t></rPh><phoneticPr fontId="1"/></si>'
+    '<si><t/></si>'
+    '</sst>'
+)
+
+
+@pytest.fixture
+def sst_archive(tmp_path):
+    path = tmp_path / "sst.xlsx"
+    with ZipFile(path, "w") as z:
+        z.writestr("xl/sharedStrings.xml", SST_XML)
+    archive = ZipFile(path)
+    yield archive
+    archive.close()
+
+def test_compact_shared_strings(sst_archive):
+    shared = SharedStyle(sst_archive)
+    assert len(shared) == 4
+    assert len(shared.si) == 4
+    assert shared.get_text(0) == "plain"
+    assert shared.get_text(1) == "rich text"
+    assert shared.get_text(2) == "漢字"
+    assert shared.get_text(3) == ""
+    assert shared.get_text(4) == ""
+    assert list(shared.rich) == [1]
+
+def test_lazy_shareitem(sst_archive):
+    shared = SharedStyle(sst_archive)
+    assert shared.get_shareitem(0) == SiTag(rpr=[RichText(text="plain")])
+    rich = shared.get_shareitem(1)
+    assert rich.rpr == [RichText(sz="16", rFont="Arial", text="rich "), RichText(text="text")]
+    assert shared.get_shareitem(2).text == "漢字"
+    assert shared.get_shareitem(10) == SiTag()
+
+def test_no_shared_strings(setup_excel, sharedstyle):
+    assert len(sharedstyle) == 0
+    assert sharedstyle.get_text(0) == ""
+    assert sharedstyle.get_shareitem(0) == SiTag()
+
+@pytest.mark.parametrize("limit, complete", [(2, False), (4, True), (10, True)])
+def test_shared_strings_limit(sst_archive, limit, complete):
+    shared = SharedStyle(sst_archive, limit=limit)
+    assert len(shared) == min(limit, 4)
+    assert shared.complete == complete
+    assert shared.get_shareitem(1).text == "rich text"
@@ -0,0 +1,66 @@
+import logging
+
+from exmlrd import log
+from exmlrd.archive import ExcelArchive
+from exmlrd.stats import PHASES, Stats
+
+
+def test_stats_disabled(setup_excel):
+    excel = ExcelArchive("tests/sample.xlsx")
+    excel.to_json()
+    assert excel.stats() == {}
+
+def test_stats_phases(setup_excel):
+    excel = ExcelArchive("tests/sample.xlsx", instrument=True)
+    excel.to_json()
+    stats = excel.stats()
+    assert set(stats["phases"]) == set(PHASES)
+    for phase in ("inflate", "parse", "styles", "cells", "serialize"):
+        assert stats["phases"][phase]["calls"] > 0
+        assert stats["phases"][phase]["seconds"] > 0
+    assert stats["phases"]["inflate"]["bytes"] > 0
+    assert stats["phases"]["serialize"]["bytes"] > 0
+    # The dimension is probed, to_json streams the rows without caching the sheet
+    assert stats["counters"]["sheet_cache_misses"] == 0
+    excel.get_cell(1, 1)
+    excel.get_cell(1, 1)
+    assert excel.stats()["counters"]["sheet_cache_misses"] == 1
+    assert excel.stats()["counters"]["sheet_cache_hits"] > 0
+    excel.reset_stats()
+    assert excel.stats()["phases"]["parse"]["calls"] == 0
+
+def test_stats_hooks(setup_excel):
+    events = []
+    excel = ExcelArchive("tests/sample.xlsx", hooks=[lambda *args: events.append(args)])
+    excel.get_cell(1, 1)
+    assert {phase for phase, _, _ in events} >= {"inflate", "parse", "cells"}
+    assert all(seconds >= 0 and nbytes >= 0 for _, seconds, nbytes in events)
+
+def test_nested_spans_are_exclusive():
+    stats = Stats()
+    with stats.span("parse"):
+        with stats.span("inflate") as span:
+            span.nbytes = 10
+        stats.add("cells", 1.0)
+    assert stats.phases["inflate"].nbytes == 10
+    assert stats.phases["cells"].seconds == 1.0
+    assert stats.phases["parse"].seconds < 1.0
+
+def test_iter_rows_progress(setup_excel):
+    reported = []
+    excel = ExcelArchive("tests/sample.xlsx")
+    rows = list(excel.iter_rows(1, progress=lambda done, total: reported.append((done, total))))
+    assert reported[-1] == (len(rows), 9)
+
+def test_dump_json_progress(setup_excel, tmp_path):
+    reported = []
+    excel = ExcelArchive("tests/sample.xlsx")
+    with open(tmp_path / "out.json", "w") as f:
+        excel.dump_json(f, range="A1:E4", progress=lambda done, total: reported.append((done, total)))
+    assert reported[-1] == (20, 20)
+
+def test_library_logger_is_silent():
+    log.get_logger("exmlrd.cell")
+    handlers = logging.getLogger("exmlrd").handlers
+    assert any(isinstance(h, logging.NullHandler) for h in handlers)
+    assert not logging.getLogger("exmlrd.cell").handlers
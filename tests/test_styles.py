@@ -0,0 +1,56 @@
+from dataclasses import FrozenInstanceError
+from zipfile import ZipFile
+
+import pytest
+
+from exmlrd.styles import Format, Styels
+
+STYLES_XML = (
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><name val="Calibri"/><sz val="11"/></font>'
+    '<font><name val="Arial"/><b val="1"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '</styleSheet>'
+)
+
+
+@pytest.fixture
+def styles(tmp_path):
+    path = tmp_path / "styles.xlsx"
+    with ZipFile(path, "w") as z:
+        z.writestr("xl/styles.xml", STYLES_XML)
+    archive = ZipFile(path)
+    yield Styels(archive)
+    archive.close()
+
+def test_identical_xfs_are_interned(styles):
+    assert len(styles.cellxfs) == 4
+    assert styles.cellxfs[1] is styles.cellxfs[2]
+    assert styles.cellxfs[1] is not styles.cellxfs[3]
+
+def test_get_format_is_memoised(styles):
+    assert styles.get_format(0).font.name == "Calibri"
+    assert styles.get_format(1).font.name == "Arial"
+    assert styles.get_format(1) is styles.get_format(2)
+    assert styles.get_format(1) is styles.get_format(3)
+    assert styles.get_format(0) is not styles.get_format(1)
+
+def test_get_format_parts_are_frozen(styles):
+    fmt = styles.get_format(1)
+    with pytest.raises(FrozenInstanceError):
+        fmt.font.name = "Calibri"
+    with pytest.raises(FrozenInstanceError):
+        fmt.border.left = True
+    with pytest.raises(FrozenInstanceError):
+        fmt.numFmt.formatCode = "0.00"
+    assert styles.get_format(2).font.name == "Arial"
+
+def test_get_format_out_of_range(styles):
+    assert styles.get_format(100) == Format()